@@ -7,46 +7,92 @@ Key Manager - Handles all cryptographic key operations
 
 import os
 import json
+import struct
 import base64
+import threading
 from pathlib import Path
 from src.crypto.engine import CryptoEngine
+from src.storage.backends import LocalBackend
+from src.storage.group_commit import GroupCommit
+from src.storage.locking import VaultLocks, merge_metadata
+from src import profiling
+
+# metadata.enc starts with this and a version counter (older vaults have neither)
+METADATA_MAGIC = b"VMETA1\x00\x00"
+METADATA_HEADER = struct.Struct(">8sQ")
+
+class MetadataError(ValueError):
+    """metadata.enc exists but can't be decrypted or parsed"""
+
+class VaultMetadata(dict):
+    """
+    Metadata dict from load_metadata, carrying its version token: the
+    (version, JSON) of metadata.enc it was loaded from or last saved as.
+    A save diffs the dict against its own token, so copies loaded at
+    different times (other threads, other callers) never undo each
+    other's changes. dict(metadata) drops the token: saved as is.
+    """
+    snapshot = None
 
 class KeyManager:
-    def __init__(self, vault_path: str = "./vault_data"):
+    def __init__(self, vault_path: str = "./vault_data", backend=None, crypto=None,
+                 commit_window: float = 0.0):
+        """
+        commit_window: Seconds a metadata save waits for concurrent saves to
+                       join it (they always share a write already in progress)
+        """
         self.vault_path = Path(vault_path)
-        self.crypto = CryptoEngine()
+        self.local = backend is None
+        self.backend = backend or LocalBackend(vault_path)
+        self.crypto = crypto or CryptoEngine()
+        self.metadata_commit = GroupCommit(self._write_metadata, commit_window)
+        self.locks = VaultLocks(vault_path if self.local else None, owner=self.backend)
+        # Saves waiting for the next group write, and tickets whose save conflicted
+        self._staged = []
+        self._conflicts = {}
+        self._base_lock = threading.Lock()
+        self.metadata_version = 0
+        self.metadata_merges = 0
         print(" Key Manager Initialized")
     
+    def vault_exists(self) -> bool:
+        """Check whether a vault has been initialized here"""
+        return self.backend.exists("master_key.enc")
+    
     def initialize_vault(self, password: str) -> bool:
         """Create a new encrypted vault"""
-        print(" Initializing new vault...")
+        # Exclusive: nobody may unlock a half-created vault
+        with self.locks.exclusive():
+            print(" Initializing new vault...")
         
-        # Create vault directory
-        self.vault_path.mkdir(exist_ok=True)
+            # Create vault directory
+            if self.local:
+                self.vault_path.mkdir(exist_ok=True)
         
-        # Generate KEK (Key Encryption Key) from password
-        print("   Deriving master key from password...")
-        master_key, salt = self.crypto.derive_key(password)
+            # Generate KEK (Key Encryption Key) from password
+            print("   Deriving master key from password...")
+            master_key, salt = self.crypto.derive_key(password)
         
-        # Generate a random KEK
-        kek = self.crypto.generate_file_key()
+            # Generate a random KEK
+            kek = self.crypto.generate_file_key()
         
-        # Encrypt the KEK with master key
-        encrypted_kek = self.crypto.encrypt_data(kek, master_key)
+            # Encrypt the KEK with master key
+            encrypted_kek = self.crypto.encrypt_data(kek, master_key)
         
-        # Save encrypted data
-        print("   Saving encrypted keys...")
-        with open(self.vault_path / "master_key.enc", 'wb') as f:
-            f.write(salt + encrypted_kek)
+            # Save encrypted data
+            print("   Saving encrypted keys...")
+            self.backend.put("master_key.enc", salt + encrypted_kek)
         
-        # Create empty metadata
-        metadata = {}
-        self.save_metadata(metadata, kek)
+            # Create empty metadata (replacing any old file, the new KEK can't read it)
+            metadata = {}
+            self.save_metadata(metadata, kek)
         
-        # Save password hint (optional, not secure)
-        with open(self.vault_path / "password_hint.txt", 'w') as f:
-            f.write(f"Vault created at: {Path.cwd()}\n")
-            f.write(f"Password reminder: Set password as '{password}'\n")
+            # Save password hint (optional, not secure) - only on this machine,
+            # never uploaded to remote storage
+            if self.local:
+                hint = (f"Vault created at: {Path.cwd()}\n"
+                        f"Password reminder: Set password as '{password}'\n")
+                self.backend.put("password_hint.txt", hint.encode())
         
         print(" Vault initialized successfully!")
         return True
@@ -55,13 +101,12 @@ class KeyManager:
         """Unlock existing vault and return KEK"""
         print(" Attempting to unlock vault...")
         
-        key_file = self.vault_path / "master_key.enc"
-        if not key_file.exists():
-            raise FileNotFoundError(" No vault found!")
-        
         # Load encrypted data
-        with open(key_file, 'rb') as f:
-            data = f.read()
+        try:
+            with self.locks.shared():
+                data = self.backend.get("master_key.enc")
+        except FileNotFoundError:
+            raise FileNotFoundError(" No vault found!")
         
         # Extract salt and encrypted KEK
         salt = data[:32]  # First 32 bytes
@@ -80,37 +125,187 @@ class KeyManager:
     def save_metadata(self, metadata: dict, kek: bytes) -> bool:
         """Save vault metadata encrypted with KEK"""
         try:
-            # Convert to JSON
-            metadata_json = json.dumps(metadata).encode()
-            
-            # Encrypt with KEK
-            encrypted = self.crypto.encrypt_data(metadata_json, kek)
-            
-            # Save to file
-            with open(self.vault_path / "metadata.enc", 'wb') as f:
-                f.write(encrypted)
-            
-            return True
+            return self.wait_metadata(self.stage_metadata(metadata, kek))
         except Exception as e:
             print(f" Error saving metadata: {e}")
             return False
     
-    def load_metadata(self, kek: bytes) -> dict:
-        """Load and decrypt vault metadata"""
+    def stage_metadata(self, metadata: dict, kek: bytes) -> int:
+        """
+        Queue a metadata snapshot for saving, returns a ticket for wait_metadata
+        Stage while holding your own metadata lock and wait after releasing it:
+        concurrent saves then share one encrypt + write (group commit)
+        Only the changes since the dict's version token are applied; a plain
+        dict (no token) replaces the saved metadata.
+        """
+        # Convert to JSON now - the caller may change the dict afterwards
+        metadata_json = json.dumps(metadata).encode()
+        with self._base_lock:
+            base = metadata.snapshot if isinstance(metadata, VaultMetadata) else None
+            token = (None, metadata_json)
+            if isinstance(metadata, VaultMetadata):
+                # A later save of this dict builds on this one, written or not
+                metadata.snapshot = token
+            ticket = self.metadata_commit.submit()
+            self._staged.append(([ticket], metadata, metadata_json, kek, base, token))
+        return ticket
+    
+    def wait_metadata(self, ticket: int) -> bool:
+        """Wait until a staged snapshot (or a newer one) is safely stored"""
+        try:
+            self.metadata_commit.wait(ticket)
+        except Exception as e:
+            print(f" Error saving metadata: {e}")
+            return False
+        with self._base_lock:
+            conflicts = self._conflicts.pop(ticket, None)
+        if conflicts:
+            print(f" Metadata conflict: {', '.join(conflicts)} changed by another save "
+                  f"- reload and retry")
+            return False
+        return True
+    
+    @staticmethod
+    def _split_metadata(data: bytes) -> tuple:
+        """(version, ciphertext) of a metadata.enc blob"""
+        if data[:len(METADATA_MAGIC)] == METADATA_MAGIC:
+            _, version = METADATA_HEADER.unpack_from(data)
+            return version, data[METADATA_HEADER.size:]
+        return 0, data  # Written before versioning
+    
+    def _read_metadata_file(self) -> tuple:
+        """(version, ciphertext) of metadata.enc; (0, None) if there is none"""
+        try:
+            return self._split_metadata(self.backend.get("metadata.enc"))
+        except FileNotFoundError:
+            return 0, None
+    
+    def _read_metadata_version(self):
+        """Version of metadata.enc from its header alone; None if there is none"""
+        try:
+            head = self.backend.get_range("metadata.enc", 0, METADATA_HEADER.size)
+        except FileNotFoundError:
+            return None
+        return self._split_metadata(head)[0]
+    
+    def decrypt_metadata(self, data: bytes, kek: bytes) -> dict:
+        """Decrypt a metadata.enc blob read by other means (e.g. from an archive)"""
+        _, encrypted = self._split_metadata(data)
+        return json.loads(self.crypto.decrypt_data(encrypted, kek).decode())
+    
+    def _take_staged(self) -> list:
+        """Staged saves in order, each dict's consecutive saves folded into one"""
+        with self._base_lock:
+            staged, self._staged = self._staged, []
+        folded = []
+        for entry in staged:
+            tickets, owner, metadata_json, kek, base, token = entry
+            if folded and folded[-1][1] is owner and base is folded[-1][5]:
+                # Builds on the save before it: apply both as one change
+                previous = folded[-1]
+                folded[-1] = (previous[0] + tickets, owner, metadata_json, kek, previous[4], token)
+            else:
+                folded.append(entry)
+        return folded
+    
+    def _write_metadata(self, _=None):
+        staged = self._take_staged()
+        if not staged:
+            return  # Already written by the write before this one
+        
+        try:
+            # Other processes save too: read-merge-write under the metadata lock
+            with self.locks.metadata():
+                version, current = self._read_metadata_file()
+                data, written = None, None  # JSON to write (None: the file as it is)
+                conflicts = {}
+                for tickets, owner, metadata_json, kek, base, token in staged:
+                    if base is None or (data is None and (current is None or version == base[0])):
+                        # Nothing happened since this copy's snapshot: write it as is
+                        data, written = metadata_json, token
+                        continue
+                    
+                    # Saved elsewhere since this copy was loaded - keep their changes
+                    if data is None:
+                        theirs = json.loads(self.crypto.decrypt_data(current, kek).decode())
+                        self.metadata_merges += 1
+                    else:
+                        theirs = json.loads(data)
+                    clashes = []
+                    mine = json.loads(metadata_json)
+                    merged = merge_metadata(json.loads(base[1]), mine, theirs, clashes)
+                    if clashes:
+                        for ticket in tickets:
+                            conflicts[ticket] = clashes
+                        continue
+                    data, written = (metadata_json, token) if merged == mine else \
+                        (json.dumps(merged).encode(), None)
+                
+                if data is not None:
+                    # Encrypt with KEK
+                    encrypted = self.crypto.encrypt_data(data, kek)
+                    
+                    # Save to storage (atomic replace, see LocalBackend)
+                    self.backend.put("metadata.enc",
+                                     METADATA_HEADER.pack(METADATA_MAGIC, version + 1) + encrypted)
+        except BaseException:
+            with self._base_lock:
+                self._staged[:0] = staged  # Whoever writes next retries them
+            raise
+        
+        with self._base_lock:
+            self._conflicts.update(conflicts)
+            if data is None:
+                return
+            self.metadata_version = version + 1
+            for _, owner, _, _, _, token in staged:
+                # The copy the file now matches exactly needs no merge next time;
+                # the others diff against what they staged, which the file contains
+                if token is written and getattr(owner, "snapshot", None) is token:
+                    owner.snapshot = (version + 1, token[1])
+    
+    def refresh_metadata(self, metadata: dict, kek: bytes) -> bool:
+        """
+        Pull saves made by other processes into a metadata dict from
+        load_metadata, keeping its own unsaved changes (they win over saved
+        changes to the same entry). Returns True if it changed.
+        Cheap when nothing was saved since: only the version header is read.
+        """
+        with self._base_lock:
+            base_version, base_json = getattr(metadata, "snapshot", None) or (None, b"{}")
+        if self._read_metadata_version() in (None, base_version):
+            return False
+        version, current = self._read_metadata_file()
+        with self._base_lock:
+            base_version, base_json = getattr(metadata, "snapshot", None) or (None, b"{}")
+            if current is None or version == base_version:
+                return False
+            theirs_json = self.crypto.decrypt_data(current, kek)
+            merged = merge_metadata(json.loads(base_json), metadata, json.loads(theirs_json.decode()))
+            metadata.clear()
+            metadata.update(merged)
+            if isinstance(metadata, VaultMetadata):
+                metadata.snapshot = (version, theirs_json)
+            self.metadata_version = version
+            return True
+    
+    def load_metadata(self, kek: bytes) -> VaultMetadata:
+        """Load and decrypt vault metadata (a dict remembering which version it is)"""
         metadata_path = self.vault_path / "metadata.enc"
         
         # DEBUG: Add this
         print(f" DEBUG: Loading metadata from {metadata_path}")
         
-        if not metadata_path.exists():
+        # Read encrypted data
+        version, encrypted_data = self._read_metadata_file()
+        if encrypted_data is None:
             print(" DEBUG: No metadata file, returning empty dict")
-            return {}
+            metadata = VaultMetadata()
+            metadata.snapshot = (0, b"{}")
+            self.metadata_version = 0
+            return metadata
         
         try:
-            # Read encrypted data
-            with open(metadata_path, 'rb') as f:
-                encrypted_data = f.read()
-            
             # DEBUG: Show what we're reading
             print(f"  DEBUG: Metadata file size: {len(encrypted_data)} bytes")
             print(f"  DEBUG: First 20 bytes: {encrypted_data[:20].hex()}")
@@ -120,15 +315,19 @@ class KeyManager:
             decrypted_data = self.crypto.decrypt_data(encrypted_data, kek)
             
             # Parse JSON
-            metadata = json.loads(decrypted_data.decode())
+            metadata = VaultMetadata(json.loads(decrypted_data.decode()))
+            metadata.snapshot = (version, decrypted_data)
+            self.metadata_version = version
             
             print(f"  DEBUG: Successfully loaded {len(metadata)} file entries")
             return metadata
             
         except Exception as e:
             print(f"  DEBUG ERROR: {e}")
-            print(f"  DEBUG: Returning empty metadata due to error")
-            return {}
+            # Returning {} here would let the next save wipe every entry
+            raise MetadataError(f" Vault metadata is unreadable: {e}")
+
+profiling.instrument(KeyManager)
 
 # Test function
 def test_key_manager():
@@ -0,0 +1,352 @@
+# src/cli.py
+"""
+Vault CLI - Non-interactive vault commands for scripts and automation
+
+    python -m src.cli init
+    python -m src.cli add -r ./documents
+    python -m src.cli --json ls
+    python -m src.cli get report.pdf -o /tmp/report.pdf
+    python -m src.cli batch jobs.txt          (one command per line, one unlock)
+
+The password comes from --password-fd (first line read from that file
+descriptor), VAULT_PASSWORD, or a prompt when stdin is a terminal.
+Results go to stdout (JSON with --json); the managers' progress output
+is discarded, or sent to stderr with -v. Only argparse is imported up
+front so --help and usage errors return immediately.
+"""
+
+import os
+import sys
+import argparse
+
+# Metadata fields never shown
+HIDDEN_FIELDS = ("encrypted_key", "chunk_hashes")
+
+
+class CLIError(Exception):
+    """A command failed in an expected way (bad ID, wrong password, ...)"""
+
+
+# ---------- vault session ----------
+
+class _Session:
+    """One unlock shared by every command of a run (or a whole batch)"""
+
+    def __init__(self, vault_path: str, password: str, stdout=None):
+        from src.crypto.engine import CryptoEngine
+        from src.auth.key_manager import KeyManager
+        from src.storage.file_manager import FileManager
+        from src.storage.search_index import SearchIndex
+
+        crypto = CryptoEngine()
+        self.km = KeyManager(vault_path, crypto=crypto)
+        if not self.km.vault_exists():
+            raise CLIError(f"No vault at {vault_path} (run 'init' first)")
+        try:
+            # A wrong password yields a bogus KEK, noticed when metadata won't decrypt
+            self.kek = self.km.unlock_vault(password)
+            self.metadata = self.km.load_metadata(self.kek)
+        except ValueError:
+            raise CLIError("Wrong password (or unreadable vault metadata)")
+        self.fm = FileManager(vault_path, crypto=crypto)
+        # Never loaded: changes are appended to the index's log on save
+        self.index = SearchIndex(self.km.backend, self.kek, crypto)
+        self.stdout = stdout or sys.stdout  # Real stdout while managers' output is redirected
+        self.dirty = False
+        self.batch = False  # Inside a batch: commands leave saving to the batch
+
+    def resolve(self, ref: str) -> tuple:
+        """File ID, or a name that matches exactly one file"""
+        if ref in self.metadata:
+            return ref, self.metadata[ref]
+        matches = [(file_id, info) for file_id, info in self.metadata.items()
+                   if info.get("original_name") == ref]
+        if not matches:
+            raise CLIError(f"No such file: {ref}")
+        if len(matches) > 1:
+            raise CLIError(f"'{ref}' matches {len(matches)} files, use the file ID")
+        return matches[0]
+
+    def save(self):
+        if self.dirty:
+            if not self.km.save_metadata(self.metadata, self.kek):
+                raise CLIError("Could not save vault metadata")
+            self.index.save()
+            self.dirty = False
+
+
+def _public(info: dict) -> dict:
+    entry = {k: v for k, v in info.items() if k not in HIDDEN_FIELDS}
+    if "versions" in entry:
+        entry["versions"] = len(entry["versions"])
+    return entry
+
+
+# ---------- commands ----------
+
+def cmd_add(session, args):
+    paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            if not args.recursive:
+                raise CLIError(f"{path} is a directory (use -r)")
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                paths.extend(os.path.join(root, name) for name in sorted(files))
+        elif os.path.isfile(path):
+            paths.append(path)
+        else:
+            raise CLIError(f"File not found: {path}")
+
+    added = []
+    try:
+        for path in paths:
+            info = session.fm.add_file(path, session.kek, hash_algo=args.hash)
+            session.metadata[info["file_id"]] = info
+            session.index.add(info["file_id"], info)
+            session.dirty = True
+            added.append({"file_id": info["file_id"], "path": path, "size": info["original_size"]})
+    finally:
+        # Whatever was encrypted is recorded, even if a later file failed
+        if not session.batch:
+            session.save()
+    return added
+
+
+def cmd_get(session, args):
+    file_id, info = session.resolve(args.file)
+    data = session.fm.get_file(file_id, session.kek, info)
+    if args.output == "-":
+        session.stdout.buffer.write(data)
+        session.stdout.buffer.flush()
+        return None
+
+    output = args.output or info["original_name"]
+    if os.path.exists(output) and not args.force:
+        raise CLIError(f"{output} exists (use --force to overwrite)")
+    with open(output, 'wb') as f:
+        f.write(data)
+    return {"file_id": file_id, "path": output, "size": len(data)}
+
+
+def cmd_ls(session, args):
+    files = sorted(session.metadata.values(), key=lambda i: i.get("original_name", "").lower())
+    return [{"file_id": info["file_id"], "name": info.get("original_name"),
+             "size": info.get("original_size"), "created_at": info.get("created_at")}
+            for info in files]
+
+
+def cmd_rm(session, args):
+    removed = []
+    try:
+        for ref in args.files:
+            file_id, _ = session.resolve(ref)
+            session.fm.delete_file(file_id, secure_wipe=args.wipe)
+            del session.metadata[file_id]
+            session.index.remove(file_id)
+            session.dirty = True
+            removed.append(file_id)
+    finally:
+        if not session.batch:
+            session.save()
+    return removed
+
+
+def cmd_stat(session, args):
+    return _public(session.resolve(args.file)[1])
+
+
+def cmd_verify(session, args):
+    targets = [session.resolve(ref) for ref in args.files] if args.files else list(session.metadata.items())
+    results = []
+    for file_id, info in targets:
+        try:
+            ok = session.fm.verify_file(file_id, session.kek, info)
+        except FileNotFoundError:
+            ok = False
+        results.append({"file_id": file_id, "name": info.get("original_name"), "ok": ok})
+    if not all(r["ok"] for r in results):
+        raise CLIError(results)
+    return results
+
+
+def cmd_batch(session, args):
+    """Run one command per line; metadata is saved once at the end"""
+    import shlex
+    stream = sys.stdin if args.file == "-" else open(args.file)
+    parser = build_parser(batch=True)
+    results = []
+    session.batch = True
+    try:
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                sub_args = parser.parse_args(shlex.split(line))
+                result = COMMANDS[sub_args.command](session, sub_args)
+                results.append({"line": number, "command": line, "ok": True, "result": result})
+            except (CLIError, argparse.ArgumentError, OSError, ValueError, KeyError, SystemExit) as e:
+                error = e.args[0] if isinstance(e, CLIError) else f"{type(e).__name__}: {e}"
+                results.append({"line": number, "command": line, "ok": False, "error": error})
+                if not args.keep_going:
+                    break
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        session.batch = False
+        session.save()
+    if not all(r["ok"] for r in results):
+        raise CLIError(results)
+    return results
+
+
+COMMANDS = {"add": cmd_add, "get": cmd_get, "ls": cmd_ls, "rm": cmd_rm,
+            "stat": cmd_stat, "verify": cmd_verify, "batch": cmd_batch}
+
+
+# ---------- output ----------
+
+def _format_text(command: str, result) -> str:
+    if command == "ls":
+        return "\n".join(f"{f['file_id']}  {f['size']:>12,}  {f['name']}" for f in result)
+    if command in ("add", "get"):
+        items = result if isinstance(result, list) else [result]
+        return "\n".join(f"{i['file_id']}  {i['size']:>12,}  {i['path']}" for i in items)
+    if command == "rm":
+        return "\n".join(f"removed {file_id}" for file_id in result)
+    if command == "verify":
+        return "\n".join(f"{'OK     ' if r['ok'] else 'FAILED '} {r['file_id']}  {r['name']}" for r in result)
+    if command == "batch":
+        return "\n".join(f"{r['line']:>4}: {'ok' if r['ok'] else 'FAILED'}  {r['command']}"
+                         + ("" if r['ok'] else f"  ({r['error']})") for r in result)
+    if isinstance(result, dict):
+        return "\n".join(f"{key}: {value}" for key, value in result.items())
+    return str(result)
+
+
+def _dump_json(value, out):
+    import json
+    json.dump(value, out, indent=2, default=str)
+    out.write("\n")
+
+
+def _emit(args, result, out):
+    if result is None:
+        return
+    if args.json:
+        _dump_json(result, out)
+    else:
+        text = _format_text(args.command, result)
+        if text:
+            out.write(text + "\n")
+
+
+# ---------- arguments ----------
+
+def _read_password(args) -> str:
+    if args.password_fd is not None:
+        with os.fdopen(args.password_fd, 'r', closefd=False) as f:
+            return f.readline().rstrip("\r\n")
+    if os.environ.get("VAULT_PASSWORD"):
+        return os.environ["VAULT_PASSWORD"]
+    if sys.stdin.isatty():
+        import getpass
+        return getpass.getpass("Password: ")
+    raise CLIError("No password: use --password-fd or VAULT_PASSWORD")
+
+
+def build_parser(batch: bool = False) -> argparse.ArgumentParser:
+    """Full CLI parser, or only the per-line commands for batch files"""
+    parser = argparse.ArgumentParser(prog="vault", description="Encrypted file vault",
+                                     exit_on_error=not batch)
+    if not batch:
+        parser.add_argument("--vault", default=os.environ.get("VAULT_PATH", "./vault_data"))
+        parser.add_argument("--password-fd", type=int, help="read the password from this descriptor")
+        parser.add_argument("--json", action="store_true", help="machine-readable output")
+        parser.add_argument("-v", "--verbose", action="store_true", help="progress messages on stderr")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    if not batch:
+        sub.add_parser("init", help="create a new vault")
+
+    p = sub.add_parser("add", help="encrypt files into the vault")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("-r", "--recursive", action="store_true", help="add directories recursively")
+    p.add_argument("--hash", default="sha256", choices=("sha256", "blake2b"))
+
+    p = sub.add_parser("get", help="decrypt a file")
+    p.add_argument("file", help="file ID or unique name")
+    p.add_argument("-o", "--output", help="output path, '-' for stdout (default: original name)")
+    p.add_argument("-f", "--force", action="store_true", help="overwrite an existing output file")
+
+    sub.add_parser("ls", help="list files")
+
+    p = sub.add_parser("rm", help="remove files")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--wipe", action="store_true", help="overwrite before deleting")
+
+    p = sub.add_parser("stat", help="show a file's metadata")
+    p.add_argument("file")
+
+    p = sub.add_parser("verify", help="check files decrypt to their recorded hash (all if none given)")
+    p.add_argument("files", nargs="*")
+
+    if not batch:
+        p = sub.add_parser("batch", help="run commands from a file under one unlock")
+        p.add_argument("file", help="one command per line, '-' for stdin")
+        p.add_argument("--keep-going", action="store_true", help="continue after a failed command")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    import contextlib
+    out = sys.stdout
+
+    # Keep the managers' chatter out of the results
+    chatter = sys.stderr if args.verbose else open(os.devnull, 'w')
+    try:
+        with contextlib.redirect_stdout(chatter):
+            password = _read_password(args)
+            if args.command == "init":
+                from src.auth.key_manager import KeyManager
+                km = KeyManager(args.vault)
+                # Held across the check so two concurrent inits can't both create
+                with km.locks.exclusive():
+                    if km.vault_exists():
+                        raise CLIError(f"A vault already exists at {args.vault}")
+                    km.initialize_vault(password)
+                result = {"vault": args.vault, "created": True}
+            else:
+                session = _Session(args.vault, password, stdout=out)
+                result = COMMANDS[args.command](session, args)
+        _emit(args, result, out)
+        return 0
+    except BrokenPipeError:
+        # Reader went away (vault ls | head); don't complain at exit either
+        os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())
+        return 1
+    except CLIError as e:
+        detail = e.args[0]
+        if isinstance(detail, list):
+            # Partial results (verify / batch): show them, then fail
+            _emit(args, detail, out)
+        elif args.json:
+            _dump_json({"error": detail}, out)
+        else:
+            print(f"vault: {detail}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        if args.json:
+            _dump_json({"error": f"{type(e).__name__}: {e}"}, out)
+        else:
+            print(f"vault: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if chatter is not sys.stderr:
+            chatter.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
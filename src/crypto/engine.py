@@ -6,6 +6,8 @@ Encryption/Decryption Engine - Core of the vault
 from Crypto.Cipher import AES
 from Crypto.Protocol.KDF import PBKDF2
 from Crypto.Random import get_random_bytes
+from src.crypto.merkle import DEFAULT_CHUNK_SIZE, chunk_count, chunk_digest, new_hasher
+from src import profiling
 
 class CryptoEngine:
     def __init__(self):
@@ -59,6 +61,54 @@ class CryptoEngine:
         pad_length = decrypted[-1]
         return decrypted[:-pad_length]
     
+    def encrypt_with_digests(self, plain_data: bytes, key: bytes,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE,
+                             hash_algo: str = "sha256") -> tuple:
+        """
+        Encrypt data with AES-256 while hashing it in the same pass
+        Returns (iv + encrypted, whole-file digest, per-chunk digests)
+        Output is byte-identical to encrypt_data
+        """
+        if chunk_size % 16:
+            raise ValueError(" Chunk size must be a multiple of 16")
+        
+        iv = get_random_bytes(self.iv_size)
+        cipher = AES.new(key, AES.MODE_CBC, iv)
+        file_hasher = new_hasher(hash_algo)
+        
+        encrypted_parts = [iv]
+        chunk_hashes = []
+        view = memoryview(plain_data)
+        count = chunk_count(len(plain_data), chunk_size)
+        
+        for i in range(count):
+            chunk = view[i * chunk_size:(i + 1) * chunk_size]
+            file_hasher.update(chunk)
+            chunk_hashes.append(chunk_digest(chunk, hash_algo))
+            
+            if i == count - 1:
+                # Last chunk carries the padding
+                pad_length = 16 - (len(chunk) % 16)
+                chunk = bytes(chunk) + bytes([pad_length]) * pad_length
+            encrypted_parts.append(cipher.encrypt(chunk))
+        
+        return b"".join(encrypted_parts), file_hasher.hexdigest(), chunk_hashes
+    
+    def decrypt_chunk(self, prev_block: bytes, encrypted_chunk: bytes,
+                      key: bytes, last: bool = False) -> bytes:
+        """
+        Decrypt part of a CBC ciphertext without touching the rest
+        prev_block: The 16 ciphertext bytes before the chunk (the IV for chunk 0)
+        last: Strip padding (chunk runs to the end of the ciphertext)
+        """
+        cipher = AES.new(key, AES.MODE_CBC, prev_block)
+        decrypted = cipher.decrypt(encrypted_chunk)
+        
+        if last:
+            pad_length = decrypted[-1]
+            return decrypted[:-pad_length]
+        return decrypted
+    
     def generate_file_key(self) -> bytes:
         """Generate random key for file encryption"""
         return get_random_bytes(self.key_size)
@@ -90,6 +140,8 @@ class CryptoEngine:
             print(" Encryption test FAILED!")
             return False
 
+profiling.instrument(CryptoEngine)
+
 # Quick test if run directly
 if __name__ == "__main__":
     engine = CryptoEngine()
@@ -0,0 +1,59 @@
+# src/crypto/merkle.py
+"""
+Merkle Hashing - Per-chunk digests so parts of a file can be verified alone
+"""
+
+import hashlib
+
+# Must stay a multiple of the AES block size so chunks map onto CBC blocks
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+HASH_ALGORITHMS = {
+    "sha256": hashlib.sha256,
+    "blake2b": lambda: hashlib.blake2b(digest_size=32),  # Faster on 64-bit CPUs
+}
+
+# Domain separation so a leaf can never be confused with an inner node
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def new_hasher(algo: str = "sha256"):
+    """Create a hash object for one of the supported algorithms"""
+    if algo not in HASH_ALGORITHMS:
+        raise ValueError(f" Unsupported hash algorithm: {algo}")
+    return HASH_ALGORITHMS[algo]()
+
+
+def chunk_digest(chunk: bytes, algo: str = "sha256") -> str:
+    """Digest of one plaintext chunk (a Merkle leaf)"""
+    hasher = new_hasher(algo)
+    hasher.update(LEAF_PREFIX)
+    hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def merkle_root(leaves: list, algo: str = "sha256") -> str:
+    """Fold a list of hex leaf digests into a single root digest"""
+    if not leaves:
+        return chunk_digest(b"", algo)
+
+    level = [bytes.fromhex(leaf) for leaf in leaves]
+    while len(level) > 1:
+        next_level = []
+        for i in range(0, len(level), 2):
+            if i + 1 == len(level):
+                # Odd node out is promoted unchanged
+                next_level.append(level[i])
+                continue
+            hasher = new_hasher(algo)
+            hasher.update(NODE_PREFIX + level[i] + level[i + 1])
+            next_level.append(hasher.digest())
+        level = next_level
+
+    return level[0].hex()
+
+
+def chunk_count(size: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Number of chunks a file of this size is split into (at least 1)"""
+    return max(1, -(-size // chunk_size))
@@ -0,0 +1,165 @@
+# src/daemon/client.py
+"""
+Vault Client - Talks to a running VaultDaemon over its Unix socket
+"""
+
+import socket
+import threading
+
+from src.daemon.protocol import send_frame, recv_frame
+
+# Server-side exception names mapped back to local exception types
+ERRORS = {
+    "FileNotFoundError": FileNotFoundError,
+    "PermissionError": PermissionError,
+    "ValueError": ValueError,
+    "KeyError": KeyError,
+}
+
+
+class VaultClient:
+    def __init__(self, socket_path: str = "./vault_data/vault.sock", timeout: float = None):
+        """One persistent connection, reused for every request"""
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+        self.next_id = 0
+        self.pending = {}  # request id -> frames received out of order
+        self.abandoned = set()  # streams the caller stopped reading
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        if self.sock is None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(self.timeout)
+            self.sock.connect(self.socket_path)
+            self.reader = self.sock.makefile('rb')
+
+    def close(self):
+        if self.sock is not None:
+            self.reader.close()
+            self.sock.close()
+            self.sock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- framing ----------
+
+    def _send(self, op: str, payload: bytes = b"", **fields) -> int:
+        self._connect()
+        self.next_id += 1
+        send_frame(self.sock, dict(fields, op=op, id=self.next_id), payload)
+        return self.next_id
+
+    def _next_frame(self, request_id: int) -> tuple:
+        """Next frame for request_id, parking frames for other requests"""
+        queued = self.pending.get(request_id)
+        if queued:
+            return queued.pop(0)
+
+        while True:
+            header, payload = recv_frame(self.reader)
+            if header is None:
+                self.close()
+                raise ConnectionError(" Vault daemon closed the connection")
+            if header.get("id") == request_id:
+                return header, payload
+            if header.get("id") in self.abandoned:
+                if not header.get("more"):
+                    self.abandoned.discard(header.get("id"))
+                continue
+            self.pending.setdefault(header.get("id"), []).append((header, payload))
+
+    @staticmethod
+    def _check(header: dict):
+        if not header.get("ok"):
+            raise ERRORS.get(header.get("type"), OSError)(header.get("error"))
+
+    def _result(self, request_id: int) -> tuple:
+        header, payload = self._next_frame(request_id)
+        self.pending.pop(request_id, None)
+        self._check(header)
+        return header, payload
+
+    # ---------- requests ----------
+
+    def call(self, op: str, payload: bytes = b"", **fields) -> tuple:
+        """Send one request and wait for its (header, payload) reply"""
+        with self.lock:
+            return self._result(self._send(op, payload, **fields))
+
+    def pipeline(self, requests: list) -> list:
+        """
+        Send many requests before reading any reply
+        requests: list of (op, fields dict, payload bytes)
+        Returns (header, payload) per request, in order; failed requests
+        give their exception object instead of raising
+        """
+        with self.lock:
+            ids = [self._send(op, payload, **fields) for op, fields, payload in requests]
+            results = []
+            for request_id in ids:
+                try:
+                    results.append(self._result(request_id))
+                except ConnectionError:
+                    raise
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    def ping(self) -> bool:
+        return self.call("ping")[0]["unlocked"]
+
+    def list_files(self) -> list:
+        return self.call("list")[0]["files"]
+
+    def stat(self, file_id: str) -> dict:
+        return self.call("stat", file_id=file_id)[0]["file"]
+
+    def find(self, name_pattern: str = None, **filters) -> list:
+        """Search by name/type/size/date (see SearchIndex.find)"""
+        return self.call("find", name_pattern=name_pattern, **filters)[0]["files"]
+
+    def get(self, file_id: str) -> bytes:
+        return self.call("get", file_id=file_id)[1]
+
+    def add(self, name: str, data: bytes) -> dict:
+        """Send content to the daemon to encrypt and store"""
+        return self.call("add", data, name=name)[0]["file"]
+
+    def add_path(self, path: str) -> dict:
+        """Ask the daemon to read and store a file on this machine"""
+        return self.call("add", path=path)[0]["file"]
+
+    def stream(self, file_id: str, block_size: int = None):
+        """Yield a file's content block by block"""
+        fields = {"file_id": file_id}
+        if block_size:
+            fields["block_size"] = block_size
+
+        with self.lock:
+            request_id = self._send("stream", **fields)
+        finished = False
+        try:
+            while True:
+                # Locked per frame, not across the yield: the caller may make
+                # other calls between blocks (their replies interleave with ours)
+                with self.lock:
+                    header, payload = self._next_frame(request_id)
+                if not header.get("more"):
+                    finished = True
+                self._check(header)
+                if finished:
+                    return
+                yield payload
+        finally:
+            with self.lock:
+                self.pending.pop(request_id, None)
+                if not finished:
+                    # Caller stopped early: skip the rest of this stream later
+                    self.abandoned.add(request_id)
@@ -0,0 +1,45 @@
+# src/daemon/protocol.py
+"""
+Daemon Wire Protocol - Length-prefixed JSON headers with raw byte payloads
+
+Frame: header length (4 bytes) | JSON header | payload (header["size"] bytes)
+Every request carries an "id" that its response(s) echo back, so clients
+can pipeline many requests on one connection.
+"""
+
+import json
+import struct
+
+LENGTH = struct.Struct(">I")
+MAX_HEADER = 1024 * 1024
+
+
+def send_frame(sock, header: dict, payload: bytes = b""):
+    """Write one frame (header + optional payload) in a single send"""
+    header = dict(header, size=len(payload))
+    header_bytes = json.dumps(header).encode()
+    sock.sendall(LENGTH.pack(len(header_bytes)) + header_bytes + payload)
+
+
+def recv_frame(stream) -> tuple:
+    """Read one frame from a buffered reader, (None, b"") at clean EOF"""
+    prefix = stream.read(LENGTH.size)
+    if not prefix:
+        return None, b""
+    if len(prefix) < LENGTH.size:
+        raise ConnectionError("Connection closed mid-frame")
+
+    header_len = LENGTH.unpack(prefix)[0]
+    if header_len > MAX_HEADER:
+        raise ValueError(f"Frame header too large: {header_len} bytes")
+
+    header_bytes = stream.read(header_len)
+    if len(header_bytes) < header_len:
+        raise ConnectionError("Connection closed mid-frame")
+    header = json.loads(header_bytes.decode())
+
+    size = header.get("size", 0)
+    payload = stream.read(size) if size else b""
+    if len(payload) < size:
+        raise ConnectionError("Connection closed mid-frame")
+    return header, payload
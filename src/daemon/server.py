@@ -0,0 +1,270 @@
+# src/daemon/server.py
+"""
+Vault Daemon - Keeps one unlocked vault in memory and serves local clients
+
+The KEK is derived once (PBKDF2) and metadata is decrypted once at unlock.
+Clients connect over a Unix domain socket and may pipeline requests;
+each connection's requests run concurrently on a shared worker pool.
+"""
+
+import os
+import sys
+import socket
+import getpass
+import argparse
+import threading
+import socketserver
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from src.crypto.engine import CryptoEngine
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.storage.search_index import SearchIndex
+from src.daemon.protocol import send_frame, recv_frame
+
+STREAM_BLOCK_SIZE = 256 * 1024
+
+# Metadata fields never sent to clients
+PRIVATE_FIELDS = ("encrypted_key", "chunk_hashes")
+
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+    """One client connection: read frames, answer them on the worker pool"""
+
+    def handle(self):
+        daemon = self.server.vault_daemon
+        daemon.connections.add(self.request)
+        reader = self.request.makefile('rb')
+        write_lock = threading.Lock()
+        in_flight = []
+
+        def run(header, payload):
+            try:
+                for response, data in daemon.dispatch(header, payload):
+                    with write_lock:
+                        send_frame(self.request, dict(response, id=header.get("id")), data)
+            except OSError:
+                pass  # Client went away (or the daemon is shutting down)
+
+        try:
+            while True:
+                header, payload = recv_frame(reader)
+                if header is None:
+                    break
+                in_flight = [f for f in in_flight if not f.done()]
+                in_flight.append(daemon.pool.submit(run, header, payload))
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            # Finish answering before the socket closes
+            for future in in_flight:
+                future.result()
+            reader.close()
+            daemon.connections.discard(self.request)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class VaultDaemon:
+    def __init__(self, vault_path: str = "./vault_data", socket_path: str = None,
+                 backend=None, cache=None, max_workers: int = 8):
+        """
+        vault_path: Vault to serve
+        socket_path: Unix socket to listen on (default: <vault_path>/vault.sock)
+        cache: Optional ContentCache shared by all clients
+        max_workers: Requests processed in parallel across all connections
+        """
+        # One engine shared by both managers
+        self.crypto = CryptoEngine()
+        self.km = KeyManager(vault_path, backend=backend, crypto=self.crypto)
+        self.fm = FileManager(vault_path, backend=backend, cache=cache, crypto=self.crypto)
+        self.socket_path = socket_path or str(Path(vault_path) / "vault.sock")
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.kek = None
+        self.metadata = {}
+        self.index = None
+        self.metadata_lock = threading.Lock()
+        self.server = None
+        self.connections = set()
+        print(" Vault Daemon Initialized")
+
+    def unlock(self, password: str):
+        """Derive the KEK and load metadata once for all clients"""
+        self.kek = self.km.unlock_vault(password)
+        self.metadata = self.km.load_metadata(self.kek)
+        self.index = SearchIndex(self.km.backend, self.kek, self.crypto)
+        self.index.load()
+        self.index.sync(self.metadata)
+
+    def lock(self):
+        """Forget keys and decrypted state"""
+        if self.index is not None:
+            # Kept in memory while serving; a stale copy is fixed by sync() on unlock
+            self.index.save()
+            self.index = None
+        self.kek = None
+        self.metadata = {}
+        self.fm.lock()
+
+    # ---------- operations ----------
+
+    def _refresh_locked(self):
+        """Pick up files that other processes (CLI, watcher) saved since we loaded"""
+        if self.km.refresh_metadata(self.metadata, self.kek):
+            self.index.sync(self.metadata)
+
+    def _entry(self, file_id: str) -> dict:
+        with self.metadata_lock:
+            # Every lookup: another process may have updated or removed the file
+            # (only metadata.enc's header is read unless it changed)
+            self._refresh_locked()
+            if file_id not in self.metadata:
+                raise FileNotFoundError(f" Unknown file ID: {file_id}")
+            return self.metadata[file_id]
+
+    def _public(self, info: dict) -> dict:
+        return {k: v for k, v in info.items() if k not in PRIVATE_FIELDS}
+
+    def _op_ping(self, header, payload):
+        yield {"ok": True, "unlocked": self.kek is not None}, b""
+
+    def _op_list(self, header, payload):
+        with self.metadata_lock:
+            self._refresh_locked()
+            files = [self._public(info) for info in self.metadata.values()]
+        yield {"ok": True, "files": files}, b""
+
+    def _op_stat(self, header, payload):
+        yield {"ok": True, "file": self._public(self._entry(header["file_id"]))}, b""
+
+    def _op_find(self, header, payload):
+        filters = {k: header[k] for k in ("file_type", "min_size", "max_size",
+                                          "created_after", "created_before") if k in header}
+        with self.metadata_lock:
+            self._refresh_locked()
+        yield {"ok": True, "files": self.index.find(header.get("name_pattern"), **filters)}, b""
+
+    def _op_get(self, header, payload):
+        file_id = header["file_id"]
+        try:
+            data = self.fm.get_file(file_id, self.kek, self._entry(file_id))
+        except FileNotFoundError:
+            # Updated and its old object pruned since our lookup: look again
+            data = self.fm.get_file(file_id, self.kek, self._entry(file_id))
+        yield {"ok": True}, data
+
+    def _op_stream(self, header, payload):
+        file_id = header["file_id"]
+        block_size = header.get("block_size", STREAM_BLOCK_SIZE)
+
+        # One VaultFile per stream: the Merkle root and file key are checked once,
+        # chunks are decrypted ahead of the socket and never all held at once
+        try:
+            stream = self.fm.open(file_id, self.kek, self._entry(file_id), buffering=0)
+        except FileNotFoundError:
+            stream = self.fm.open(file_id, self.kek, self._entry(file_id), buffering=0)
+        with stream:
+            while True:
+                data = stream.read(block_size)
+                if not data:
+                    break
+                yield {"ok": True, "more": True}, data
+        yield {"ok": True, "more": False}, b""
+
+    def _op_add(self, header, payload):
+        if "path" in header:
+            info = self.fm.add_file(header["path"], self.kek)
+        else:
+            info = self.fm.add_bytes(payload, header["name"], self.kek, header.get("original_path", ""))
+
+        with self.metadata_lock:
+            self.metadata[info["file_id"]] = info
+            ticket = self.km.stage_metadata(self.metadata, self.kek)
+            self.index.add(info["file_id"], info)
+        # Adds finishing together share one metadata write
+        if not self.km.wait_metadata(ticket):
+            raise OSError(" Could not save vault metadata")
+        yield {"ok": True, "file": self._public(info)}, b""
+
+    def dispatch(self, header: dict, payload: bytes):
+        """Yield (response header, payload) frames for one request"""
+        handler = getattr(self, f"_op_{header.get('op')}", None)
+        try:
+            if handler is None:
+                raise ValueError(f" Unknown operation: {header.get('op')}")
+            if self.kek is None and header.get("op") != "ping":
+                raise PermissionError(" Vault is locked")
+            yield from handler(header, payload)
+        except Exception as e:
+            yield {"ok": False, "error": str(e), "type": e.__class__.__name__}, b""
+
+    # ---------- socket ----------
+
+    def bind(self):
+        """Create the listening socket (clients can connect from here on)"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # Stale socket from a previous run
+
+        old_umask = os.umask(0o077)  # Socket usable by our user only
+        try:
+            self.server = _UnixServer(self.socket_path, _ConnectionHandler)
+        finally:
+            os.umask(old_umask)
+        self.server.vault_daemon = self
+
+    def serve_forever(self):
+        """Listen on the Unix socket until shutdown()"""
+        if self.server is None:
+            self.bind()
+
+        print(f" Listening on {self.socket_path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def start(self) -> threading.Thread:
+        """Serve on a background thread"""
+        self.bind()
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        """Stop serving and lock the vault"""
+        if self.server is not None:
+            self.server.shutdown()
+        # Unblock workers still sending to clients that stopped reading
+        for conn in list(self.connections):
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.pool.shutdown(wait=True)
+        self.lock()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an unlocked vault over a Unix socket")
+    parser.add_argument("--vault", default="./vault_data")
+    parser.add_argument("--socket", default=None)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    daemon = VaultDaemon(args.vault, args.socket, max_workers=args.workers)
+    daemon.unlock(os.environ.get("VAULT_PASSWORD") or getpass.getpass("Password: "))
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        print("\n Locking vault...")
+    finally:
+        daemon.lock()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+# src/loadtest.py
+"""
+Load Tester - Drives concurrent vault traffic against a scratch vault
+
+Example:
+    python src/loadtest.py --workers 8 --duration 30 --mix add=40,get=45,list=10,delete=5 \
+        --sizes lognormal:16k,2 --mode processes --json results.json
+
+Every worker owns the files it added (get/delete pick from those). Adds
+and deletes commit vault metadata like the front ends do, every
+--commit-every changes (1 = each, as the menu and CLI do); the commit is
+timed as part of the op that triggers it, so lock contention and merges
+between workers show up in the latencies. "list" decrypts the vault
+metadata and lists the stored objects, like the menu's List screen does.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+import contextlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Fix imports
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+
+OPERATIONS = ("add", "get", "list", "delete")
+UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    """'64k' -> 65536"""
+    text = text.strip().lower().rstrip("b")
+    unit = text[-1] if text and text[-1] in UNITS else ""
+    return int(float(text[:len(text) - len(unit)]) * UNITS[unit])
+
+
+def parse_mix(text: str) -> dict:
+    """'add=40,get=60' -> {'add': 40.0, 'get': 60.0}"""
+    mix = {}
+    for part in text.split(","):
+        op, _, weight = part.partition("=")
+        op = op.strip()
+        if op not in OPERATIONS:
+            raise ValueError(f" Unknown operation in mix: {op}")
+        mix[op] = float(weight)
+    if not any(mix.values()):
+        raise ValueError(" Operation mix needs at least one positive weight")
+    return mix
+
+
+def size_sampler(spec: str):
+    """
+    Build a function rng -> file size from a distribution spec:
+        fixed:4k | uniform:1k-1m | lognormal:<median>,<sigma> | choice:1k,64k,1m
+    """
+    kind, _, args = spec.partition(":")
+    if kind == "fixed":
+        size = parse_size(args)
+        return lambda rng: size
+    if kind == "uniform":
+        low, high = (parse_size(x) for x in args.split("-"))
+        return lambda rng: rng.randint(low, high)
+    if kind == "lognormal":
+        median, sigma = args.split(",")
+        mu = math.log(parse_size(median))
+        return lambda rng: max(1, int(rng.lognormvariate(mu, float(sigma))))
+    if kind == "choice":
+        sizes = [parse_size(x) for x in args.split(",")]
+        return lambda rng: rng.choice(sizes)
+    raise ValueError(f" Unknown size distribution: {spec}")
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _silence_stdout():
+    sys.stdout = open(os.devnull, 'w')
+
+
+def run_worker(worker_id: int, config: dict) -> dict:
+    """One worker's loop; returns latencies (seconds) per operation"""
+    rng = random.Random(config["seed"] + worker_id)
+    sample_size = size_sampler(config["sizes"])
+    ops = list(config["mix"])
+    weights = [config["mix"][op] for op in ops]
+    kek = config["kek"]
+
+    latencies = {op: [] for op in OPERATIONS}
+    errors = {op: 0 for op in OPERATIONS}
+    bytes_moved = 0
+    owned = {}  # file_id -> metadata entry added by this worker
+
+    km = KeyManager(config["vault"])
+    fm = FileManager(config["vault"], crypto=km.crypto)
+    metadata = km.load_metadata(kek)
+    uncommitted = 0
+    commit_every = config["commit_every"]
+
+    def commit(force: bool = False):
+        nonlocal uncommitted
+        if uncommitted and (force or uncommitted >= commit_every):
+            uncommitted = 0
+            if not km.save_metadata(metadata, kek):
+                raise OSError(" Could not save vault metadata")
+
+    deadline = time.monotonic() + config["duration"]
+    done = 0
+    while time.monotonic() < deadline and (not config["ops"] or done < config["ops"]):
+        op = rng.choices(ops, weights)[0]
+        if op in ("get", "delete") and not owned:
+            op = "add"  # Nothing to read yet
+
+        start = time.perf_counter()
+        try:
+            if op == "add":
+                data = os.urandom(sample_size(rng))
+                info = fm.add_bytes(data, f"load_{worker_id}_{done}.bin", kek)
+                owned[info["file_id"]] = metadata[info["file_id"]] = info
+                uncommitted += 1
+                commit()
+                bytes_moved += len(data)
+            elif op == "get":
+                file_id = rng.choice(list(owned))
+                bytes_moved += len(fm.get_file(file_id, kek, owned[file_id]))
+            elif op == "list":
+                km.load_metadata(kek)
+                fm.list_encrypted_files()
+            else:
+                file_id = rng.choice(list(owned))
+                fm.delete_file(file_id)
+                del owned[file_id]
+                del metadata[file_id]
+                uncommitted += 1
+                commit()
+        except Exception:
+            errors[op] += 1
+        latencies[op].append(time.perf_counter() - start)
+        done += 1
+
+    # Leftovers of a partial batch (not timed as any operation)
+    commit(force=True)
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {"latencies": latencies, "errors": errors, "bytes": bytes_moved, "files": len(owned),
+            "max_rss_kb": usage.ru_maxrss}
+
+
+def create_scratch_vault(files: int, sizes: str, seed: int) -> tuple:
+    """Make a throwaway vault (optionally pre-filled) and return (path, kek)"""
+    vault = tempfile.mkdtemp(prefix="vault_load_")
+    password = os.urandom(16).hex()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        km = KeyManager(vault)
+        km.initialize_vault(password)
+        kek = km.unlock_vault(password)
+
+        if files:
+            fm = FileManager(vault, crypto=km.crypto)
+            rng = random.Random(seed)
+            sample_size = size_sampler(sizes)
+            metadata = {}
+            for i in range(files):
+                info = fm.add_bytes(os.urandom(sample_size(rng)), f"seed_{i}.bin", kek)
+                metadata[info["file_id"]] = info
+            km.save_metadata(metadata, kek)
+    return vault, kek
+
+
+def run_load_test(workers: int = 4, duration: float = 10, ops: int = 0,
+                  mix: str = "add=40,get=45,list=10,delete=5", sizes: str = "fixed:4k",
+                  mode: str = "threads", prefill: int = 0, seed: int = 1,
+                  commit_every: int = 1) -> dict:
+    """Run the load test and return a report dict"""
+    vault, kek = create_scratch_vault(prefill, sizes, seed)
+    config = {"vault": vault, "kek": kek, "mix": parse_mix(mix), "sizes": sizes,
+              "duration": duration, "ops": ops, "seed": seed, "commit_every": max(commit_every, 1)}
+
+    # Sample our own RSS while threads run (ru_maxrss covers processes)
+    peak_rss = {"kb": 0}
+    stop = threading.Event()
+
+    def sample_rss():
+        while not stop.wait(0.05):
+            peak_rss["kb"] = max(peak_rss["kb"], resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+    before_self = resource.getrusage(resource.RUSAGE_SELF)
+    before_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+
+    try:
+        # The managers print progress for every call - keep that out of the timings
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            if mode == "processes":
+                pool = ProcessPoolExecutor(max_workers=workers, initializer=_silence_stdout)
+            else:
+                pool = ThreadPoolExecutor(max_workers=workers)
+            with pool:
+                results = list(pool.map(run_worker, range(workers), [config] * workers))
+            # Every worker's surviving files must have made it into the saved metadata
+            stored = len(KeyManager(vault).load_metadata(kek))
+    finally:
+        wall = time.perf_counter() - started
+        stop.set()
+        sampler.join()
+        shutil.rmtree(vault, ignore_errors=True)
+
+    after_self = resource.getrusage(resource.RUSAGE_SELF)
+    after_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_seconds = ((after_self.ru_utime - before_self.ru_utime) + (after_self.ru_stime - before_self.ru_stime)
+                   + (after_children.ru_utime - before_children.ru_utime)
+                   + (after_children.ru_stime - before_children.ru_stime))
+
+    report = {
+        "config": {"workers": workers, "mode": mode, "duration": duration, "ops": ops,
+                   "mix": config["mix"], "sizes": sizes, "prefill": prefill, "seed": seed,
+                   "commit_every": config["commit_every"]},
+        "wall_seconds": wall,
+        "total_ops": 0,
+        "throughput_ops": 0.0,
+        "throughput_mb": 0.0,
+        "cpu_seconds": cpu_seconds,
+        "cpu_cores_used": cpu_seconds / wall if wall else 0.0,
+        "cpu_utilisation": cpu_seconds / (wall * (os.cpu_count() or 1)) if wall else 0.0,
+        "peak_rss_mb": max([peak_rss["kb"], after_self.ru_maxrss]
+                           + [r["max_rss_kb"] for r in results]) / 1024,
+        "operations": {},
+        "lost_updates": prefill + sum(r["files"] for r in results) - stored,
+    }
+
+    total_bytes = sum(r["bytes"] for r in results)
+    for op in OPERATIONS:
+        samples = sorted(lat for r in results for lat in r["latencies"][op])
+        if not samples:
+            continue
+        report["operations"][op] = {
+            "count": len(samples),
+            "errors": sum(r["errors"][op] for r in results),
+            "throughput_ops": len(samples) / wall,
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p95_ms": percentile(samples, 95) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000,
+            "max_ms": samples[-1] * 1000,
+        }
+        report["total_ops"] += len(samples)
+
+    report["throughput_ops"] = report["total_ops"] / wall
+    report["throughput_mb"] = total_bytes / wall / 1024 ** 2
+    return report
+
+
+def print_report(report: dict):
+    config = report["config"]
+    print("=" * 72)
+    print(" VAULT LOAD TEST")
+    print("=" * 72)
+    print(f" Workers: {config['workers']} ({config['mode']})   Sizes: {config['sizes']}   "
+          f"Wall time: {report['wall_seconds']:.1f}s")
+    print(f" Throughput: {report['throughput_ops']:,.1f} ops/s, {report['throughput_mb']:,.2f} MB/s")
+    if report["lost_updates"]:
+        print(f" WARNING: {report['lost_updates']:,} files missing from the saved metadata")
+    print(f" CPU: {report['cpu_seconds']:.1f}s ({report['cpu_cores_used']:.2f} cores, "
+          f"{report['cpu_utilisation']:.0%} of machine)   Peak RSS: {report['peak_rss_mb']:,.1f} MB")
+    print("-" * 72)
+    print(f" {'op':<8}{'count':>9}{'errors':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op, stats in report["operations"].items():
+        print(f" {op:<8}{stats['count']:>9,}{stats['errors']:>8,}{stats['throughput_ops']:>10,.1f}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+    print("=" * 72)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test against a scratch vault")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--mode", choices=("threads", "processes"), default="threads")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per worker")
+    parser.add_argument("--ops", type=int, default=0, help="stop each worker after this many ops (0 = no limit)")
+    parser.add_argument("--mix", default="add=40,get=45,list=10,delete=5")
+    parser.add_argument("--sizes", default="fixed:4k",
+                        help="fixed:4k | uniform:1k-1m | lognormal:16k,1.5 | choice:1k,64k,1m")
+    parser.add_argument("--prefill", type=int, default=0, help="files in the vault before the run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--commit-every", type=int, default=1,
+                        help="adds/deletes per metadata commit (1 = every change)")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run_load_test(args.workers, args.duration, args.ops, args.mix, args.sizes,
+                           args.mode, args.prefill, args.seed, args.commit_every)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f" Report saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ sys.path.insert(0, str(project_root))
 
 from src.auth.key_manager import KeyManager
 from src.storage.file_manager import FileManager
+from src.storage.scrub import VaultScrubber
+from src.storage.search_index import SearchIndex
 from src.crypto.engine import CryptoEngine
 
 def clear_screen():
@@ -134,8 +136,17 @@ def unlock_vault():
     
     input("\nPress Enter to continue...")
 
+def open_search_index(km, master_key):
+    """Load the filename index, catching up with any metadata changes"""
+    index = SearchIndex(km.backend, master_key, km.crypto)
+    loaded = index.load()
+    if index.sync(km.load_metadata(master_key)) or not loaded:
+        index.save()
+    return index
+
 def vault_menu(key_manager, master_key):
     file_manager = FileManager("./vault_data")
+    search_index = open_search_index(key_manager, master_key)
     
     while True:
         print_header("VAULT UNLOCKED")
@@ -144,12 +155,15 @@ def vault_menu(key_manager, master_key):
         print("2. List files")
         print("3. Extract file")
         print("4. Test encryption")
-        print("5. Lock vault")
+        print("5. Scrub vault")
+        print("6. Search files")
+        print("7. File history")
+        print("8. Lock vault")
         
         choice = input("\nSelect: ")
         
         if choice == "1":
-            add_file(file_manager, master_key, key_manager)
+            add_file(file_manager, master_key, key_manager, search_index)
         elif choice == "2":
             list_files(key_manager, master_key)
         elif choice == "3":
@@ -157,10 +171,17 @@ def vault_menu(key_manager, master_key):
         elif choice == "4":
             test_encryption()
         elif choice == "5":
+            scrub_vault(file_manager, master_key, key_manager)
+        elif choice == "6":
+            search_files(search_index)
+        elif choice == "7":
+            file_history(file_manager, master_key, key_manager, search_index)
+        elif choice == "8":
             print("\n Locking vault...")
+            file_manager.lock()
             return
 
-def add_file(fm, master_key, km):
+def add_file(fm, master_key, km, search_index=None):
     print_header("ADD FILE")
     
     path = input("File path: ").strip()
@@ -171,12 +192,26 @@ def add_file(fm, master_key, km):
         return
     
     try:
-        metadata = fm.add_file(path, master_key)
+        existing = km.load_metadata(master_key)
+        
+        # Same file added before? Offer to store it as a new version
+        source = Path(path)
+        previous = [info for info in existing.values()
+                    if info["original_name"] == source.name
+                    and info.get("original_path") == str(source.parent)]
+        if previous and input("Already in vault - save as new version? (y/n): ").lower() == 'y':
+            metadata = fm.update_file(previous[0]["file_id"], str(source), master_key, previous[0])
+        else:
+            metadata = fm.add_file(path, master_key)
         
         # Update vault metadata
-        existing = km.load_metadata(master_key)
         existing[metadata["file_id"]] = metadata
-        km.save_metadata(existing, master_key)
+        if km.save_metadata(existing, master_key) and metadata.get("versions"):
+            fm.prune_objects(metadata["file_id"], metadata)
+        
+        if search_index is not None:
+            search_index.add(metadata["file_id"], metadata)
+            search_index.save()
         
         print(f" Added! ID: {metadata['file_id']}")
     except Exception as e:
@@ -236,6 +271,84 @@ def extract_file(fm, master_key, km):
     
     input("\nPress Enter...")
 
+def file_history(fm, master_key, km, search_index=None):
+    print_header("FILE HISTORY")
+    
+    metadata = km.load_metadata(master_key)
+    files = [(file_id, info) for file_id, info in metadata.items() if info.get("versions")]
+    
+    if not files:
+        print("No files with older versions")
+        input("\nPress Enter...")
+        return
+    
+    for i, (file_id, info) in enumerate(files, 1):
+        print(f"{i}. {info['original_name']} ({len(info['versions']) + 1} versions)")
+    
+    try:
+        idx = int(input("\nSelect (number): ")) - 1
+        if not 0 <= idx < len(files):
+            return
+        file_id, info = files[idx]
+        
+        print()
+        for version in fm.list_versions(info):
+            marker = " (current)" if version["current"] else ""
+            print(f" r{version['revision']}: {version['original_size']:,} bytes, "
+                  f"saved {version['saved_at']}{marker}")
+        
+        revision = input("\nRevision to restore (blank to cancel): ").strip()
+        if revision:
+            updated = fm.restore_version(file_id, int(revision), master_key, info)
+            metadata[file_id] = updated
+            if km.save_metadata(metadata, master_key):
+                fm.prune_objects(file_id, updated)
+            if search_index is not None:
+                search_index.add(file_id, updated)
+                search_index.save()
+            print(f" Restored r{revision} as r{updated['revision']}")
+    except Exception as e:
+        print(f" Error: {e}")
+    
+    input("\nPress Enter...")
+
+def search_files(search_index):
+    print_header("SEARCH FILES")
+    
+    pattern = input("Name (text, prefix* or glob): ").strip()
+    file_type = input("Type (e.g. .pdf, blank for any): ").strip() or None
+    
+    results = search_index.find(pattern or None, file_type=file_type)
+    
+    if not results:
+        print("\nNo matching files")
+    else:
+        print()
+        for info in results:
+            print(f" {info['original_name']}")
+            print(f"   ID: {info['file_id']}")
+            print(f"   Size: {info['original_size']:,} bytes")
+            print()
+    
+    input("\nPress Enter...")
+
+def scrub_vault(fm, master_key, km):
+    print_header("SCRUB VAULT")
+    
+    metadata = km.load_metadata(master_key)
+    
+    try:
+        report = VaultScrubber(fm).scrub(metadata, master_key)
+        
+        for status in ("corrupt", "missing", "orphaned"):
+            for file_id in report[status]:
+                name = metadata.get(file_id, {}).get('original_name', 'Unknown')
+                print(f"   {status.upper()}: {file_id} ({name})")
+    except Exception as e:
+        print(f" Error: {e}")
+    
+    input("\nPress Enter...")
+
 def test_encryption():
     print_header("TEST")
     
@@ -0,0 +1,302 @@
+# src/profiling.py
+"""
+Profiling - CPU and memory attribution per vault operation
+
+Turn it on without touching code:
+    VAULT_PROFILE=1 python src/main_fixed.py             (report in ./vault_profile)
+    VAULT_PROFILE=/tmp/prof python -m src.storage.watcher ...
+or from Python with profiling.enable().
+
+Every public method of CryptoEngine, KeyManager and FileManager becomes
+an operation ("FileManager.add_file", ...). The outermost operation on a
+thread gets a cProfile run and its tracemalloc peak; operations it calls
+only add their wall time, so nothing is counted twice. Top allocation
+sites (tracemalloc snapshot diffs) are sampled for the first calls of
+each operation because snapshots are expensive. A text and a JSON report
+are written at exit, one pair per process.
+
+tracemalloc is process wide, so when operations run concurrently on
+several threads their memory peaks include each other's allocations.
+"""
+
+import os
+import io
+import json
+import time
+import atexit
+import pstats
+import cProfile
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+ENV_VAR = "VAULT_PROFILE"
+DEFAULT_OUTPUT_DIR = "./vault_profile"
+
+# Where time goes, by (file or function name) substring of profiled functions
+CATEGORIES = (
+    ("kdf", ("PBKDF2", "KDF.py", "_pbkdf2")),
+    ("cipher", ("Crypto/Cipher", "Crypto\\Cipher", "_mode_cbc", "Padding")),
+    ("hashing", ("hashlib", "sha256", "blake2b", "merkle.py", "hexdigest")),
+    ("json/base64", ("json", "base64", "binascii")),
+    ("io", ("_io.", "posix.", "io.open", "backends.py", "pathlib")),
+)
+
+_registered = []   # instrumented classes
+_originals = {}    # (class, name) -> original function
+_state = {"enabled": False, "output_dir": DEFAULT_OUTPUT_DIR, "top": 20,
+          "memory_samples": 20, "atexit": False}
+_lock = threading.Lock()
+_local = threading.local()
+_stats = {}        # operation -> _OperationStats
+
+# Keep the profiler's own bookkeeping out of allocation reports
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+)
+
+
+class _OperationStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.profiled_calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.peak_memory = 0
+        self.profile = None        # pstats.Stats merged over outermost calls
+        self.allocations = {}      # "file:line" -> [bytes, blocks]
+        self.memory_samples = 0
+
+
+def _category(function_key: tuple) -> str:
+    filename, _, name = function_key
+    text = f"{filename} {name}"
+    for category, needles in CATEGORIES:
+        if any(needle in text for needle in needles):
+            return category
+    return "other"
+
+
+@contextmanager
+def operation(name: str):
+    """Attribute the enclosed code to an operation (no-op when disabled)"""
+    if not _state["enabled"]:
+        yield
+        return
+
+    outermost = not getattr(_local, "depth", 0)
+    _local.depth = getattr(_local, "depth", 0) + 1
+
+    profile = before = None
+    if outermost:
+        with _lock:
+            stats = _stats.setdefault(name, _OperationStats(name))
+            take_snapshot = stats.memory_samples < _state["memory_samples"]
+            if take_snapshot:
+                stats.memory_samples += 1
+        if take_snapshot:
+            before = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        tracemalloc.reset_peak()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            profile = None  # Another profiler is active on this thread
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _local.depth -= 1
+        if profile is not None:
+            profile.disable()
+        peak = tracemalloc.get_traced_memory()[1] if outermost else 0
+        diff = None
+        if before is not None:
+            after = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            diff = after.compare_to(before, "lineno")[:_state["top"]]
+
+        with _lock:
+            stats = _stats.setdefault(name, _OperationStats(name))
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            if outermost:
+                stats.peak_memory = max(stats.peak_memory, peak)
+            if profile is not None:
+                stats.profiled_calls += 1
+                if stats.profile is None:
+                    stats.profile = pstats.Stats(profile)
+                else:
+                    stats.profile.add(profile)
+            for entry in diff or []:
+                if entry.size_diff <= 0:
+                    continue
+                frame = entry.traceback[0]
+                site = stats.allocations.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+                site[0] += entry.size_diff
+                site[1] += max(entry.count_diff, 0)
+
+
+def _wrap(name: str, function):
+    @functools.wraps(function)
+    def profiled(*args, **kwargs):
+        with operation(name):
+            return function(*args, **kwargs)
+    profiled.__profiled__ = True
+    return profiled
+
+
+def _patch(cls):
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_") or name.startswith("test") or not callable(attr):
+            continue
+        if isinstance(attr, (staticmethod, classmethod, type)):
+            continue
+        if getattr(attr, "__profiled__", False):
+            continue
+        _originals[(cls, name)] = attr
+        setattr(cls, name, _wrap(f"{cls.__name__}.{name}", attr))
+
+
+def instrument(cls):
+    """Register a class whose public methods are profiled while enabled"""
+    with _lock:
+        if cls not in _registered:
+            _registered.append(cls)
+            if _state["enabled"]:
+                _patch(cls)
+    return cls
+
+
+def enable(output_dir: str = None, top: int = 20, memory_samples: int = 20,
+           write_at_exit: bool = True):
+    """
+    Start profiling every instrumented class
+    output_dir: Where the report is written at exit
+    top: Functions and allocation sites listed per operation
+    memory_samples: Calls per operation that get allocation snapshots
+    """
+    with _lock:
+        _state.update(enabled=True, output_dir=output_dir or _state["output_dir"],
+                      top=top, memory_samples=memory_samples)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        for cls in _registered:
+            _patch(cls)
+        if write_at_exit and not _state["atexit"]:
+            atexit.register(_write_at_exit)
+            _state["atexit"] = True
+
+
+def disable():
+    """Stop profiling and restore the original methods (collected data is kept)"""
+    with _lock:
+        _state["enabled"] = False
+        for (cls, name), original in _originals.items():
+            setattr(cls, name, original)
+        _originals.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled() -> bool:
+    return _state["enabled"]
+
+
+def reset():
+    """Forget everything collected so far"""
+    with _lock:
+        _stats.clear()
+
+
+def get_report() -> dict:
+    """Collected data per operation, slowest total first"""
+    top = _state["top"]
+    operations = []
+    with _lock:
+        for stats in sorted(_stats.values(), key=lambda s: s.total_time, reverse=True):
+            functions = []
+            categories = {}
+            if stats.profile is not None:
+                for key, (_, calls, own, cumulative, _) in stats.profile.stats.items():
+                    if key[0] == __file__:
+                        continue  # Our own wrappers
+                    category = _category(key)
+                    categories[category] = categories.get(category, 0.0) + own
+                    functions.append({"function": f"{key[0]}:{key[1]}({key[2]})", "calls": calls,
+                                      "own_time": own, "cumulative_time": cumulative})
+                functions.sort(key=lambda f: f["cumulative_time"], reverse=True)
+
+            allocations = sorted(stats.allocations.items(), key=lambda item: item[1][0], reverse=True)
+            operations.append({
+                "operation": stats.name,
+                "calls": stats.calls,
+                "profiled_calls": stats.profiled_calls,
+                "total_time": stats.total_time,
+                "mean_time": stats.total_time / stats.calls if stats.calls else 0.0,
+                "max_time": stats.max_time,
+                "peak_memory": stats.peak_memory,
+                "time_by_category": dict(sorted(categories.items(), key=lambda c: c[1], reverse=True)),
+                "top_functions": functions[:top],
+                "top_allocations": [{"site": site, "bytes": size, "blocks": blocks}
+                                    for site, (size, blocks) in allocations[:top]],
+            })
+    return {"pid": os.getpid(), "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "operations": operations}
+
+
+def format_report(report: dict) -> str:
+    out = io.StringIO()
+    out.write("=" * 72 + "\n")
+    out.write(f" VAULT PROFILE (pid {report['pid']}, {report['generated_at']})\n")
+    out.write("=" * 72 + "\n")
+    for op in report["operations"]:
+        out.write(f"\n{op['operation']}: {op['calls']:,} calls, {op['total_time']:.3f}s total, "
+                  f"{op['mean_time'] * 1000:.2f} ms mean, {op['max_time'] * 1000:.2f} ms max, "
+                  f"peak {op['peak_memory'] / 1024:,.0f} KiB\n")
+        if op["time_by_category"]:
+            out.write("  time by category: " + ", ".join(
+                f"{name} {seconds:.3f}s" for name, seconds in op["time_by_category"].items()) + "\n")
+        for f in op["top_functions"][:10]:
+            out.write(f"  {f['cumulative_time']:9.4f}s cum {f['own_time']:9.4f}s own "
+                      f"{f['calls']:>8,}x  {f['function']}\n")
+        for a in op["top_allocations"][:5]:
+            out.write(f"  {a['bytes'] / 1024:12,.1f} KiB in {a['blocks']:,} blocks  {a['site']}\n")
+    return out.getvalue()
+
+
+def write_report(output_dir: str = None) -> tuple:
+    """Write vault_profile_<pid>.txt and .json, returns their paths"""
+    output_dir = output_dir or _state["output_dir"]
+    os.makedirs(output_dir, exist_ok=True)
+    report = get_report()
+    base = os.path.join(output_dir, f"vault_profile_{report['pid']}")
+    with open(base + ".json", 'w') as f:
+        json.dump(report, f, indent=2)
+    with open(base + ".txt", 'w') as f:
+        f.write(format_report(report))
+    return base + ".txt", base + ".json"
+
+
+def _write_at_exit():
+    if _stats:
+        txt_path, _ = write_report()
+        print(f" Profile written to {txt_path}")
+
+
+def enable_from_env():
+    """Enable profiling if VAULT_PROFILE is set ("1" or an output directory)"""
+    value = os.environ.get(ENV_VAR, "").strip()
+    if not value or value.lower() in ("0", "false", "no", "off"):
+        return
+    output_dir = None if value.lower() in ("1", "true", "yes", "on") else value
+    enable(output_dir=output_dir)
+
+
+enable_from_env()
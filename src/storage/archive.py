@@ -0,0 +1,275 @@
+# src/storage/archive.py
+"""
+Vault Archive - Streams a whole vault into one portable, still-encrypted file
+
+Layout: MAGIC, then records of
+    type (1 byte) | name length (2) | data length (8) | name | data | crc32 (4)
+Objects come first and metadata last, so a partially imported vault never
+references objects it doesn't have. Nothing is decrypted on export.
+"""
+
+import zlib
+import struct
+from pathlib import Path
+from src.auth.key_manager import KeyManager
+from src.storage.backends import LocalBackend
+
+MAGIC = b"EFVAULT1"
+RECORD_HEADER = struct.Struct(">BHQ")
+CRC = struct.Struct(">I")
+
+RECORD_KEY = 1       # master_key.enc
+RECORD_OBJECT = 2    # encrypted_files/<file_id>.enc
+RECORD_METADATA = 3  # metadata.enc
+RECORD_END = 255
+
+BLOCK_SIZE = 1024 * 1024  # Large sequential blocks for tape/object storage
+
+
+class ArchiveError(ValueError):
+    """Raised for damaged or incompatible archives"""
+
+
+def _read_exact(stream, size: int) -> bytes:
+    """Read exactly size bytes or raise EOFError"""
+    parts = []
+    while size > 0:
+        block = stream.read(size)
+        if not block:
+            raise EOFError("Unexpected end of archive")
+        parts.append(block)
+        size -= len(block)
+    return b"".join(parts)
+
+
+class VaultArchive:
+    def __init__(self, vault_path: str = "./vault_data", block_size: int = BLOCK_SIZE,
+                 backend=None):
+        self.vault_path = Path(vault_path)
+        self.backend = backend or LocalBackend(vault_path)
+        self.block_size = block_size
+
+    # ---------- export ----------
+
+    def _write_record(self, stream, record_type: int, name: str, key: str = None,
+                      size: int = 0, data: bytes = b""):
+        """Write one record, copying a stored object in large ranged reads"""
+        name_bytes = name.encode()
+        if key is None:
+            size = len(data)
+        stream.write(RECORD_HEADER.pack(record_type, len(name_bytes), size))
+        stream.write(name_bytes)
+
+        crc = zlib.crc32(name_bytes)
+        if key is None:
+            stream.write(data)
+            crc = zlib.crc32(data, crc)
+        else:
+            offset = 0
+            while offset < size:
+                block = self.backend.get_range(key, offset, min(self.block_size, size - offset))
+                if not block:
+                    raise ArchiveError(f" {name} shrank while exporting")
+                stream.write(block)
+                crc = zlib.crc32(block, crc)
+                offset += len(block)
+        stream.write(CRC.pack(crc))
+        return size
+
+    def _scan_existing(self, stream) -> tuple:
+        """
+        Walk a partial archive written by an interrupted export
+        Returns (names already exported, offset after last good record, finished)
+        """
+        stream.seek(0)
+        if stream.read(len(MAGIC)) != MAGIC:
+            return set(), 0, False
+
+        done = set()
+        good_offset = stream.tell()
+        while True:
+            try:
+                record_type, name_len, size = RECORD_HEADER.unpack(_read_exact(stream, RECORD_HEADER.size))
+                name = _read_exact(stream, name_len)
+                crc = zlib.crc32(name)
+                remaining = size
+                while remaining > 0:
+                    block = _read_exact(stream, min(self.block_size, remaining))
+                    crc = zlib.crc32(block, crc)
+                    remaining -= len(block)
+                if CRC.unpack(_read_exact(stream, CRC.size))[0] != crc:
+                    break
+            except (EOFError, struct.error):
+                break
+
+            if record_type == RECORD_END:
+                return done, stream.tell(), True
+            if record_type == RECORD_METADATA:
+                # Always rewritten on resume so it matches the objects
+                continue
+            done.add((record_type, name.decode()))
+            good_offset = stream.tell()
+
+        return done, good_offset, False
+
+    def export_vault(self, dest_stream, resume: bool = False) -> dict:
+        """
+        Stream the vault's ciphertext and metadata into dest_stream
+        resume: Continue an interrupted export (dest_stream must be opened 'r+b')
+        """
+        try:
+            key_size = self.backend.size("master_key.enc")
+        except FileNotFoundError:
+            raise FileNotFoundError(" No vault found!")
+
+        print(f" Exporting vault from {self.vault_path}...")
+
+        done = set()
+        if resume:
+            done, offset, finished = self._scan_existing(dest_stream)
+            if finished:
+                print(" Archive already complete")
+                return {"objects": 0, "bytes": 0, "skipped": len(done)}
+            dest_stream.seek(offset)
+            dest_stream.truncate()
+            if offset == 0:
+                dest_stream.write(MAGIC)
+            elif done:
+                print(f"   Resuming after {len(done):,} records")
+        else:
+            dest_stream.write(MAGIC)
+
+        stats = {"objects": 0, "bytes": 0, "skipped": 0}
+
+        # Snapshot metadata before listing objects: files added while we export
+        # then have their objects in the archive or aren't in its metadata at all
+        try:
+            metadata = self.backend.get("metadata.enc")
+        except FileNotFoundError:
+            metadata = None
+
+        if (RECORD_KEY, "master_key.enc") not in done:
+            self._write_record(dest_stream, RECORD_KEY, "master_key.enc",
+                               key="master_key.enc", size=key_size)
+
+        # Sorted so a resumed export walks the same order
+        for entry in sorted(self.backend.list("encrypted_files/"), key=lambda e: e["key"]):
+            name = entry["key"].rsplit("/", 1)[-1]
+            if not name.endswith(".enc"):
+                continue
+            if (RECORD_OBJECT, name) in done:
+                stats["skipped"] += 1
+                continue
+            stats["bytes"] += self._write_record(dest_stream, RECORD_OBJECT, name,
+                                                 key=entry["key"], size=entry["size"])
+            stats["objects"] += 1
+
+        if metadata is not None:
+            self._write_record(dest_stream, RECORD_METADATA, "metadata.enc", data=metadata)
+
+        self._write_record(dest_stream, RECORD_END, "")
+        dest_stream.flush()
+
+        print(f" Exported {stats['objects']:,} objects ({stats['bytes']:,} bytes)")
+        return stats
+
+    # ---------- import ----------
+
+    def _record_blocks(self, src_stream, name: str, size: int, crc: int):
+        """Yield a record's data in blocks, checking its CRC after the last one"""
+        remaining = size
+        while remaining > 0:
+            block = _read_exact(src_stream, min(self.block_size, remaining))
+            crc = zlib.crc32(block, crc)
+            remaining -= len(block)
+            yield block
+        if CRC.unpack(_read_exact(src_stream, CRC.size))[0] != crc:
+            # Raised inside put_stream, so the half-written object is discarded
+            raise ArchiveError(f" Checksum mismatch for {name}")
+
+    def _import_object(self, src_stream, name: str, size: int, name_crc: int) -> bool:
+        """Stream one object into storage; returns False if it was already there"""
+        key = f"encrypted_files/{name}"
+        blocks = self._record_blocks(src_stream, name, size, name_crc)
+
+        # Stored objects are never rewritten (an update writes a new name), so a
+        # name we have is the same object - replacing it could only break the
+        # entry of ours that uses it
+        if self.backend.exists(key):
+            # Incremental import: already have it, just consume the bytes
+            for _ in blocks:
+                pass
+            return False
+
+        self.backend.put_stream(key, blocks)
+        return True
+
+    def _import_metadata(self, data: bytes, kek: bytes):
+        """Install archive metadata, merging with the vault's own if needed"""
+        try:
+            current = self.backend.get("metadata.enc")
+        except FileNotFoundError:
+            current = None
+        if current is None or current == data:
+            self.backend.put("metadata.enc", data)
+            return
+
+        if kek is None:
+            raise ArchiveError(" Vault already has different metadata - pass kek to merge")
+
+        km = KeyManager(str(self.vault_path), backend=self.backend)
+        existing = km.load_metadata(kek)
+        incoming = km.decrypt_metadata(data, kek)
+
+        # Same file on both sides: the newer revision wins (its objects came with it)
+        for file_id, info in incoming.items():
+            if file_id not in existing or \
+                    info.get("revision", 0) > existing[file_id].get("revision", 0):
+                existing[file_id] = info
+        km.save_metadata(existing, kek)
+
+    def import_vault(self, src_stream, kek: bytes = None) -> dict:
+        """
+        Restore an archive into this vault (empty or the same vault)
+        Objects already present are skipped, so an interrupted import can simply rerun
+        kek: Needed only to merge metadata with a vault that has changed since
+        """
+        if _read_exact(src_stream, len(MAGIC)) != MAGIC:
+            raise ArchiveError(" Not a vault archive")
+
+        print(f" Importing vault into {self.vault_path}...")
+
+        stats = {"objects": 0, "bytes": 0, "skipped": 0}
+        while True:
+            record_type, name_len, size = RECORD_HEADER.unpack(_read_exact(src_stream, RECORD_HEADER.size))
+            name_bytes = _read_exact(src_stream, name_len)
+            name = name_bytes.decode()
+
+            if record_type == RECORD_OBJECT:
+                if Path(name).name != name:
+                    raise ArchiveError(f" Unsafe object name in archive: {name}")
+                if self._import_object(src_stream, name, size, zlib.crc32(name_bytes)):
+                    stats["objects"] += 1
+                    stats["bytes"] += size
+                else:
+                    stats["skipped"] += 1
+                continue
+
+            data = _read_exact(src_stream, size)
+            if CRC.unpack(_read_exact(src_stream, CRC.size))[0] != zlib.crc32(data, zlib.crc32(name_bytes)):
+                raise ArchiveError(f" Checksum mismatch for {name or 'end marker'}")
+
+            if record_type == RECORD_END:
+                break
+            elif record_type == RECORD_KEY:
+                if self.backend.exists("master_key.enc") and self.backend.get("master_key.enc") != data:
+                    raise ArchiveError(" Archive belongs to a different vault")
+                self.backend.put("master_key.enc", data)
+            elif record_type == RECORD_METADATA:
+                self._import_metadata(data, kek)
+            else:
+                raise ArchiveError(f" Unknown record type {record_type}")
+
+        print(f" Imported {stats['objects']:,} objects ({stats['bytes']:,} bytes), "
+              f"{stats['skipped']:,} already present")
+        return stats
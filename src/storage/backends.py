@@ -0,0 +1,438 @@
+# src/storage/backends.py
+"""
+Storage Backends - Where the vault's encrypted bytes actually live
+
+Every backend stores opaque objects under '/'-separated keys such as
+"master_key.enc" or "encrypted_files/<file_id>.enc". Encryption happens
+above this layer, so backends only ever see ciphertext.
+"""
+
+import os
+import hmac
+import time
+import uuid
+import queue
+import hashlib
+import threading
+import http.client
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from datetime import datetime, timezone
+from urllib.parse import urlparse, quote
+from concurrent.futures import ThreadPoolExecutor
+
+from src.storage.scheduler import checkpoint
+from src.storage.group_commit import GroupCommit, fsync_directory
+
+# One group commit per directory, shared by every LocalBackend in the process
+_directory_syncs = {}
+_directory_syncs_lock = threading.Lock()
+
+
+def _sync_directory(path: Path):
+    with _directory_syncs_lock:
+        group = _directory_syncs.get(path)
+        if group is None:
+            group = _directory_syncs[path] = GroupCommit(lambda _: fsync_directory(path))
+    group.commit()
+
+
+class StorageBackend:
+    """Interface shared by all backends"""
+
+    def put(self, key: str, data: bytes):
+        """Store data under key, replacing any existing object"""
+        raise NotImplementedError
+
+    def put_stream(self, key: str, chunks):
+        """Store an object given as an iterable of byte blocks"""
+        self.put(key, b"".join(chunks))
+
+    def get(self, key: str) -> bytes:
+        """Return the whole object (FileNotFoundError if missing)"""
+        raise NotImplementedError
+
+    def get_range(self, key: str, offset: int, length: int = None) -> bytes:
+        """Return length bytes from offset (to the end if length is None)"""
+        data = self.get(key)
+        return data[offset:] if length is None else data[offset:offset + length]
+
+    def delete(self, key: str):
+        """Remove an object (FileNotFoundError if missing)"""
+        raise NotImplementedError
+
+    def wipe(self, key: str, passes: int = 3):
+        """Overwrite an object with random data before deleting it"""
+        size = self.size(key)
+        for _ in range(passes):
+            self.put(key, os.urandom(size))
+            checkpoint(size, cancellable=False)
+        self.delete(key)
+
+    def list(self, prefix: str = "") -> list:
+        """List objects under prefix as dicts with key, size and modified (timestamp)"""
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        """Size of an object in bytes (FileNotFoundError if missing)"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.size(key)
+            return True
+        except FileNotFoundError:
+            return False
+
+
+class LocalBackend(StorageBackend):
+    """
+    Plain files under a directory (the original vault layout)
+    Writes go to a temporary file that is fsynced and renamed over the
+    target, so a crash leaves either the old or the new object, never a
+    torn one. The directory fsync that makes the rename durable is shared
+    by concurrent writers (group commit).
+    """
+
+    def __init__(self, root: str, durable: bool = True):
+        """durable: fsync files and directories (off = faster, crash-unsafe)"""
+        self.root = Path(root)
+        self.durable = durable
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def put(self, key: str, data: bytes):
+        self.put_stream(key, [data])
+
+    def put_stream(self, key: str, chunks):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique name so concurrent writers of one key don't share a temp file
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:12]}.part")
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                if self.durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        os.replace(tmp_path, path)
+        if self.durable:
+            _sync_directory(path.parent.resolve())
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), 'rb') as f:
+            return f.read()
+
+    def get_range(self, key: str, offset: int, length: int = None) -> bytes:
+        with open(self._path(key), 'rb') as f:
+            f.seek(offset)
+            return f.read() if length is None else f.read(length)
+
+    def delete(self, key: str):
+        self._path(key).unlink()
+
+    def wipe(self, key: str, passes: int = 3):
+        # Overwrite in place so the old blocks are really replaced
+        path = self._path(key)
+        file_size = path.stat().st_size
+        with open(path, 'r+b') as f:
+            for _ in range(passes):
+                f.seek(0)
+                f.write(os.urandom(file_size))
+                f.flush()
+                os.fsync(f.fileno())
+                checkpoint(file_size, cancellable=False)
+        path.unlink()
+
+    def list(self, prefix: str = "") -> list:
+        directory = self._path(prefix) if prefix.endswith("/") else self._path(prefix).parent
+        if not directory.is_dir():
+            return []
+
+        base = directory.relative_to(self.root).as_posix()
+        base = "" if base == "." else base + "/"
+        objects = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                key = base + entry.name
+                if not entry.is_file() or not key.startswith(prefix) or entry.name.endswith(".part"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Deleted while we were listing
+                objects.append({"key": key, "size": stat.st_size, "modified": stat.st_mtime})
+        return objects
+
+    def size(self, key: str) -> int:
+        return self._path(key).stat().st_size
+
+
+class MemoryBackend(StorageBackend):
+    """Objects kept in a dict - for fast tests and benchmarks"""
+
+    def __init__(self):
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def put(self, key: str, data: bytes):
+        with self.lock:
+            self.objects[key] = (bytes(data), time.time())
+
+    def get(self, key: str) -> bytes:
+        with self.lock:
+            if key not in self.objects:
+                raise FileNotFoundError(f" Object not found: {key}")
+            return self.objects[key][0]
+
+    def delete(self, key: str):
+        with self.lock:
+            if self.objects.pop(key, None) is None:
+                raise FileNotFoundError(f" Object not found: {key}")
+
+    def list(self, prefix: str = "") -> list:
+        with self.lock:
+            return [{"key": key, "size": len(data), "modified": modified}
+                    for key, (data, modified) in self.objects.items()
+                    if key.startswith(prefix)]
+
+    def size(self, key: str) -> int:
+        return len(self.get(key))
+
+
+S3_NAMESPACE = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+class S3Backend(StorageBackend):
+    """
+    S3-compatible object store (AWS, MinIO, Ceph RGW...)
+    Uses path-style URLs, SigV4 signing and a pool of keep-alive connections.
+    Large objects go up as concurrent multipart uploads.
+    """
+
+    def __init__(self, endpoint_url: str, bucket: str, access_key: str = None,
+                 secret_key: str = None, region: str = "us-east-1", prefix: str = "",
+                 pool_size: int = 8, part_size: int = 8 * 1024 * 1024,
+                 max_workers: int = 4, timeout: float = 60):
+        """
+        endpoint_url: e.g. "https://s3.eu-west-1.amazonaws.com" or "http://127.0.0.1:9000"
+        prefix: Key prefix inside the bucket (lets many vaults share one bucket)
+        pool_size: Maximum idle connections kept open
+        part_size: Multipart part size (S3 minimum is 5 MiB except for the last part)
+        max_workers: Parts uploaded in parallel
+        """
+        url = urlparse(endpoint_url)
+        self.secure = url.scheme == "https"
+        self.host = url.netloc
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.prefix = prefix
+        self.part_size = part_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+
+    # ---------- connection pool ----------
+
+    def _connect(self):
+        conn_class = http.client.HTTPSConnection if self.secure else http.client.HTTPConnection
+        return conn_class(self.host, timeout=self.timeout)
+
+    def _acquire(self):
+        try:
+            return self.pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, conn):
+        try:
+            self.pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    # ---------- signing ----------
+
+    def _sign(self, method: str, path: str, query: dict, headers: dict, payload_hash: str):
+        """Add AWS Signature Version 4 headers"""
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date = now.strftime("%Y%m%d")
+
+        headers["host"] = self.host
+        headers["x-amz-date"] = amz_date
+        headers["x-amz-content-sha256"] = payload_hash
+        if not self.access_key:
+            return
+
+        lowered = {name.lower(): str(value).strip() for name, value in headers.items()}
+        signed_headers = ";".join(sorted(lowered))
+        canonical_request = "\n".join([
+            method,
+            path,
+            self._query_string(query),
+            "".join(f"{name}:{lowered[name]}\n" for name in sorted(lowered)),
+            signed_headers,
+            payload_hash,
+        ])
+        scope = f"{date}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256", amz_date, scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ])
+
+        key = ("AWS4" + self.secret_key).encode()
+        for part in (date, self.region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+        headers["Authorization"] = (f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+                                    f"SignedHeaders={signed_headers}, Signature={signature}")
+
+    @staticmethod
+    def _query_string(query: dict) -> str:
+        return "&".join(f"{quote(str(k), safe='-_.~')}={quote(str(v), safe='-_.~')}"
+                        for k, v in sorted(query.items()))
+
+    # ---------- requests ----------
+
+    def _request(self, method: str, key: str = "", query: dict = None,
+                 headers: dict = None, body: bytes = b"") -> tuple:
+        """Send one signed request, returning (status, headers, body)"""
+        query = query or {}
+        headers = dict(headers or {})
+        path = quote(f"/{self.bucket}/{self.prefix}{key}" if key else f"/{self.bucket}", safe="/-_.~")
+        self._sign(method, path, query, headers, hashlib.sha256(body).hexdigest() if body else EMPTY_SHA256)
+
+        url = path + ("?" + self._query_string(query) if query else "")
+        for attempt in range(2):
+            conn = self._acquire()
+            try:
+                conn.request(method, url, body=body or None, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (ConnectionError, http.client.HTTPException, OSError):
+                # Stale keep-alive connection: drop it and retry once on a fresh one
+                conn.close()
+                if attempt:
+                    raise
+                continue
+            self._release(conn)
+
+            if response.status == 404:
+                raise FileNotFoundError(f" Object not found: {key}")
+            if response.status >= 300:
+                raise OSError(f" S3 {method} {key} failed with {response.status}: {data[:200]!r}")
+            return response.status, {k.lower(): v for k, v in response.getheaders()}, data
+
+    # ---------- StorageBackend ----------
+
+    def put(self, key: str, data: bytes):
+        view = memoryview(data)
+        self.put_stream(key, (view[i:i + self.part_size] for i in range(0, max(len(data), 1), self.part_size)))
+
+    def put_stream(self, key: str, chunks):
+        buffer = bytearray()
+        chunks = iter(chunks)
+
+        # Small objects: a single PUT, no multipart overhead
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) > self.part_size:
+                break
+        else:
+            self._request("PUT", key, body=bytes(buffer))
+            return
+
+        _, _, data = self._request("POST", key, query={"uploads": ""})
+        upload_id = ET.fromstring(data).find(f"{S3_NAMESPACE}UploadId").text
+        # Bound parts held in memory while workers upload
+        in_flight = threading.Semaphore(self.max_workers * 2)
+
+        def upload_part(number: int, body: bytes) -> str:
+            try:
+                _, headers, _ = self._request("PUT", key, query={"partNumber": number, "uploadId": upload_id},
+                                              body=body)
+                return headers.get("etag", "")
+            finally:
+                in_flight.release()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = []
+
+                def submit(body: bytes):
+                    in_flight.acquire()
+                    futures.append(pool.submit(upload_part, len(futures) + 1, body))
+
+                def drain():
+                    # Keep at least one byte back so the last part is never empty
+                    while len(buffer) > self.part_size:
+                        submit(bytes(buffer[:self.part_size]))
+                        del buffer[:self.part_size]
+
+                drain()
+                for chunk in chunks:
+                    buffer += chunk
+                    drain()
+                submit(bytes(buffer))
+                etags = [future.result() for future in futures]
+
+            parts = "".join(f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>"
+                            for n, etag in enumerate(etags, 1))
+            body = f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode()
+            self._request("POST", key, query={"uploadId": upload_id}, body=body)
+        except BaseException:
+            try:
+                self._request("DELETE", key, query={"uploadId": upload_id})
+            except OSError:
+                pass
+            raise
+
+    def get(self, key: str) -> bytes:
+        return self._request("GET", key)[2]
+
+    def get_range(self, key: str, offset: int, length: int = None) -> bytes:
+        if length == 0:
+            return b""
+        end = "" if length is None else offset + length - 1
+        try:
+            return self._request("GET", key, headers={"Range": f"bytes={offset}-{end}"})[2]
+        except OSError as e:
+            # 416: offset past the end of the object
+            if " 416:" in str(e):
+                return b""
+            raise
+
+    def delete(self, key: str):
+        # S3 DELETE succeeds for missing keys, so check first to match other backends
+        self.size(key)
+        self._request("DELETE", key)
+
+    def list(self, prefix: str = "") -> list:
+        objects = []
+        query = {"list-type": "2", "prefix": self.prefix + prefix}
+        while True:
+            _, _, data = self._request("GET", query=query)
+            root = ET.fromstring(data)
+            for item in root.findall(f"{S3_NAMESPACE}Contents"):
+                modified = item.find(f"{S3_NAMESPACE}LastModified").text
+                objects.append({
+                    "key": item.find(f"{S3_NAMESPACE}Key").text[len(self.prefix):],
+                    "size": int(item.find(f"{S3_NAMESPACE}Size").text),
+                    "modified": datetime.fromisoformat(modified.replace("Z", "+00:00")).timestamp(),
+                })
+            token = root.find(f"{S3_NAMESPACE}NextContinuationToken")
+            if token is None:
+                return objects
+            query = dict(query, **{"continuation-token": token.text})
+
+    def size(self, key: str) -> int:
+        return int(self._request("HEAD", key)[1]["content-length"])
@@ -0,0 +1,83 @@
+# src/storage/cache.py
+"""
+Content Cache - Bounded LRU of decrypted files for hot, small reads
+
+Entries carry a version tag (revision and hash from the file's metadata),
+so content changed by another process is never served from a stale entry
+even though nobody invalidated it here.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class ContentCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entry_size: int = 1024 * 1024):
+        """
+        max_bytes: Total plaintext bytes kept in memory
+        max_entry_size: Files larger than this are never cached
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_size = max_entry_size
+        self.entries = OrderedDict()  # file_id -> (tag, bytes), oldest first
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, file_id: str, tag=None):
+        """Return cached content or None (also if it was cached under another tag)"""
+        with self.lock:
+            entry = self.entries.get(file_id)
+            if entry is None or entry[0] != tag:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(file_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, file_id: str, data: bytes, tag=None):
+        """Cache content if it is small enough, evicting least recently used"""
+        if len(data) > self.max_entry_size or len(data) > self.max_bytes:
+            return
+
+        with self.lock:
+            old = self.entries.pop(file_id, None)
+            if old is not None:
+                self.current_bytes -= len(old[1])
+
+            self.entries[file_id] = (tag, data)
+            self.current_bytes += len(data)
+
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, file_id: str):
+        """Drop one file (after delete or update)"""
+        with self.lock:
+            old = self.entries.pop(file_id, None)
+            if old is not None:
+                self.current_bytes -= len(old[1])
+
+    def clear(self):
+        """Drop everything (when the vault locks)"""
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def get_stats(self) -> dict:
+        """Hit-rate statistics"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
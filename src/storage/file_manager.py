@@ -4,24 +4,53 @@ File Storage Manager - Handles actual file encryption/decryption
 FIXED: File ID generation for Windows compatibility
 """
 
+import io
 import os
 import json
+import time
 import base64
-import hashlib
 from pathlib import Path
 from datetime import datetime
 from src.crypto.engine import CryptoEngine
+from src.crypto.merkle import DEFAULT_CHUNK_SIZE, chunk_digest, merkle_root, new_hasher
+from src.storage.backends import LocalBackend
+from src.storage.vault_file import VaultFile
+from src.storage.versioning import SNAPSHOT_EVERY, make_delta, apply_delta, split_revision, split_current
+from src.storage.scheduler import JobScheduler, checkpoint, INTERACTIVE, INGEST, MAINTENANCE
+from src import profiling
+
+# Scheduler class of each operation when submit() isn't told otherwise
+# Seconds a superseded object is kept after the update that replaced it, so
+# readers still holding the previous metadata (an export, the daemon) can finish
+PRUNE_GRACE = 24 * 3600
+
+JOB_PRIORITIES = {
+    "get_file": INTERACTIVE, "read_range": INTERACTIVE, "get_version": INTERACTIVE,
+    "restore_version": INTERACTIVE,
+    "add_file": INGEST, "add_bytes": INGEST, "update_file": INGEST, "update_bytes": INGEST,
+    "verify_file": MAINTENANCE, "verify_chunks": MAINTENANCE, "delete_file": MAINTENANCE,
+}
 
 class FileManager:
-    def __init__(self, vault_path: str = "./vault_data"):
+    def __init__(self, vault_path: str = "./vault_data", backend=None, cache=None,
+                 crypto=None, scheduler=None):
         """
         Initialize file manager
         vault_path: Where encrypted files will be stored
+        backend: StorageBackend to use instead of plain files under vault_path
+        cache: Optional ContentCache of decrypted content for hot small files
+        crypto: CryptoEngine to share with other managers (a new one if None)
+        scheduler: JobScheduler for submit() (created on first use if None)
         """
         self.vault_path = Path(vault_path)
         self.files_path = self.vault_path / "encrypted_files"
-        self.files_path.mkdir(exist_ok=True)  # Create folder if doesn't exist
-        self.crypto = CryptoEngine()
+        if backend is None:
+            backend = LocalBackend(vault_path)
+            self.files_path.mkdir(exist_ok=True)  # Create folder if doesn't exist
+        self.backend = backend
+        self.cache = cache
+        self.crypto = crypto or CryptoEngine()
+        self.scheduler = scheduler
         print(" File Manager Initialized")
     
     def _generate_file_id(self) -> str:
@@ -30,9 +59,28 @@ class FileManager:
         random_bytes = self.crypto.generate_file_key()[:8]  # 8 bytes = 16 hex chars
         return random_bytes.hex()  # Returns something like "a1b2c3d4e5f67890"
     
-    def add_file(self, source_path: str, master_key: bytes) -> dict:
+    def _object_key(self, file_id: str, metadata: dict = None) -> str:
+        """Backend key holding a file's current ciphertext (named in metadata after updates)"""
+        name = metadata.get("object") if metadata else None
+        return f"encrypted_files/{name or file_id + '.enc'}"
+
+    def _revision_key(self, file_id: str, version: dict) -> str:
+        """Backend key holding an older revision (full or delta) listed in metadata["versions"]"""
+        name = version.get("object") or f"{file_id}.r{version['revision']}.enc"
+        return f"encrypted_files/{name}"
+
+    def _digest(self, data: bytes, hash_algo: str = "sha256") -> str:
+        """Short whole-file digest stored in metadata["hash"]"""
+        hasher = new_hasher(hash_algo)
+        hasher.update(data)
+        return hasher.hexdigest()[:16]
+    
+    def add_file(self, source_path: str, master_key: bytes,
+                 hash_algo: str = "sha256", chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
         """
         Add a file to the encrypted vault
+        hash_algo: "sha256" or "blake2b" (faster)
+        chunk_size: Plaintext bytes covered by each Merkle leaf
         """
         source = Path(source_path)
         
@@ -42,6 +90,21 @@ class FileManager:
         
         print(f"\n Adding: {source.name} ({source.stat().st_size:,} bytes)")
         
+        # Read the actual file content
+        with open(source_path, 'rb') as f:
+            file_data = f.read()
+        
+        return self.add_bytes(file_data, source.name, master_key, str(source.parent),
+                              hash_algo, chunk_size)
+    
+    def add_bytes(self, file_data: bytes, original_name: str, master_key: bytes,
+                  original_path: str = "", hash_algo: str = "sha256",
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+        """
+        Add in-memory content to the encrypted vault (add_file without the disk read)
+        """
+        checkpoint()
+        
         # FIXED: Generate safe file ID
         file_id = self._generate_file_id()
         
@@ -51,36 +114,33 @@ class FileManager:
         # Encrypt the file key with master key
         encrypted_file_key = self.crypto.encrypt_data(file_key, master_key)
         
-        # Read the actual file content
-        with open(source_path, 'rb') as f:
-            file_data = f.read()
-        
-        # Calculate hash for integrity checking
-        file_hash = hashlib.sha256(file_data).hexdigest()[:16]
-        
-        # Encrypt the file content with the file's unique key
+        # Encrypt the file content with the file's unique key,
+        # hashing whole file and chunks in the same pass
         print("   Encrypting...")
-        encrypted_data = self.crypto.encrypt_data(file_data, file_key)
+        encrypted_data, full_hash, chunk_hashes = self.crypto.encrypt_with_digests(
+            file_data, file_key, chunk_size, hash_algo)
+        file_hash = full_hash[:16]
         
         # Save the encrypted file
-        encrypted_filename = f"{file_id}.enc"
-        encrypted_path = self.files_path / encrypted_filename
-        
-        with open(encrypted_path, 'wb') as f:
-            f.write(encrypted_data)
+        self.backend.put(self._object_key(file_id), encrypted_data)
+        checkpoint(len(file_data), cancellable=False)
         
         # Create metadata
         metadata = {
             "file_id": file_id,
-            "original_name": source.name,
-            "original_path": str(source.parent),
-            "original_size": source.stat().st_size,
+            "original_name": original_name,
+            "original_path": original_path,
+            "original_size": len(file_data),
             "encrypted_size": len(encrypted_data),
             "created_at": datetime.now().isoformat(),
             "encrypted_key": base64.b64encode(encrypted_file_key).decode(),
-            "file_type": source.suffix.lower(),
+            "file_type": Path(original_name).suffix.lower(),
             "hash": file_hash,
-            "chunks": 1
+            "hash_algo": hash_algo,
+            "chunks": len(chunk_hashes),
+            "chunk_size": chunk_size,
+            "chunk_hashes": chunk_hashes,
+            "merkle_root": merkle_root(chunk_hashes, hash_algo)
         }
         
         print(f" Added! File ID: {file_id}")
@@ -93,20 +153,24 @@ class FileManager:
         """
         Retrieve a file from the vault
         """
-        encrypted_path = self.files_path / f"{file_id}.enc"
+        # Tagged with the content's version: another process may have updated it
+        cache_tag = (metadata.get("revision", 0), metadata.get("hash"))
+        if self.cache is not None:
+            cached = self.cache.get(file_id, cache_tag)
+            if cached is not None:
+                return cached
         
-        if not encrypted_path.exists():
+        try:
+            # Load the encrypted file from storage
+            encrypted_data = self.backend.get(self._object_key(file_id, metadata))
+        except FileNotFoundError:
             raise FileNotFoundError(f" Encrypted file not found: {file_id}")
+        checkpoint(len(encrypted_data))
         
         print(f"\n📥 Retrieving: {metadata.get('original_name', 'Unknown')}")
         
-        # Load the encrypted file from disk
-        with open(encrypted_path, 'rb') as f:
-            encrypted_data = f.read()
-        
         # Decrypt the file key using master key
-        encrypted_key = base64.b64decode(metadata["encrypted_key"])
-        file_key = self.crypto.decrypt_data(encrypted_key, master_key)
+        file_key = self._unwrap_key(master_key, metadata)
         
         # Decrypt the actual file content
         print("   Decrypting...")
@@ -119,52 +183,449 @@ class FileManager:
             print(f"   Got: {len(decrypted_data):,} bytes")
         
         # Optional: Verify hash
+        verified = True
         if "hash" in metadata:
-            current_hash = hashlib.sha256(decrypted_data).hexdigest()[:16]
+            current_hash = self._digest(decrypted_data, metadata.get("hash_algo", "sha256"))
             if current_hash != metadata["hash"]:
                 print("  Warning: File hash doesn't match!")
+                verified = False
             else:
                 print(" Integrity check passed")
         
+        # Only content that passed the checks is worth serving again
+        if self.cache is not None and verified:
+            self.cache.put(file_id, decrypted_data, cache_tag)
+        
         print(f" Retrieved! Size: {len(decrypted_data):,} bytes")
         return decrypted_data
+
+    def verify_file(self, file_id: str, master_key: bytes, metadata: dict,
+                    encrypted_data: bytes = None) -> bool:
+        """
+        Quietly check that a stored file decrypts to the recorded size and hash
+        encrypted_data: Ciphertext already read by the caller (read from disk if None)
+        """
+        if encrypted_data is None:
+            try:
+                encrypted_data = self.backend.get(self._object_key(file_id, metadata))
+            except FileNotFoundError:
+                raise FileNotFoundError(f" Encrypted file not found: {file_id}")
+
+        if "encrypted_size" in metadata and len(encrypted_data) != metadata["encrypted_size"]:
+            return False
+
+        try:
+            file_key = self._unwrap_key(master_key, metadata)
+            decrypted_data = self.crypto.decrypt_data(encrypted_data, file_key)
+        except (ValueError, KeyError, IndexError):
+            # Bad key length, ciphertext not block aligned or empty plaintext
+            return False
+
+        if len(decrypted_data) != metadata.get("original_size", len(decrypted_data)):
+            return False
+
+        if "merkle_root" in metadata:
+            # Catch tampering with the stored leaves themselves
+            algo = metadata.get("hash_algo", "sha256")
+            if merkle_root(metadata["chunk_hashes"], algo) != metadata["merkle_root"]:
+                return False
+        
+        if "hash" in metadata:
+            return self._digest(decrypted_data, metadata.get("hash_algo", "sha256")) == metadata["hash"]
+        return True
+    
+    def _read_chunk(self, file_id: str, metadata: dict, file_key: bytes, index: int) -> bytes:
+        """Decrypt a single chunk with one ranged read"""
+        chunk_size = metadata["chunk_size"]
+        iv_size = self.crypto.iv_size
+        last = index == metadata["chunks"] - 1
+        
+        # Chunk i starts after the IV; the block before it is its CBC "IV"
+        start = index * chunk_size
+        raw = self.backend.get_range(self._object_key(file_id, metadata), start,
+                                     None if last else iv_size + chunk_size)
+        
+        return self.crypto.decrypt_chunk(raw[:iv_size], raw[iv_size:], file_key, last)
+    
+    def _load_chunk(self, file_id: str, metadata: dict, file_key: bytes, index: int) -> bytes:
+        """Decrypt a chunk and check it against its Merkle leaf"""
+        chunk = self._read_chunk(file_id, metadata, file_key, index)
+        if chunk_digest(chunk, metadata.get("hash_algo", "sha256")) != metadata["chunk_hashes"][index]:
+            raise ValueError(f" Chunk {index} of {file_id} failed verification")
+        checkpoint(len(chunk))
+        return chunk
+    
+    def _check_merkle_root(self, file_id: str, metadata: dict):
+        """Make sure the stored leaves themselves haven't been tampered with"""
+        algo = metadata.get("hash_algo", "sha256")
+        if merkle_root(metadata["chunk_hashes"], algo) != metadata["merkle_root"]:
+            raise ValueError(f" Chunk hashes of {file_id} don't match the Merkle root")
+    
+    def open(self, file_id: str, master_key: bytes, metadata: dict,
+             buffering: int = -1, read_ahead: int = 2):
+        """
+        Open a vaulted file as a read-only, seekable binary file object
+        Chunks are decrypted on demand and prefetched in the background
+        buffering: 0 for the raw VaultFile, otherwise a BufferedReader
+        read_ahead: Chunks to prefetch during sequential reads
+        """
+        if not self.backend.exists(self._object_key(file_id, metadata)):
+            raise FileNotFoundError(f" Encrypted file not found: {file_id}")
+        
+        raw = VaultFile(self, file_id, master_key, metadata, read_ahead)
+        if buffering == 0:
+            return raw
+        buffer_size = buffering if buffering > 0 else raw.chunk_size
+        return io.BufferedReader(raw, buffer_size=max(buffer_size, io.DEFAULT_BUFFER_SIZE))
+    
+    def _unwrap_key(self, master_key: bytes, metadata: dict) -> bytes:
+        """Decrypt a file's own key with the master key"""
+        encrypted_key = base64.b64decode(metadata["encrypted_key"])
+        return self.crypto.decrypt_data(encrypted_key, master_key)
     
+    def verify_chunks(self, file_id: str, master_key: bytes, metadata: dict,
+                      chunk_indices: list = None) -> list:
+        """
+        Verify only the given chunks against their Merkle leaves
+        Returns the indices that failed (empty list = all good)
+        """
+        if "chunk_hashes" not in metadata:
+            raise ValueError(f" File {file_id} has no per-chunk hashes")
+        
+        algo = metadata.get("hash_algo", "sha256")
+        leaves = metadata["chunk_hashes"]
+        if merkle_root(leaves, algo) != metadata["merkle_root"]:
+            return list(range(len(leaves)))
+        
+        if chunk_indices is None:
+            chunk_indices = range(len(leaves))
+        
+        file_key = self._unwrap_key(master_key, metadata)
+        bad = []
+        for index in chunk_indices:
+            try:
+                chunk = self._read_chunk(file_id, metadata, file_key, index)
+            except (ValueError, IndexError):
+                bad.append(index)
+                continue
+            if chunk_digest(chunk, algo) != leaves[index]:
+                bad.append(index)
+            checkpoint(len(chunk))
+        return bad
+    
+    def read_range(self, file_id: str, master_key: bytes, metadata: dict,
+                   offset: int, length: int) -> bytes:
+        """
+        Read part of a file, decrypting and verifying only the chunks it touches
+        """
+        if not self.backend.exists(self._object_key(file_id, metadata)):
+            raise FileNotFoundError(f" Encrypted file not found: {file_id}")
+        
+        if offset < 0 or length < 0:
+            raise ValueError(" Offset and length must not be negative")
+        
+        end = min(offset + length, metadata["original_size"])
+        if offset >= end:
+            return b""
+        
+        if "chunk_hashes" not in metadata:
+            # Older entries: only a whole-file hash, so decrypt everything
+            encrypted_data = self.backend.get(self._object_key(file_id, metadata))
+            data = self.crypto.decrypt_data(encrypted_data, self._unwrap_key(master_key, metadata))
+            return data[offset:end]
+        
+        self._check_merkle_root(file_id, metadata)
+        
+        chunk_size = metadata["chunk_size"]
+        file_key = self._unwrap_key(master_key, metadata)
+        first, last = offset // chunk_size, (end - 1) // chunk_size
+        parts = []
+        for index in range(first, last + 1):
+            parts.append(self._load_chunk(file_id, metadata, file_key, index))
+        
+        data = b"".join(parts)
+        start = offset - first * chunk_size
+        return data[start:start + (end - offset)]
+
+    def update_file(self, file_id: str, source_path: str, master_key: bytes, metadata: dict) -> dict:
+        """Save a new version of a vaulted file from disk (see update_bytes)"""
+        source = Path(source_path)
+        if not source.exists():
+            raise FileNotFoundError(f" File not found: {source_path}")
+
+        print(f"\n Updating: {metadata.get('original_name', file_id)} ({source.stat().st_size:,} bytes)")
+
+        with open(source_path, 'rb') as f:
+            file_data = f.read()
+
+        return self.update_bytes(file_id, file_data, master_key, metadata, str(source.parent))
+
+    def update_bytes(self, file_id: str, file_data: bytes, master_key: bytes, metadata: dict,
+                     original_path: str = None) -> dict:
+        """
+        Replace a file's content, keeping the previous content as a revision
+        The old revision is stored as a delta against the new content (or as a
+        full snapshot every SNAPSHOT_EVERY revisions / when a delta doesn't pay off)
+        Nothing stored is overwritten: the new content goes to a fresh object
+        named in the returned entry, so until the caller saves that entry the
+        vault still describes (and holds) the old content. Call prune_objects
+        after saving; it drops the superseded object once PRUNE_GRACE has passed.
+        Returns the updated metadata entry; the caller saves it
+        """
+        checkpoint()
+        old_data = self.get_file(file_id, master_key, metadata)
+        file_key = self._unwrap_key(master_key, metadata)
+        revision = metadata.get("revision", 0)
+        hash_algo = metadata.get("hash_algo", "sha256")
+        chunk_size = metadata.get("chunk_size", DEFAULT_CHUNK_SIZE)
+
+        # Both objects of this update share a tag, so a concurrent update of
+        # the same file can't overwrite them
+        tag = self.crypto.generate_file_key()[:4].hex()
+
+        delta = None
+        if revision % SNAPSHOT_EVERY != 0:
+            delta = make_delta(file_data, old_data, max_size=len(old_data) // 4)
+        if delta is not None:
+            revision_key = f"encrypted_files/{file_id}.r{revision}-{tag}.enc"
+            encrypted_revision = self.crypto.encrypt_data(delta, file_key)
+            self.backend.put(revision_key, encrypted_revision)
+            revision_size = len(encrypted_revision)
+        else:
+            # The current object is never overwritten: it stays on as the snapshot
+            revision_key = self._object_key(file_id, metadata)
+            revision_size = metadata.get("encrypted_size") or self.backend.size(revision_key)
+
+        print("   Encrypting...")
+        encrypted_data, full_hash, chunk_hashes = self.crypto.encrypt_with_digests(
+            file_data, file_key, chunk_size, hash_algo)
+        object_name = f"{file_id}.v{revision + 1}-{tag}.enc"
+        self.backend.put(f"encrypted_files/{object_name}", encrypted_data)
+        checkpoint(len(file_data), cancellable=False)
+
+        if self.cache is not None:
+            self.cache.invalidate(file_id)
+
+        versions = list(metadata.get("versions", []))
+        versions.append({
+            "revision": revision,
+            "saved_at": metadata.get("modified_at", metadata.get("created_at")),
+            "original_size": len(old_data),
+            "hash": self._digest(old_data, hash_algo),
+            "storage": "delta" if delta is not None else "full",
+            "encrypted_size": revision_size,
+            "object": revision_key.rsplit("/", 1)[-1]
+        })
+
+        updated = dict(metadata)
+        updated.update({
+            "original_size": len(file_data),
+            "encrypted_size": len(encrypted_data),
+            "modified_at": datetime.now().isoformat(),
+            "hash": full_hash[:16],
+            "hash_algo": hash_algo,
+            "chunks": len(chunk_hashes),
+            "chunk_size": chunk_size,
+            "chunk_hashes": chunk_hashes,
+            "merkle_root": merkle_root(chunk_hashes, hash_algo),
+            "revision": revision + 1,
+            "versions": versions,
+            "object": object_name
+        })
+        if original_path is not None:
+            updated["original_path"] = original_path
+        # When each no longer used object stopped being current; prune_objects
+        # waits out the grace period from then (older ones are past it anyway)
+        now = time.time()
+        superseded = [s for s in metadata.get("superseded", []) if now - s["at"] < PRUNE_GRACE]
+        if delta is not None:
+            superseded.append({"object": self._object_key(file_id, metadata).rsplit("/", 1)[-1],
+                               "at": now})
+        updated["superseded"] = superseded
+
+        print(f" Saved revision {revision + 1} (previous kept as {versions[-1]['storage']}, "
+              f"{revision_size:,} bytes)")
+        return updated
+
+    def prune_objects(self, file_id: str, metadata: dict, grace: float = PRUNE_GRACE) -> int:
+        """
+        Delete objects of a file that its saved metadata entry no longer uses
+        (the current object an update superseded, history of an update that
+        lost to another one). Call only once the entry is saved; objects newer
+        than its revision may belong to an update still in flight and are kept.
+        grace: Seconds an object must have been unused (or, if the entry doesn't
+               say since when, stored) before it goes - an export or the daemon
+               may still be reading it through an older metadata snapshot
+        Returns the number of objects deleted.
+        """
+        used = {self._object_key(file_id, metadata)}
+        used.update(self._revision_key(file_id, v) for v in metadata.get("versions", []))
+        since = {s["object"]: s["at"] for s in metadata.get("superseded", [])}
+        revision = metadata.get("revision", 0)
+        now = time.time()
+
+        pruned = 0
+        for entry in self.backend.list(f"encrypted_files/{file_id}."):
+            name = entry["key"].rsplit("/", 1)[-1]
+            owner = split_current(name) or split_revision(name)
+            if owner is None or owner[0] != file_id or entry["key"] in used:
+                continue
+            if owner[1] >= revision or now - since.get(name, entry["modified"]) < grace:
+                continue
+            try:
+                self.backend.delete(entry["key"])
+            except FileNotFoundError:
+                continue  # Pruned by another process first
+            pruned += 1
+        return pruned
+
+    def list_versions(self, metadata: dict) -> list:
+        """All revisions of a file, oldest first; the last one is the current content"""
+        versions = [dict(v, current=False) for v in metadata.get("versions", [])]
+        versions.append({
+            "revision": metadata.get("revision", 0),
+            "saved_at": metadata.get("modified_at", metadata.get("created_at")),
+            "original_size": metadata["original_size"],
+            "hash": metadata.get("hash"),
+            "storage": "full",
+            "encrypted_size": metadata.get("encrypted_size"),
+            "current": True
+        })
+        return versions
+
+    def get_version(self, file_id: str, revision: int, master_key: bytes, metadata: dict) -> bytes:
+        """Reconstruct the content of any revision of a file"""
+        current = metadata.get("revision", 0)
+        if revision == current:
+            return self.get_file(file_id, master_key, metadata)
+
+        versions = {v["revision"]: v for v in metadata.get("versions", [])}
+        if revision not in versions:
+            raise ValueError(f" File {file_id} has no revision {revision}")
+
+        file_key = self._unwrap_key(master_key, metadata)
+
+        def load(rev: int) -> bytes:
+            try:
+                encrypted = self.backend.get(self._revision_key(file_id, versions[rev]))
+            except FileNotFoundError:
+                raise FileNotFoundError(f" Revision {rev} of {file_id} not found")
+            checkpoint(len(encrypted))
+            return self.crypto.decrypt_data(encrypted, file_key)
+
+        # Walk forward to the nearest full copy, then apply deltas back down
+        chain = []
+        rev = revision
+        while rev in versions and versions[rev]["storage"] == "delta":
+            chain.append(rev)
+            rev += 1
+        if rev in versions:
+            data = load(rev)
+        elif rev == current:
+            data = self.get_file(file_id, master_key, metadata)
+        else:
+            raise ValueError(f" Revision chain of {file_id} is broken at {rev}")
+
+        for rev in reversed(chain):
+            data = apply_delta(data, load(rev))
+
+        info = versions[revision]
+        if len(data) != info["original_size"] or \
+                self._digest(data, metadata.get("hash_algo", "sha256")) != info["hash"]:
+            raise ValueError(f" Revision {revision} of {file_id} failed verification")
+        return data
+
+    def restore_version(self, file_id: str, revision: int, master_key: bytes, metadata: dict) -> dict:
+        """
+        Make an old revision current again
+        History is kept: the restored content becomes a new revision
+        """
+        data = self.get_version(file_id, revision, master_key, metadata)
+        print(f" Restoring revision {revision}...")
+        return self.update_bytes(file_id, data, master_key, metadata)
+
     def delete_file(self, file_id: str, secure_wipe: bool = False):
         """
         Delete a file from the vault
         """
-        file_path = self.files_path / f"{file_id}.enc"
+        checkpoint()
         
-        if not file_path.exists():
+        if self.cache is not None:
+            self.cache.invalidate(file_id)
+        
+        # Every object of the file goes: current content and older revisions
+        keys = []
+        for entry in self.backend.list(f"encrypted_files/{file_id}."):
+            name = entry["key"].rsplit("/", 1)[-1]
+            owner = split_current(name) or split_revision(name)
+            if owner is not None and owner[0] == file_id:
+                keys.append(entry["key"])
+        
+        if not keys:
             print(f"  File {file_id} not found")
             return
         
         if secure_wipe:
             print(f" Secure deleting {file_id}...")
-            # Overwrite file 3 times with random data
-            file_size = file_path.stat().st_size
-            with open(file_path, 'wb') as f:
-                for i in range(3):
-                    f.write(os.urandom(file_size))
-                    f.flush()
-                    os.fsync(f.fileno())
+            # Overwrite file 3 times with random data, then delete
+            for k in keys:
+                self.backend.wipe(k, passes=3)
         else:
             print(f"  Deleting {file_id}...")
+            for k in keys:
+                self.backend.delete(k)
         
-        # Actually delete the file
-        file_path.unlink()
         print(f" Deleted")
     
+    def _job_size(self, operation: str, args: tuple, kwargs: dict):
+        """Rough bytes an operation will process, for progress and ETA"""
+        if operation == "add_file":
+            return os.path.getsize(kwargs.get("source_path", args[0] if args else ""))
+        if operation == "add_bytes":
+            return len(kwargs.get("file_data", args[0] if args else b""))
+        if operation == "update_bytes":
+            return len(kwargs.get("file_data", args[1] if len(args) > 1 else b""))
+        metadata = kwargs.get("metadata")
+        if metadata is None:
+            metadata = next((a for a in args if isinstance(a, dict)), None)
+        if operation == "read_range":
+            return kwargs.get("length", args[4] if len(args) > 4 else None)
+        return metadata.get("original_size") if metadata else None
+    
+    def submit(self, operation: str, *args, priority: str = None, **kwargs):
+        """
+        Run an operation on the job scheduler instead of the caller's thread
+        operation: Method name such as "get_file", "add_file" or "delete_file"
+        priority: "interactive", "ingest" or "maintenance" (default per operation)
+        Returns a Job: progress(), eta(), cancel(), result()
+        """
+        if operation not in JOB_PRIORITIES:
+            raise ValueError(f" Operation can't be scheduled: {operation}")
+        if self.scheduler is None:
+            self.scheduler = JobScheduler()
+        
+        return self.scheduler.submit(getattr(self, operation), *args,
+                                     priority=priority or JOB_PRIORITIES[operation],
+                                     name=operation, total_bytes=self._job_size(operation, args, kwargs),
+                                     **kwargs)
+    
+    def lock(self):
+        """Forget decrypted content when the vault is locked"""
+        if self.cache is not None:
+            self.cache.clear()
+    
     def get_vault_stats(self) -> dict:
         """Get statistics about files in the vault"""
-        encrypted_files = list(self.files_path.glob("*.enc"))
+        encrypted_files = [o for o in self.backend.list("encrypted_files/") if o["key"].endswith(".enc")]
         
         total_size = 0
         for f in encrypted_files:
-            total_size += f.stat().st_size
+            total_size += f["size"]
         
+        # Revision objects (and superseded current ones) count towards size, not files
+        file_ids = {split_current(f["key"].rsplit("/", 1)[-1]) for f in encrypted_files}
         return {
-            "total_files": len(encrypted_files),
+            "total_files": len({owner[0] for owner in file_ids if owner is not None}),
             "total_size": total_size,
             "vault_path": str(self.files_path)
         }
@@ -172,16 +633,20 @@ class FileManager:
     def list_encrypted_files(self) -> list:
         """List all encrypted files in the vault"""
         files = []
-        for f in self.files_path.glob("*.enc"):
+        for f in self.backend.list("encrypted_files/"):
+            if not f["key"].endswith(".enc") or split_revision(f["key"].rsplit("/", 1)[-1]):
+                continue
             files.append({
-                "filename": f.name,
-                "size": f.stat().st_size,
-                "modified": datetime.fromtimestamp(f.stat().st_mtime).isoformat()
+                "filename": f["key"].rsplit("/", 1)[-1],
+                "size": f["size"],
+                "modified": datetime.fromtimestamp(f["modified"]).isoformat()
             })
         return files
 
+profiling.instrument(FileManager)
+
 # Simple test
 if __name__ == "__main__":
     print(" Quick test of File Manager...")
     fm = FileManager("./test_vault")
-    print(f"Generated file ID example: {fm._generate_file_id()}")
\ No newline at end of file
+    print(f"Generated file ID example: {fm._generate_file_id()}")
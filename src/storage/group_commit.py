@@ -0,0 +1,91 @@
+# src/storage/group_commit.py
+"""
+Group Commit - Share one expensive write/fsync between concurrent callers
+
+Callers submit() a value and wait() for it to be durable. One waiter
+becomes the leader and writes the latest submitted value; everyone who
+submitted before that write started is covered by it. Callers that
+arrive while a write is running simply share the next one, so N
+concurrent saves cost about two writes instead of N.
+
+Only suitable when the newest value supersedes all older ones (a full
+metadata snapshot, or no value at all as for a directory fsync).
+"""
+
+import os
+import time
+import threading
+
+
+def fsync_directory(path):
+    """Make renames/creations in a directory durable"""
+    if os.name == "nt":
+        return  # Directories can't be opened (or fsynced) on Windows
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class GroupCommit:
+    def __init__(self, write, window: float = 0.0):
+        """
+        write: Called with the latest submitted value; must write it durably
+        window: Seconds the leader waits for more callers before writing
+                (0 = only share with callers that arrive during a write)
+        """
+        self.write = write
+        self.window = window
+        self.condition = threading.Condition()
+        self.staged = None
+        self.submitted = 0   # last ticket handed out
+        self.committed = 0   # every ticket up to this one is written
+        self.writing = False
+        self.writes = 0
+
+    def submit(self, value=None) -> int:
+        """Stage a value (replacing any older staged one); returns a ticket"""
+        with self.condition:
+            self.submitted += 1
+            self.staged = value
+            return self.submitted
+
+    def wait(self, ticket: int):
+        """Block until the write covering ticket is done (may do it ourselves)"""
+        with self.condition:
+            while self.committed < ticket:
+                if self.writing:
+                    self.condition.wait()
+                    continue
+
+                # Nobody is writing: lead the next write
+                self.writing = True
+                if self.window:
+                    self.condition.release()
+                    try:
+                        time.sleep(self.window)
+                    finally:
+                        self.condition.acquire()
+                value, covers = self.staged, self.submitted
+                self.staged = None
+
+                self.condition.release()
+                try:
+                    self.write(value)
+                except BaseException:
+                    self.condition.acquire()
+                    self.writing = False
+                    if self.submitted == covers:
+                        self.staged = value  # Let the next waiter retry it
+                    self.condition.notify_all()
+                    raise
+                self.condition.acquire()
+                self.writing = False
+                self.writes += 1
+                self.committed = max(self.committed, covers)
+                self.condition.notify_all()
+
+    def commit(self, value=None):
+        """submit() and wait() in one call"""
+        self.wait(self.submit(value))
@@ -0,0 +1,184 @@
+# src/storage/locking.py
+"""
+Vault Locking - Let several processes use one vault at the same time
+
+Two locks per vault, both flock()ed files under <vault>/locks/:
+    vault.lock     reader/writer lock. Creating the vault holds it
+                   exclusive; unlocking holds it shared while it reads
+                   master_key.enc, so nobody sees a half-made vault.
+    metadata.lock  held exclusive only for the few milliseconds it takes
+                   to read, merge and rewrite metadata.enc.
+
+Metadata saves are optimistic: metadata.enc carries a version counter,
+and each loaded metadata dict remembers the version it came from. A
+save whose version is no longer current is merged entry by entry with
+what is on disk (see merge_metadata) instead of overwriting it; if the
+same entry was changed on both sides the save fails as a conflict.
+File operations take no lock at all: stored objects are never rewritten
+(adds and updates write new names, see versioning), so a file only
+changes when its metadata entry is saved.
+
+Vaults on other backends (memory, S3) and platforms without fcntl only
+get in-process locks, which coordinate threads but not processes.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+LOCK_DIR = "locks"
+
+_registry = {}     # lock key -> _RWLock (in-process fallback)
+_registry_lock = threading.Lock()
+_held = threading.local()  # lock key -> [exclusive, depth] for this thread
+
+
+class LockTimeout(TimeoutError):
+    """A vault lock could not be taken within the timeout"""
+
+
+class _RWLock:
+    """Reader/writer lock between the threads of one process"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = False
+
+    def acquire(self, exclusive: bool, deadline: float = None) -> bool:
+        with self.condition:
+            while self.writer or (exclusive and self.readers):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            if exclusive:
+                self.writer = True
+            else:
+                self.readers += 1
+            return True
+
+    def release(self, exclusive: bool):
+        with self.condition:
+            if exclusive:
+                self.writer = False
+            else:
+                self.readers -= 1
+            self.condition.notify_all()
+
+
+def merge_metadata(base: dict, mine: dict, theirs: dict, conflicts: list = None) -> dict:
+    """
+    Apply the changes that turned base into mine on top of theirs
+    Entries we added or changed win over theirs, except that an entry
+    they deleted stays deleted (its objects are gone); entries we
+    deleted are removed.
+    conflicts: If given, collects IDs of entries both sides changed differently
+    """
+    merged = dict(theirs)
+    for file_id, info in mine.items():
+        if file_id not in base:
+            merged[file_id] = info
+        elif info != base[file_id] and file_id in theirs:
+            if conflicts is not None and theirs[file_id] not in (base[file_id], info):
+                conflicts.append(file_id)
+            merged[file_id] = info
+    for file_id in base:
+        if file_id not in mine:
+            merged.pop(file_id, None)
+    return merged
+
+
+class VaultLocks:
+    def __init__(self, vault_path: str = None, owner=None):
+        """
+        vault_path: Local vault directory (None for in-process locks only)
+        owner: What in-process locks are keyed by when there is no path
+               (e.g. the backend object)
+        """
+        self.directory = os.path.join(vault_path, LOCK_DIR) if vault_path else None
+        self.owner = id(owner) if owner is not None else id(self)
+
+    def _key(self, name: str):
+        if self.directory is not None:
+            return os.path.abspath(os.path.join(self.directory, name))
+        return (self.owner, name)
+
+    @contextmanager
+    def _hold(self, name: str, exclusive: bool, timeout: float):
+        key = self._key(name)
+        held = getattr(_held, "locks", None)
+        if held is None:
+            held = _held.locks = {}
+
+        # Re-entrant within a thread (an exclusive holder may also read)
+        if key in held:
+            if exclusive and not held[key][0]:
+                raise RuntimeError(f" Can't upgrade a shared lock to exclusive: {name}")
+            held[key][1] += 1
+            try:
+                yield
+            finally:
+                held[key][1] -= 1
+            return
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if fcntl is not None and self.directory is not None:
+            release = self._acquire_file(key, exclusive, deadline)
+        else:
+            with _registry_lock:
+                lock = _registry.setdefault(key, _RWLock())
+            if not lock.acquire(exclusive, deadline):
+                raise LockTimeout(f" Timed out waiting for {name}")
+            release = lambda: lock.release(exclusive)
+
+        held[key] = [exclusive, 1]
+        try:
+            yield
+        finally:
+            del held[key]
+            release()
+
+    def _acquire_file(self, path: str, exclusive: bool, deadline: float):
+        os.makedirs(self.directory, exist_ok=True)
+        # A descriptor per holder: flock() then also excludes other threads
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        try:
+            if deadline is None:
+                fcntl.flock(fd, mode)
+            else:
+                while True:
+                    try:
+                        fcntl.flock(fd, mode | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= deadline:
+                            raise LockTimeout(f" Timed out waiting for {os.path.basename(path)}")
+                        time.sleep(0.01)
+        except BaseException:
+            os.close(fd)
+            raise
+
+        def release():
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        return release
+
+    def shared(self, timeout: float = None):
+        """Read the vault's keys while nobody can be creating it"""
+        return self._hold("vault.lock", False, timeout)
+
+    def exclusive(self, timeout: float = None):
+        """Have the vault to ourselves (creating it)"""
+        return self._hold("vault.lock", True, timeout)
+
+    def metadata(self, timeout: float = None):
+        """Serialise read-merge-write cycles of metadata.enc"""
+        return self._hold("metadata.lock", True, timeout)
@@ -0,0 +1,330 @@
+# src/storage/scheduler.py
+"""
+Job Scheduler - Prioritised background execution of vault operations
+
+Jobs run in three classes, highest priority first:
+    interactive  - what a user is waiting for (extracts, reads)
+    ingest       - bulk adds and new versions
+    maintenance  - scrubs, verification and secure wipes
+Each class has its own concurrency limit. While interactive work is
+waiting or running and the recent interactive p99 latency is over
+budget, no new maintenance job starts and running ones pause at their
+next checkpoint.
+
+Long operations call checkpoint(bytes_done) as they go; that is where
+progress is recorded and where cancellation and throttling take effect.
+Outside a scheduled job checkpoint() does nothing.
+"""
+
+import time
+import math
+import heapq
+import threading
+from collections import deque
+
+INTERACTIVE = "interactive"
+INGEST = "ingest"
+MAINTENANCE = "maintenance"
+PRIORITIES = (INTERACTIVE, INGEST, MAINTENANCE)
+
+DEFAULT_LIMITS = {INTERACTIVE: 4, INGEST: 2, MAINTENANCE: 1}
+
+_local = threading.local()
+
+
+class JobCancelled(Exception):
+    """Raised inside a job (and by Job.result) once the job was cancelled"""
+
+
+def current_job():
+    """The Job running on this thread, or None"""
+    return getattr(_local, "job", None)
+
+
+def checkpoint(bytes_done: int = 0, cancellable: bool = True):
+    """
+    Report progress from inside a job; raises JobCancelled if it was cancelled
+    cancellable: False once stopping would leave things half done (the job
+                 then runs to the end, but can still be throttled)
+    """
+    job = current_job()
+    if job is not None:
+        job._checkpoint(bytes_done, cancellable)
+
+
+def bind_job(fn):
+    """
+    Make checkpoints inside fn count towards the current job even when
+    fn runs on another thread (e.g. an operation's own worker pool)
+    """
+    job = current_job()
+    if job is None:
+        return fn
+
+    def bound(*args, **kwargs):
+        previous = current_job()
+        _local.job = job
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.job = previous
+    return bound
+
+
+class Job:
+    """Handle to a submitted operation"""
+
+    def __init__(self, scheduler, fn, args, kwargs, priority: str, name: str, total_bytes: int):
+        self.scheduler = scheduler
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.name = name or getattr(fn, "__name__", "job")
+        self.total_bytes = total_bytes
+        self.bytes_done = 0
+        self.status = "queued"
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self._result = None
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+
+    def __repr__(self) -> str:
+        return f"<Job {self.name} {self.priority} {self.status}>"
+
+    # ---------- caller side ----------
+
+    def cancel(self) -> bool:
+        """
+        Cancel the job: queued jobs never start, running ones stop at
+        their next checkpoint. Returns False if it already finished.
+        """
+        if self._finished.is_set():
+            return False
+        self._cancelled.set()
+        self.scheduler._cancel_queued(self)
+        return True
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._finished.wait(timeout)
+
+    def result(self, timeout: float = None):
+        """Wait for the job and return its result (or raise its error)"""
+        if not self._finished.wait(timeout):
+            raise TimeoutError(f" Job {self.name} still {self.status}")
+        if self.status == "cancelled":
+            raise JobCancelled(f" Job {self.name} was cancelled")
+        if self.error is not None:
+            raise self.error
+        return self._result
+
+    def eta(self):
+        """Seconds left, estimated from the rate so far (None if unknown)"""
+        if self.status != "running" or not self.total_bytes or not self.bytes_done:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        rate = self.bytes_done / elapsed if elapsed > 0 else 0
+        if not rate:
+            return None
+        return max(self.total_bytes - self.bytes_done, 0) / rate
+
+    def progress(self) -> dict:
+        return {
+            "name": self.name,
+            "priority": self.priority,
+            "status": self.status,
+            "bytes_done": self.bytes_done,
+            "total_bytes": self.total_bytes,
+            "fraction": min(self.bytes_done / self.total_bytes, 1.0) if self.total_bytes else None,
+            "eta": self.eta(),
+        }
+
+    # ---------- job side ----------
+
+    def _checkpoint(self, bytes_done: int, cancellable: bool):
+        self.bytes_done += bytes_done
+        if self.priority == MAINTENANCE:
+            # Step aside while interactive work is suffering
+            while self.scheduler.throttled() and not (cancellable and self.cancelled):
+                time.sleep(0.02)
+        if cancellable and self.cancelled:
+            raise JobCancelled(f" Job {self.name} was cancelled")
+
+    def _run(self):
+        self.started_at = time.monotonic()
+        _local.job = self
+        try:
+            if self.cancelled:
+                raise JobCancelled(f" Job {self.name} was cancelled")
+            self._result = self.fn(*self.args, **self.kwargs)
+            self.status = "done"
+        except JobCancelled:
+            self.status = "cancelled"
+        except Exception as e:
+            self.error = e
+            self.status = "failed"
+        finally:
+            _local.job = None
+            self.finished_at = time.monotonic()
+            self._finished.set()
+
+
+class JobScheduler:
+    def __init__(self, max_workers: int = 4, limits: dict = None,
+                 latency_budget: float = 0.5, latency_window: float = 30.0):
+        """
+        max_workers: Jobs running at once across all classes; a free worker
+                     always takes the highest priority job it may run
+        limits: Maximum running jobs per class (see DEFAULT_LIMITS), so
+                background classes can never take every worker
+        latency_budget: Interactive p99 (seconds, queueing included) that
+                        maintenance work must not push us past
+        latency_window: Seconds of interactive latencies the p99 is taken over
+        """
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.latency_budget = latency_budget
+        self.latency_window = latency_window
+
+        self.queue = []  # heap of (class rank, sequence, job)
+        self.sequence = 0
+        self.running = {priority: 0 for priority in PRIORITIES}
+        self.latencies = deque()  # (finished at, seconds) of interactive jobs
+        self.condition = threading.Condition()
+        self.closed = False
+
+        self.workers = [threading.Thread(target=self._worker, daemon=True)
+                        for _ in range(max_workers)]
+        for worker in self.workers:
+            worker.start()
+
+    # ---------- submitting ----------
+
+    def submit(self, fn, *args, priority: str = INTERACTIVE, name: str = None,
+               total_bytes: int = None, **kwargs) -> Job:
+        """Queue fn(*args, **kwargs) and return its Job handle"""
+        if priority not in PRIORITIES:
+            raise ValueError(f" Unknown priority: {priority}")
+
+        job = Job(self, fn, args, kwargs, priority, name, total_bytes)
+        with self.condition:
+            if self.closed:
+                raise RuntimeError(" Scheduler is shut down")
+            self.sequence += 1
+            heapq.heappush(self.queue, (PRIORITIES.index(priority), self.sequence, job))
+            self.condition.notify_all()
+        return job
+
+    def _cancel_queued(self, job: Job):
+        with self.condition:
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = time.monotonic()
+                job._finished.set()
+                self.condition.notify_all()
+
+    # ---------- latency budget ----------
+
+    def _p99_locked(self) -> float:
+        now = time.monotonic()
+        while self.latencies and now - self.latencies[0][0] > self.latency_window:
+            self.latencies.popleft()
+        samples = sorted(latency for _, latency in self.latencies)
+        if not samples:
+            return 0.0
+        return samples[max(1, math.ceil(0.99 * len(samples))) - 1]
+
+    def _throttled_locked(self) -> bool:
+        # Only hold back while there is interactive work that could suffer
+        busy = self.running[INTERACTIVE] or any(
+            job.priority == INTERACTIVE and job.status == "queued" for _, _, job in self.queue)
+        return bool(busy) and self._p99_locked() > self.latency_budget
+
+    def interactive_p99(self) -> float:
+        """p99 of recent interactive job latencies, queueing included (0 with no samples)"""
+        with self.condition:
+            return self._p99_locked()
+
+    def throttled(self) -> bool:
+        """True while maintenance should hold off"""
+        with self.condition:
+            return self._throttled_locked()
+
+    # ---------- workers ----------
+
+    def _next_job(self, throttled: bool):
+        """Highest priority queued job whose class has a free slot"""
+        skipped = []
+        job = None
+        while self.queue:
+            entry = heapq.heappop(self.queue)
+            candidate = entry[2]
+            if candidate.status == "cancelled":
+                continue
+            priority = candidate.priority
+            if self.running[priority] >= self.limits[priority] or (priority == MAINTENANCE and throttled):
+                skipped.append(entry)
+                continue
+            job = candidate
+            break
+        for entry in skipped:
+            heapq.heappush(self.queue, entry)
+        return job
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                job = self._next_job(self._throttled_locked())
+                while job is None:
+                    if self.closed and not self.queue:
+                        return
+                    # Time out now and then: the throttle lifts as samples age out
+                    self.condition.wait(0.1)
+                    job = self._next_job(self._throttled_locked())
+                self.running[job.priority] += 1
+                job.status = "running"
+
+            job._run()
+
+            with self.condition:
+                self.running[job.priority] -= 1
+                if job.priority == INTERACTIVE:
+                    self.latencies.append((job.finished_at, job.finished_at - job.submitted_at))
+                self.condition.notify_all()
+
+    def get_stats(self) -> dict:
+        with self.condition:
+            queued = {priority: 0 for priority in PRIORITIES}
+            for _, _, job in self.queue:
+                if job.status == "queued":
+                    queued[job.priority] += 1
+            running = dict(self.running)
+            p99 = self._p99_locked()
+            throttled = self._throttled_locked()
+        return {"queued": queued, "running": running, "interactive_p99": p99,
+                "latency_budget": self.latency_budget, "throttled": throttled}
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """Stop accepting jobs; optionally cancel what hasn't started"""
+        with self.condition:
+            self.closed = True
+            if cancel_pending:
+                for _, _, job in self.queue:
+                    job._cancelled.set()
+                    if job.status == "queued":
+                        job.status = "cancelled"
+                        job._finished.set()
+                self.queue = []
+            self.condition.notify_all()
+        if wait:
+            for worker in self.workers:
+                worker.join()
@@ -0,0 +1,210 @@
+# src/storage/scrub.py
+"""
+Vault Scrubber - Verifies every stored file for bit rot and orphans
+"""
+
+import json
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.storage.versioning import split_revision
+from src.storage.scheduler import checkpoint, bind_job
+
+CHECKPOINT_NAME = "scrub_checkpoint.json"
+
+
+class RateLimiter:
+    """Token bucket limiting how many bytes per second the scrub may read"""
+
+    def __init__(self, bytes_per_second: int = None):
+        self.rate = bytes_per_second
+        self.allowance = float(bytes_per_second or 0)
+        self.last_check = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, num_bytes: int):
+        """Block until num_bytes may be read (no-op when unlimited)"""
+        if not self.rate:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(self.rate, self.allowance + (now - self.last_check) * self.rate)
+            self.last_check = now
+            self.allowance -= num_bytes
+            # Going negative means we borrowed from the future - pay it back
+            wait = -self.allowance / self.rate if self.allowance < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class VaultScrubber:
+    def __init__(self, file_manager, max_workers: int = 4,
+                 rate_limit: int = None, checkpoint_every: int = 100):
+        """
+        file_manager: FileManager of the vault to scrub
+        max_workers: Number of files verified in parallel
+        rate_limit: Maximum bytes read per second (None = unlimited)
+        checkpoint_every: Save progress after this many verified files
+        """
+        self.fm = file_manager
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate_limit)
+        self.checkpoint_every = checkpoint_every
+        self.backend = self.fm.backend
+
+    def _fingerprint(self, file_id: str, info: dict) -> list:
+        """What a result was checked against: the object's name and the content hash"""
+        return [self._name(self.fm._object_key(file_id, info)), info.get("hash")]
+
+    def _load_checkpoint(self, metadata: dict = None) -> dict:
+        """
+        Return results of a previous interrupted scrub
+        Given metadata, only those for entries unchanged since they were checked
+        """
+        try:
+            saved = json.loads(self.backend.get(CHECKPOINT_NAME))
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError):
+            # A damaged checkpoint only costs us a full rescan
+            return {}
+        results = saved.get("results", {})
+        if metadata is None:
+            return results
+        checked = saved.get("checked", {})
+        return {file_id: status for file_id, status in results.items()
+                if file_id in metadata and checked.get(file_id) == self._fingerprint(file_id, metadata[file_id])}
+
+    def _save_checkpoint(self, results: dict, metadata: dict = None):
+        """Write progress so an interrupted scrub can resume"""
+        checkpoint = {"saved_at": datetime.now().isoformat(), "results": results}
+        if metadata is not None:
+            checkpoint["checked"] = {file_id: self._fingerprint(file_id, metadata[file_id])
+                                     for file_id in results if file_id in metadata}
+        self.backend.put(CHECKPOINT_NAME, json.dumps(checkpoint).encode())
+
+    def _scan_objects(self) -> tuple:
+        """
+        List encrypted objects in storage once, by name without ".enc"
+        Returns (current objects -> size, revision objects -> size)
+        """
+        objects, revisions = {}, {}
+        for entry in self.backend.list("encrypted_files/"):
+            name = entry["key"].rsplit("/", 1)[-1]
+            if split_revision(name) is not None:
+                revisions[name[:-4]] = entry["size"]
+            elif name.endswith(".enc"):
+                objects[name[:-4]] = entry["size"]
+        return objects, revisions
+
+    def _name(self, key: str) -> str:
+        """encrypted_files/<name>.enc -> <name>, as listed by _scan_objects"""
+        return key.rsplit("/", 1)[-1][:-4]
+
+    def _revisions_intact(self, file_id: str, info: dict, stored: dict) -> bool:
+        """Every older revision of a file is stored with its recorded size"""
+        for version in info.get("versions", []):
+            size = stored.get(self._name(self.fm._revision_key(file_id, version)))
+            if size is None or size != version["encrypted_size"]:
+                return False
+        return True
+
+    def _verify_one(self, file_id: str, info: dict, master_key: bytes) -> str:
+        """Read (rate limited) and verify one object, return its status"""
+        try:
+            self.limiter.consume(info.get("encrypted_size", 0))
+            encrypted_data = self.backend.get(self.fm._object_key(file_id, info))
+        except FileNotFoundError:
+            return "missing"
+        checkpoint(len(encrypted_data))
+
+        if self.fm.verify_file(file_id, master_key, info, encrypted_data):
+            return "ok"
+        return "corrupt"
+
+    def scrub(self, metadata: dict, master_key: bytes, resume: bool = True) -> dict:
+        """
+        Verify every file in the vault
+        Returns report with ok/corrupt/missing/orphaned file IDs
+        """
+        print(" Scrubbing vault...")
+
+        # Files updated since their result was saved are checked again
+        results = self._load_checkpoint(metadata) if resume else {}
+        if results:
+            print(f"   Resuming: {len(results):,} files already checked")
+
+        # Cross-check metadata against encrypted_files/ in one pass
+        on_disk, revisions = self._scan_objects()
+        current = {file_id: self._name(self.fm._object_key(file_id, info))
+                   for file_id, info in metadata.items()}
+        # A full snapshot may be a formerly current object, so look in both
+        stored = {**revisions, **on_disk}
+        used = set(current.values())
+        used.update(self._name(self.fm._revision_key(file_id, v))
+                    for file_id, info in metadata.items() for v in info.get("versions", []))
+        # Superseded objects waiting out their grace period aren't orphans yet
+        used.update(s["object"][:-4] for info in metadata.values() for s in info.get("superseded", []))
+        orphaned = sorted(set(on_disk) - used) + sorted(set(revisions) - used)
+
+        pending = []
+        for file_id, info in metadata.items():
+            if file_id in results:
+                continue
+            if current[file_id] not in on_disk:
+                results[file_id] = "missing"
+            elif "encrypted_size" in info and on_disk[current[file_id]] != info["encrypted_size"]:
+                # Wrong size is corrupt without reading a byte
+                results[file_id] = "corrupt"
+            elif not self._revisions_intact(file_id, info, stored):
+                # Lost or truncated history
+                results[file_id] = "corrupt"
+            else:
+                pending.append(file_id)
+
+        print(f"   Verifying {len(pending):,} files with {self.max_workers} workers")
+
+        done_since_checkpoint = 0
+        # Progress and cancellation reach a scheduled scrub from the worker threads too
+        verify = bind_job(self._verify_one)
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = {}
+        try:
+            futures = {
+                pool.submit(verify, file_id, metadata[file_id], master_key): file_id
+                for file_id in pending
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                done_since_checkpoint += 1
+                if done_since_checkpoint >= self.checkpoint_every:
+                    self._save_checkpoint(results, metadata)
+                    done_since_checkpoint = 0
+        except BaseException:
+            # Interrupted (Ctrl+C etc.) - drop queued work instead of finishing it,
+            # keep whatever completed for next time
+            pool.shutdown(wait=False, cancel_futures=True)
+            for future, file_id in futures.items():
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    results[file_id] = future.result()
+            self._save_checkpoint(results, metadata)
+            raise
+        pool.shutdown()
+
+        if self.backend.exists(CHECKPOINT_NAME):
+            self.backend.delete(CHECKPOINT_NAME)
+
+        report = {"ok": [], "corrupt": [], "missing": [], "orphaned": orphaned}
+        for file_id, status in results.items():
+            if file_id in metadata:
+                report[status].append(file_id)
+
+        print(f" Scrub finished: {len(report['ok']):,} ok, "
+              f"{len(report['corrupt']):,} corrupt, "
+              f"{len(report['missing']):,} missing, "
+              f"{len(report['orphaned']):,} orphaned")
+        return report
@@ -0,0 +1,249 @@
+# src/storage/search_index.py
+"""
+Search Index - Encrypted filename index for fast prefix/substring lookups
+
+Names are split into trigrams ("^" and "$" mark start and end) and each
+trigram is stored as a keyed hash token, so the posting lists alone
+reveal nothing about names. At rest the index is encrypted with the KEK:
+a snapshot in search_index.enc plus small change logs under
+search_index/, one per save, so saving costs the size of the changes,
+not of the index. Once the logs add up to a quarter of the index (and
+at least COMPACT_MIN_CHANGES) a save folds them into a new snapshot.
+
+Processes that never load the index (the CLI) only append logs. The
+index is derived from metadata, so anything lost when two processes
+compact at once is put back by sync().
+"""
+
+import re
+import hmac
+import json
+import time
+import uuid
+import hashlib
+import fnmatch
+import threading
+from datetime import datetime
+
+from src.crypto.engine import CryptoEngine
+
+INDEX_KEY = "search_index.enc"
+LOG_PREFIX = "search_index/"
+GRAM_SIZE = 3
+COMPACT_MIN_CHANGES = 1000
+
+
+def _grams(text: str) -> set:
+    """Trigrams of an anchored, lowercased string"""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class SearchIndex:
+    def __init__(self, backend, kek: bytes, crypto=None):
+        """
+        backend: StorageBackend holding the vault
+        kek: Vault KEK (encrypts the index and keys the tokens)
+        """
+        self.backend = backend
+        self.kek = kek
+        self.crypto = crypto or CryptoEngine()
+        # Separate key so tokens can't be linked to anything else keyed by the KEK
+        self.token_key = hmac.new(kek, b"vault-search-index", hashlib.sha256).digest()
+        self.records = {}   # file_id -> [name, file_type, size, created_at]
+        self.postings = {}  # token -> set of file_ids
+        self.pending = []   # changes since the last save: ["add", id, record] / ["remove", id]
+        self.loaded = False      # records reflect everything stored (safe to snapshot)
+        self.has_snapshot = False
+        self.log_keys = []       # change logs applied on top of the snapshot
+        self.log_changes = 0
+        self.lock = threading.Lock()
+
+    def _token(self, gram: str) -> str:
+        return hmac.new(self.token_key, gram.encode(), hashlib.sha256).hexdigest()[:24]
+
+    def _tokens(self, name: str) -> set:
+        return {self._token(g) for g in _grams("^" + name.lower() + "$")}
+
+    # ---------- persistence ----------
+
+    def _decrypt(self, key: str):
+        return json.loads(self.crypto.decrypt_data(self.backend.get(key), self.kek).decode())
+
+    def _encrypt(self, value) -> bytes:
+        return self.crypto.encrypt_data(json.dumps(value, separators=(",", ":")).encode(), self.kek)
+
+    def load(self) -> bool:
+        """Load the snapshot and replay change logs, returns False if there is none yet"""
+        try:
+            data = self._decrypt(INDEX_KEY)
+            self.has_snapshot = True
+        except FileNotFoundError:
+            data = {"records": {}, "postings": {}}
+            self.has_snapshot = False
+        folded = set(data.get("logs", []))
+        # Names start with a timestamp, so sorting replays them in order
+        log_keys = sorted(entry["key"] for entry in self.backend.list(LOG_PREFIX)
+                          if entry["key"].endswith(".enc") and entry["key"] not in folded)
+
+        with self.lock:
+            self.records = data["records"]
+            self.postings = {token: set(ids) for token, ids in data["postings"].items()}
+            self.log_keys, self.log_changes = [], 0
+            for key in log_keys:
+                try:
+                    changes = self._decrypt(key)
+                except FileNotFoundError:
+                    continue  # Folded into a snapshot by someone else meanwhile
+                for change in changes:
+                    self._apply_locked(change)
+                self.log_keys.append(key)
+                self.log_changes += len(changes)
+            self.pending = []
+            self.loaded = True
+        return self.has_snapshot or bool(log_keys)
+
+    def save(self):
+        """Store changes since the last save (or a fresh snapshot once logs pile up)"""
+        with self.lock:
+            if not self.pending:
+                return
+            compact = self.loaded and (not self.has_snapshot or self.log_changes + len(self.pending) >=
+                                       max(COMPACT_MIN_CHANGES, len(self.records) // 4))
+            if not compact:
+                key = f"{LOG_PREFIX}{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.enc"
+                self.backend.put(key, self._encrypt(self.pending))
+                self.log_keys.append(key)
+                self.log_changes += len(self.pending)
+                self.pending = []
+                return
+
+            data = {
+                "records": self.records,
+                "postings": {token: sorted(ids) for token, ids in self.postings.items()},
+                "logs": self.log_keys,
+            }
+            folded, self.log_keys, self.log_changes, self.pending = self.log_keys, [], 0, []
+            self.backend.put(INDEX_KEY, self._encrypt(data))
+            self.has_snapshot = True
+        for key in folded:
+            try:
+                self.backend.delete(key)
+            except FileNotFoundError:
+                pass
+
+    # ---------- updates ----------
+
+    def _apply_locked(self, change: list):
+        if change[0] == "add":
+            _, file_id, record = change
+            self._remove_locked(file_id)
+            self.records[file_id] = record
+            for token in self._tokens(record[0]):
+                self.postings.setdefault(token, set()).add(file_id)
+        else:
+            self._remove_locked(change[1])
+
+    def _remove_locked(self, file_id: str):
+        record = self.records.pop(file_id, None)
+        if record is None:
+            return
+        for token in self._tokens(record[0]):
+            ids = self.postings.get(token)
+            if ids is not None:
+                ids.discard(file_id)
+                if not ids:
+                    del self.postings[token]
+
+    def add(self, file_id: str, info: dict):
+        """Index one metadata entry (replaces any previous entry for file_id)"""
+        record = [info.get("original_name", ""), info.get("file_type", ""),
+                  info.get("original_size", 0), info.get("created_at", "")]
+        with self.lock:
+            self._apply_locked(["add", file_id, record])
+            self.pending.append(["add", file_id, record])
+
+    def remove(self, file_id: str):
+        """Drop one entry from the index"""
+        with self.lock:
+            self._remove_locked(file_id)
+            self.pending.append(["remove", file_id])
+
+    def sync(self, metadata: dict) -> bool:
+        """Bring the index in line with metadata, returns True if anything changed"""
+        with self.lock:
+            stale = set(self.records) - set(metadata)
+            missing = set(metadata) - set(self.records)
+        for file_id in stale:
+            self.remove(file_id)
+        for file_id in missing:
+            self.add(file_id, metadata[file_id])
+        return bool(stale or missing)
+
+    # ---------- queries ----------
+
+    def _candidates(self, pattern: str):
+        """File IDs that contain every trigram of the pattern (None = can't narrow)"""
+        anchored = ("" if pattern.startswith("*") else "^") + pattern + ("" if pattern.endswith("*") else "$")
+        tokens = set()
+        # Only literal runs between wildcards can be looked up
+        for literal in re.split(r"\[[^\]]*\]|[*?]", anchored):
+            tokens |= {self._token(g) for g in _grams(literal)}
+        if not tokens:
+            return None
+
+        # Intersect smallest posting lists first
+        lists = sorted((self.postings.get(t, set()) for t in tokens), key=len)
+        result = set(lists[0])
+        for ids in lists[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    def find(self, name_pattern: str = None, file_type: str = None,
+             min_size: int = None, max_size: int = None,
+             created_after=None, created_before=None) -> list:
+        """
+        Search the vault by name and attributes
+        name_pattern: "report" (substring), "report*" (prefix), "*.pdf" (suffix),
+                      or any glob with * and ?; case-insensitive
+        file_type: Extension such as ".pdf"
+        created_after / created_before: datetime or ISO string
+        """
+        if isinstance(created_after, datetime):
+            created_after = created_after.isoformat()
+        if isinstance(created_before, datetime):
+            created_before = created_before.isoformat()
+
+        pattern = match = None
+        if name_pattern:
+            pattern = match = name_pattern.lower()
+            if "*" not in pattern and "?" not in pattern:
+                pattern = f"*{pattern}*"
+                # Plain text: "[" is part of the name, not a character class
+                match = "*" + pattern[1:-1].replace("[", "[[]") + "*"
+
+        with self.lock:
+            candidates = self._candidates(pattern) if pattern else None
+            ids = self.records.keys() if candidates is None else candidates
+
+            results = []
+            for file_id in ids:
+                name, ftype, size, created = self.records[file_id]
+                if match and not fnmatch.fnmatchcase(name.lower(), match):
+                    continue
+                if file_type is not None and ftype != file_type.lower():
+                    continue
+                if min_size is not None and size < min_size:
+                    continue
+                if max_size is not None and size > max_size:
+                    continue
+                if created_after is not None and created < created_after:
+                    continue
+                if created_before is not None and created > created_before:
+                    continue
+                results.append({"file_id": file_id, "original_name": name, "file_type": ftype,
+                                "original_size": size, "created_at": created})
+
+        results.sort(key=lambda r: r["original_name"].lower())
+        return results
@@ -0,0 +1,135 @@
+# src/storage/vault_file.py
+"""
+Vault File - Seekable file object over an encrypted vault entry
+"""
+
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class VaultFile(io.RawIOBase):
+    """
+    Read-only raw file that decrypts one chunk at a time.
+    Sequential reads prefetch the next chunks on a background thread;
+    every chunk is checked against its Merkle leaf before it is returned.
+    Use FileManager.open() rather than creating this directly.
+    """
+
+    def __init__(self, file_manager, file_id: str, master_key: bytes, metadata: dict,
+                 read_ahead: int = 2):
+        super().__init__()
+        self.executor = None
+        self.fm = file_manager
+        self.file_id = file_id
+        self.metadata = metadata
+        self.size = metadata["original_size"]
+        self.pos = 0
+        self.read_ahead = read_ahead
+
+        self.chunked = "chunk_hashes" in metadata
+        if self.chunked:
+            self.fm._check_merkle_root(file_id, metadata)
+            self.chunk_size = metadata["chunk_size"]
+            self.file_key = self.fm._unwrap_key(master_key, metadata)
+        else:
+            # Older entries can only be decrypted as a whole: one big "chunk"
+            self.chunk_size = max(self.size, 1)
+            self.master_key = master_key
+
+        self.current_index = None
+        self.current_chunk = b""
+        self.last_index = None
+        self.prefetched = {}  # chunk index -> Future
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1) if read_ahead > 0 and self.chunked else None
+
+    @property
+    def name(self) -> str:
+        return self.metadata.get("original_name", self.file_id)
+
+    # ---------- chunk loading ----------
+
+    def _load(self, index: int) -> bytes:
+        if self.chunked:
+            return self.fm._load_chunk(self.file_id, self.metadata, self.file_key, index)
+        return self.fm.get_file(self.file_id, self.master_key, self.metadata)
+
+    def _prefetch(self, index: int):
+        """Queue the chunks after index for background decryption"""
+        last_chunk = (self.size - 1) // self.chunk_size
+        with self.lock:
+            for ahead in range(index + 1, min(index + self.read_ahead, last_chunk) + 1):
+                if ahead not in self.prefetched:
+                    self.prefetched[ahead] = self.executor.submit(self._load, ahead)
+
+    def _chunk(self, index: int) -> bytes:
+        if index == self.current_index:
+            return self.current_chunk
+
+        with self.lock:
+            future = self.prefetched.pop(index, None)
+            # Prefetches behind us (or far ahead after a seek) are wasted work
+            for stale in [i for i in self.prefetched if i < index or i > index + self.read_ahead]:
+                self.prefetched.pop(stale).cancel()
+
+        data = future.result() if future is not None else self._load(index)
+        self.current_index, self.current_chunk = index, data
+
+        sequential = self.last_index is None or index == self.last_index + 1
+        self.last_index = index
+        if self.executor is not None and sequential:
+            self._prefetch(index)
+        return data
+
+    # ---------- io.RawIOBase ----------
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+        if self.pos >= self.size:
+            return 0
+
+        index = self.pos // self.chunk_size
+        data = self._chunk(index)
+        offset = self.pos - index * self.chunk_size
+        count = min(len(buffer), len(data) - offset)
+
+        buffer[:count] = data[offset:offset + count]
+        self.pos += count
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.pos + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self.pos = position
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def close(self):
+        if not self.closed:
+            if self.executor is not None:
+                with self.lock:
+                    for future in self.prefetched.values():
+                        future.cancel()
+                    self.prefetched.clear()
+                self.executor.shutdown(wait=True)
+            self.current_chunk = b""
+        super().close()
@@ -0,0 +1,184 @@
+# src/storage/versioning.py
+"""
+Versioning - Binary deltas between file revisions
+
+Deltas are rsync style: the base is cut into fixed blocks indexed by a
+weak rolling checksum (Adler-32) plus a strong hash, and the target is
+scanned one byte at a time for blocks the base already has. The result
+is a list of COPY (offset, length from the base) and INSERT (literal
+bytes) operations.
+
+FileManager keeps the current content of a file as a normal full object
+and stores older revisions as encrypted_files/<file_id>.r<N>-<tag>.enc, each
+a delta against the next newer revision, or a full snapshot every
+SNAPSHOT_EVERY revisions so restoring never walks a long chain.
+
+Objects are never overwritten: an update writes the new content as
+<file_id>.v<N>-<tag>.enc (tag random per update) and the metadata entry
+names the object that is current, so saving metadata is what switches
+the file over. A superseded current object either stays on as the full
+snapshot of its revision or is pruned once the new entry is saved.
+"""
+
+import re
+import zlib
+import struct
+import hashlib
+
+DELTA_MAGIC = b"VDELTA1\x00"
+DELTA_BLOCK_SIZE = 4096
+SNAPSHOT_EVERY = 10
+
+OP_COPY = 1     # >QI: base offset, length
+OP_INSERT = 2   # >I: length, then the literal bytes
+
+# Start of the target scanned without a single block match before giving up
+NO_MATCH_LIMIT = 256 * 1024
+
+ADLER_MOD = 65521
+REVISION_NAME = re.compile(r"^(?P<file_id>[0-9a-f]+)\.r(?P<revision>\d+)(?:-[0-9a-f]+)?\.enc$")
+CURRENT_NAME = re.compile(r"^(?P<file_id>[0-9a-f]+)(?:\.v(?P<revision>\d+)-[0-9a-f]+)?\.enc$")
+
+
+def split_revision(name: str):
+    """'<id>.r3-<tag>.enc' -> ('<id>', 3); None for anything that isn't a revision object"""
+    match = REVISION_NAME.match(name)
+    if match is None:
+        return None
+    return match.group("file_id"), int(match.group("revision"))
+
+
+def split_current(name: str):
+    """'<id>.enc' -> ('<id>', 0), '<id>.v4-<tag>.enc' -> ('<id>', 4); None for anything else"""
+    match = CURRENT_NAME.match(name)
+    if match is None:
+        return None
+    return match.group("file_id"), int(match.group("revision") or 0)
+
+
+def _strong(block: bytes) -> bytes:
+    return hashlib.blake2b(block, digest_size=16).digest()
+
+
+def _roll(weak: int, out_byte: int, in_byte: int, block_size: int) -> int:
+    """Slide an Adler-32 checksum one byte to the right"""
+    a = ((weak & 0xFFFF) - out_byte + in_byte) % ADLER_MOD
+    b = ((weak >> 16) - block_size * out_byte + a - 1) % ADLER_MOD
+    return (b << 16) | a
+
+
+class _DeltaWriter:
+    """Collects operations, merging neighbouring copies"""
+
+    def __init__(self, target_size: int, max_size: int = None):
+        self.out = bytearray(DELTA_MAGIC + struct.pack(">Q", target_size))
+        self.copy_offset = None
+        self.copy_length = 0
+        self.max_size = max_size
+
+    def _flush_copy(self):
+        if self.copy_offset is not None:
+            self.out += struct.pack(">BQI", OP_COPY, self.copy_offset, self.copy_length)
+            self.copy_offset = None
+
+    def copy(self, offset: int, length: int):
+        if self.copy_offset is not None and self.copy_offset + self.copy_length == offset:
+            self.copy_length += length
+            return
+        self._flush_copy()
+        self.copy_offset, self.copy_length = offset, length
+
+    def insert(self, data: bytes):
+        if data:
+            self._flush_copy()
+            self.out += struct.pack(">BI", OP_INSERT, len(data)) + data
+
+    def too_big(self) -> bool:
+        return self.max_size is not None and len(self.out) > self.max_size
+
+    def finish(self) -> bytes:
+        self._flush_copy()
+        return bytes(self.out)
+
+
+def make_delta(base: bytes, target: bytes, block_size: int = DELTA_BLOCK_SIZE,
+               max_size: int = None):
+    """
+    Encode target as operations against base
+    max_size: Give up (return None) once the delta grows past this many bytes,
+              e.g. when the content changed too much for a delta to pay off;
+              also when the first NO_MATCH_LIMIT bytes of target match nothing
+    """
+    writer = _DeltaWriter(len(target), max_size)
+
+    # Index the base's aligned blocks: weak checksum -> {strong hash: offset}
+    table = {}
+    for offset in range(0, len(base) - block_size + 1, block_size):
+        block = base[offset:offset + block_size]
+        table.setdefault(zlib.adler32(block), {}).setdefault(_strong(block), offset)
+
+    pos = literal_start = 0
+    weak = None
+    end = len(target) - block_size
+    while table and pos <= end:
+        if weak is None:
+            weak = zlib.adler32(target[pos:pos + block_size])
+
+        candidates = table.get(weak)
+        if candidates is not None:
+            offset = candidates.get(_strong(target[pos:pos + block_size]))
+            if offset is not None:
+                writer.insert(target[literal_start:pos])
+                writer.copy(offset, block_size)
+                pos += block_size
+                literal_start = pos
+                weak = None
+                if writer.too_big():
+                    return None
+                continue
+
+        # No match here - slide the window one byte
+        if pos < end:
+            weak = _roll(weak, target[pos], target[pos + block_size], block_size)
+        pos += 1
+        if max_size is not None and (pos - literal_start > max_size or
+                                     (literal_start == 0 and pos > NO_MATCH_LIMIT)):
+            # Unrelated content: stop before scanning it all byte by byte
+            return None
+
+    writer.insert(target[literal_start:])
+    if writer.too_big():
+        return None
+    return writer.finish()
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Rebuild the target from base and a delta made by make_delta"""
+    if not delta.startswith(DELTA_MAGIC):
+        raise ValueError(" Not a vault delta")
+
+    pos = len(DELTA_MAGIC)
+    (target_size,) = struct.unpack_from(">Q", delta, pos)
+    pos += 8
+
+    parts = []
+    while pos < len(delta):
+        op = delta[pos]
+        if op == OP_COPY:
+            offset, length = struct.unpack_from(">QI", delta, pos + 1)
+            pos += 13
+            if offset + length > len(base):
+                raise ValueError(" Delta copies past the end of its base")
+            parts.append(base[offset:offset + length])
+        elif op == OP_INSERT:
+            (length,) = struct.unpack_from(">I", delta, pos + 1)
+            pos += 5
+            parts.append(delta[pos:pos + length])
+            pos += length
+        else:
+            raise ValueError(f" Unknown delta operation {op}")
+
+    target = b"".join(parts)
+    if len(target) != target_size:
+        raise ValueError(" Delta produced the wrong size")
+    return target
@@ -0,0 +1,406 @@
+# src/storage/watcher.py
+"""
+Folder Watcher - Automatically ingests files dropped into staging folders
+
+Folders are rescanned every poll interval (inotify, when the optional
+inotify_simple package is installed, only wakes the scan up earlier).
+A file is taken once its size and mtime have stayed the same for
+settle_time seconds, encrypted on a worker pool, and its metadata is
+committed together with other new files in one metadata save. Originals
+are only removed after the commit that records them.
+
+    python -m src.storage.watcher ./staging --remove-originals
+"""
+
+import os
+import sys
+import time
+import fnmatch
+import getpass
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.crypto.engine import CryptoEngine
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.storage.backends import LocalBackend
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+# Hidden files and common "still downloading" names are never ingested
+DEFAULT_IGNORE = (".*", "*.tmp", "*.part", "*.crdownload", "*~")
+
+
+class FolderWatcher:
+    def __init__(self, key_manager, file_manager, kek: bytes, directories: list,
+                 poll_interval: float = 1.0, settle_time: float = 2.0, max_workers: int = 4,
+                 batch_size: int = 200, commit_interval: float = 2.0,
+                 remove_originals: bool = False, secure_remove: bool = True,
+                 recursive: bool = True, ignore: tuple = DEFAULT_IGNORE, search_index=None):
+        """
+        directories: Staging folders to watch
+        settle_time: Seconds a file's size and mtime must stay unchanged before ingest
+        max_workers: Files encrypted in parallel
+        batch_size / commit_interval: Save metadata after this many new files,
+                                      or when the oldest unsaved one is this old
+        remove_originals: Delete plaintext files once they are committed
+        secure_remove: Overwrite originals before deleting them
+        search_index: Optional SearchIndex kept up to date with each commit
+        """
+        self.km = key_manager
+        self.fm = file_manager
+        self.kek = kek
+        self.directories = [Path(d) for d in directories]
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.remove_originals = remove_originals
+        self.secure_remove = secure_remove
+        self.recursive = recursive
+        self.ignore = ignore
+        self.search_index = search_index
+
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.metadata = self.km.load_metadata(kek)
+        self.pending = {}      # path -> ((size, mtime_ns), first seen with that signature)
+        self.in_flight = set()
+        self.uncommitted = []  # (path, signature, metadata entry), oldest first
+        self.oldest_uncommitted = None
+        self.failed = {}       # path -> signature that failed (retried once it changes)
+
+        # path -> (signature, file_id) of files already in the vault;
+        # a later change to one of them is saved as a new version
+        self.ingested = {}
+        for file_id, info in self.metadata.items():
+            path = Path(info.get("original_path", "")) / info.get("original_name", "")
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            # Changed while we were not running: no signature, so the next
+            # scan saves it as a new version of this entry
+            signature = (stat.st_size, stat.st_mtime_ns) if self._unchanged(path, stat, info) else None
+            self.ingested[str(path)] = (signature, file_id)
+
+        self.started_at = time.monotonic()
+        self.recent = deque()  # (time, bytes) of ingests in the last minute
+        self.stats = {"files_ingested": 0, "bytes_ingested": 0, "versions_saved": 0,
+                      "failed": 0, "commits": 0, "originals_removed": 0, "errors": 0}
+
+        self.inotify = None
+        self.watched = set()
+        if INotify is not None:
+            self.inotify = INotify()
+
+    def _unchanged(self, path: Path, stat, info: dict) -> bool:
+        """Whether a file on disk still holds the content its entry recorded"""
+        if stat.st_size != info.get("original_size"):
+            return False
+        saved_at = info.get("modified_at") or info.get("created_at")
+        try:
+            if saved_at and datetime.fromtimestamp(stat.st_mtime) <= datetime.fromisoformat(saved_at):
+                return True  # Not touched since it was saved
+        except ValueError:
+            pass
+        # Same size but written since (or no time recorded): compare content
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return False
+        return self.fm._digest(data, info.get("hash_algo", "sha256")) == info.get("hash")
+
+    # ---------- scanning ----------
+
+    def _ignored(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.ignore)
+
+    def _watch(self, directory: str):
+        if self.inotify is not None and directory not in self.watched:
+            mask = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE
+            try:
+                self.inotify.add_watch(directory, mask)
+                self.watched.add(directory)
+            except OSError:
+                pass
+
+    def _walk(self, directory: str):
+        """Yield (path, stat) for every candidate file under directory"""
+        self._watch(directory)
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            if self._ignored(entry.name):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if self.recursive:
+                        yield from self._walk(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path, entry.stat()
+            except OSError:
+                continue  # Vanished while we looked
+
+    def scan(self):
+        """One pass over the folders: debounce and queue settled files"""
+        now = time.monotonic()
+        found = set()
+        settled = []
+        for directory in self.directories:
+            for path, stat in self._walk(str(directory)):
+                found.add(path)
+                signature = (stat.st_size, stat.st_mtime_ns)
+                with self.lock:
+                    if path in self.in_flight:
+                        continue
+                    if self.ingested.get(path, (None,))[0] == signature or self.failed.get(path) == signature:
+                        continue
+
+                    seen = self.pending.get(path)
+                    if seen is None or seen[0] != signature:
+                        # New, or still being written
+                        self.pending[path] = (signature, now)
+                    elif now - seen[1] >= self.settle_time:
+                        del self.pending[path]
+                        self.in_flight.add(path)
+                        settled.append((path, signature))
+
+        with self.lock:
+            for path in set(self.pending) - found:
+                del self.pending[path]
+
+        # Outside the lock: a callback may run right away in this thread
+        for path, signature in settled:
+            future = self.pool.submit(self._ingest, path, signature)
+            future.add_done_callback(lambda f, p=path, s=signature: self._ingested(p, s, f))
+
+    # ---------- ingest ----------
+
+    def _ingest(self, path: str, signature: tuple) -> dict:
+        """Encrypt one settled file (runs on the worker pool)"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) != signature:
+            return None  # Changed while we read it - debounce again
+
+        source = Path(path)
+        with self.lock:
+            previous = self.ingested.get(path)
+            previous_info = self.metadata.get(previous[1]) if previous else None
+        if previous_info is not None:
+            return self.fm.update_bytes(previous_info["file_id"], data, self.kek,
+                                        previous_info, str(source.parent))
+        return self.fm.add_bytes(data, source.name, self.kek, str(source.parent))
+
+    def _ingested(self, path: str, signature: tuple, future):
+        with self.lock:
+            self.in_flight.discard(path)
+            try:
+                info = future.result()
+            except Exception as e:
+                print(f" Could not ingest {path}: {e}")
+                self.failed[path] = signature
+                self.stats["failed"] += 1
+                return
+            if info is None:
+                return
+
+            self.metadata[info["file_id"]] = info
+            self.ingested[path] = (signature, info["file_id"])
+            self.failed.pop(path, None)
+            self.uncommitted.append((path, signature, info))
+            if self.oldest_uncommitted is None:
+                self.oldest_uncommitted = time.monotonic()
+
+            self.stats["files_ingested"] += 1
+            self.stats["bytes_ingested"] += info["original_size"]
+            if info.get("versions"):
+                self.stats["versions_saved"] += 1
+            self.recent.append((time.monotonic(), info["original_size"]))
+
+    # ---------- commits ----------
+
+    def commit(self, force: bool = False) -> int:
+        """Save metadata for finished files if the batch is due; returns files committed"""
+        with self.lock:
+            if not self.uncommitted:
+                return 0
+            due = len(self.uncommitted) >= self.batch_size or \
+                time.monotonic() - self.oldest_uncommitted >= self.commit_interval
+            if not (due or force):
+                return 0
+            batch, self.uncommitted = self.uncommitted, []
+            self.oldest_uncommitted = None
+
+        # Merge into what is saved now, in case someone else changed the vault
+        committed = False
+        try:
+            saved = self.km.load_metadata(self.kek)
+            for _, _, info in batch:
+                saved[info["file_id"]] = info
+            committed = self.km.save_metadata(saved, self.kek)
+        finally:
+            if not committed:
+                # Keep the batch for the next commit
+                with self.lock:
+                    self.uncommitted = batch + self.uncommitted
+                    self.oldest_uncommitted = time.monotonic()
+        if not committed:
+            return 0
+
+        # Committed already: failures below must not stop the originals' removal
+        try:
+            # Updated files: the objects their previous content lived in are unused now
+            for _, _, info in batch:
+                if info.get("versions"):
+                    self.fm.prune_objects(info["file_id"], info)
+        except Exception as e:
+            print(f" Could not prune old objects: {e}")
+
+        if self.search_index is not None:
+            try:
+                for _, _, info in batch:
+                    self.search_index.add(info["file_id"], info)
+                self.search_index.save()
+            except Exception as e:
+                print(f" Could not update search index: {e}")
+
+        with self.lock:
+            self.stats["commits"] += 1
+
+        if self.remove_originals:
+            for path, signature, _ in batch:
+                self._remove_original(path, signature)
+        return len(batch)
+
+    def _remove_original(self, path: str, signature: tuple):
+        """Delete a committed original, unless it changed after we read it"""
+        try:
+            stat = os.stat(path)
+            if (stat.st_size, stat.st_mtime_ns) != signature:
+                return
+            if self.secure_remove:
+                LocalBackend(os.path.dirname(path)).wipe(os.path.basename(path))
+            else:
+                os.remove(path)
+        except OSError as e:
+            print(f" Could not remove {path}: {e}")
+            return
+
+        with self.lock:
+            self.ingested.pop(path, None)
+            self.stats["originals_removed"] += 1
+
+    # ---------- running ----------
+
+    def run_once(self, force_commit: bool = False):
+        """Scan, then commit whatever is due"""
+        self.scan()
+        self.commit(force=force_commit)
+
+    def _wait(self):
+        if self.inotify is not None:
+            # Wake up early on activity, coalescing bursts of events
+            self.inotify.read(timeout=int(self.poll_interval * 1000), read_delay=50)
+        else:
+            self.stop_event.wait(self.poll_interval)
+
+    def run(self):
+        print(f" Watching {', '.join(str(d) for d in self.directories)}")
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                # Unsaved files stay queued and are committed on a later pass
+                print(f" Watcher error: {e}")
+                with self.lock:
+                    self.stats["errors"] += 1
+            self._wait()
+
+    def start(self):
+        """Watch on a background thread"""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Finish files already being encrypted and commit everything"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.pool.shutdown(wait=True)
+        self.commit(force=True)
+        if self.inotify is not None:
+            self.inotify.close()
+
+    def get_stats(self) -> dict:
+        """Counters plus current queue depth and throughput"""
+        now = time.monotonic()
+        with self.lock:
+            while self.recent and now - self.recent[0][0] > 60:
+                self.recent.popleft()
+            uptime = now - self.started_at
+            stats = dict(self.stats)
+            stats.update({
+                "waiting_to_settle": len(self.pending),
+                "encrypting": len(self.in_flight),
+                "uncommitted": len(self.uncommitted),
+                "queue_depth": len(self.pending) + len(self.in_flight) + len(self.uncommitted),
+                "files_per_minute": len(self.recent) * 60 / min(max(uptime, 1e-9), 60),
+                "mb_per_second": sum(size for _, size in self.recent) / min(max(uptime, 1e-9), 60) / 1024 ** 2,
+                "uptime": uptime,
+            })
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encrypt files dropped into staging folders")
+    parser.add_argument("directories", nargs="+")
+    parser.add_argument("--vault", default="./vault_data")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between scans")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds a file must be unchanged")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--remove-originals", action="store_true")
+    parser.add_argument("--no-wipe", action="store_true", help="delete originals without overwriting")
+    parser.add_argument("--stats-every", type=float, default=10.0)
+    args = parser.parse_args()
+
+    crypto = CryptoEngine()
+    km = KeyManager(args.vault, crypto=crypto)
+    fm = FileManager(args.vault, crypto=crypto)
+    kek = km.unlock_vault(os.environ.get("VAULT_PASSWORD") or getpass.getpass("Password: "))
+
+    watcher = FolderWatcher(km, fm, kek, args.directories, poll_interval=args.interval,
+                            settle_time=args.settle, max_workers=args.workers,
+                            batch_size=args.batch_size, remove_originals=args.remove_originals,
+                            secure_remove=not args.no_wipe)
+    watcher.start()
+    try:
+        while True:
+            time.sleep(args.stats_every)
+            stats = watcher.get_stats()
+            print(f" {stats['files_ingested']:,} files ingested, {stats['files_per_minute']:,.0f}/min, "
+                  f"{stats['mb_per_second']:.2f} MB/s, queue {stats['queue_depth']:,}, "
+                  f"{stats['failed']:,} failed")
+    except KeyboardInterrupt:
+        print("\n Stopping watcher...")
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# tests/test_archive.py
+"""
+Test vault export/import archives
+"""
+
+import sys
+import os
+import io
+import shutil
+import tempfile
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.storage.archive import VaultArchive, ArchiveError
+
+def _add(fm, km, master_key, work_dir, name, size):
+    source = os.path.join(work_dir, name)
+    with open(source, 'wb') as f:
+        f.write(os.urandom(size))
+    info = fm.add_file(source, master_key)
+    metadata = km.load_metadata(master_key)
+    metadata[info["file_id"]] = info
+    km.save_metadata(metadata, master_key)
+    return info
+
+def test_archive():
+    print("🧪 Testing Vault Archive...")
+    print("-" * 40)
+
+    work_dir = tempfile.mkdtemp()
+    vault = os.path.join(work_dir, "vault")
+    restored = os.path.join(work_dir, "restored")
+    archive_path = os.path.join(work_dir, "vault.efva")
+
+    try:
+        km = KeyManager(vault)
+        km.initialize_vault("ArchivePassword1!")
+        master_key = km.unlock_vault("ArchivePassword1!")
+        fm = FileManager(vault)
+        infos = [_add(fm, km, master_key, work_dir, f"f{i}.bin", 5000 * (i + 1)) for i in range(3)]
+
+        # Test 1: Export and restore into an empty vault
+        print("Test 1: Export / import")
+        with open(archive_path, 'wb') as f:
+            stats = VaultArchive(vault, block_size=4096).export_vault(f)
+        assert stats["objects"] == 3
+
+        with open(archive_path, 'rb') as f:
+            stats = VaultArchive(restored).import_vault(f)
+        assert stats["objects"] == 3
+
+        restored_km = KeyManager(restored)
+        restored_key = restored_km.unlock_vault("ArchivePassword1!")
+        restored_meta = restored_km.load_metadata(restored_key)
+        restored_fm = FileManager(restored)
+        for info in infos:
+            original = fm.get_file(info["file_id"], master_key, info)
+            copy = restored_fm.get_file(info["file_id"], restored_key, restored_meta[info["file_id"]])
+            assert original == copy
+
+        # Test 2: Resume an interrupted export
+        print("\nTest 2: Resume export")
+        full = open(archive_path, 'rb').read()
+        with open(archive_path, 'r+b') as f:
+            f.truncate(len(full) // 2)
+            stats = VaultArchive(vault).export_vault(f, resume=True)
+        assert stats["skipped"] >= 1
+        assert open(archive_path, 'rb').read() == full
+
+        # Test 3: Incremental import with a metadata merge
+        print("\nTest 3: Incremental import")
+        _add(fm, km, master_key, work_dir, "new.bin", 777)
+        restored_only = _add(restored_fm, restored_km, restored_key, work_dir, "local.bin", 99)
+
+        buffer = io.BytesIO()
+        VaultArchive(vault).export_vault(buffer)
+        buffer.seek(0)
+        try:
+            VaultArchive(restored).import_vault(buffer)
+            assert False, "Metadata merge without KEK should fail"
+        except ArchiveError:
+            print("   PASS: Merge without KEK rejected")
+
+        buffer.seek(0)
+        stats = VaultArchive(restored).import_vault(buffer, kek=restored_key)
+        # The rejected run already copied the new object, so everything is skipped now
+        assert stats["skipped"] == 4 and stats["objects"] == 0
+        merged = restored_km.load_metadata(restored_key)
+        assert len(merged) == 5 and restored_only["file_id"] in merged
+
+        # Test 4: A file added mid-export never makes the metadata dangle
+        print("\nTest 4: Export of a live vault")
+        archive = VaultArchive(vault)
+        list_objects = archive.backend.list
+        def list_during_add(prefix=""):
+            objects = list_objects(prefix)
+            _add(fm, km, master_key, work_dir, "late.bin", 500)  # Lands after the listing
+            return objects
+        archive.backend.list = list_during_add
+        buffer = io.BytesIO()
+        archive.export_vault(buffer)
+        buffer.seek(0)
+        live = os.path.join(work_dir, "live")
+        VaultArchive(live).import_vault(buffer)
+        live_km, live_fm = KeyManager(live), FileManager(live)
+        live_meta = live_km.load_metadata(master_key)
+        assert "late.bin" not in {info["original_name"] for info in live_meta.values()}
+        for file_id, info in live_meta.items():
+            assert live_fm.verify_file(file_id, master_key, info)
+
+        # Test 5: A file updated since the copy was made replaces the older entry
+        print("\nTest 5: Import of an updated file")
+        metadata = km.load_metadata(master_key)
+        file_id = infos[0]["file_id"]
+        metadata[file_id] = fm.update_bytes(file_id, os.urandom(7000), master_key, metadata[file_id])
+        assert km.save_metadata(metadata, master_key)
+        fm.prune_objects(file_id, metadata[file_id])
+        buffer = io.BytesIO()
+        VaultArchive(vault).export_vault(buffer)
+        buffer.seek(0)
+        VaultArchive(restored).import_vault(buffer, kek=restored_key)
+        merged = restored_km.load_metadata(restored_key)
+        assert merged[file_id]["revision"] == 1
+        for file_id, info in merged.items():
+            assert restored_fm.verify_file(file_id, restored_key, info)
+
+        # Test 6: A file updated (and pruned) while an export runs stays readable
+        print("\nTest 6: Update during export")
+        file_id = infos[1]["file_id"]
+        metadata = km.load_metadata(master_key)
+        content = os.urandom(100_000)
+        metadata[file_id] = fm.update_bytes(file_id, content, master_key, metadata[file_id])
+        assert km.save_metadata(metadata, master_key)
+
+        archive = VaultArchive(vault)
+        def list_during_update(prefix=""):
+            metadata = km.load_metadata(master_key)
+            # A small edit: stored as a delta, superseding the current object
+            metadata[file_id] = fm.update_bytes(file_id, content[:-10] + b"x" * 10,
+                                                master_key, metadata[file_id])
+            assert metadata[file_id]["versions"][-1]["storage"] == "delta"
+            assert km.save_metadata(metadata, master_key)
+            fm.prune_objects(file_id, metadata[file_id])
+            return list_objects(prefix)
+        archive.backend.list = list_during_update
+        buffer = io.BytesIO()
+        archive.export_vault(buffer)
+        buffer.seek(0)
+        during = os.path.join(work_dir, "during")
+        VaultArchive(during).import_vault(buffer)
+        during_km, during_fm = KeyManager(during), FileManager(during)
+        during_meta = during_km.load_metadata(master_key)
+        assert during_fm.get_file(file_id, master_key, during_meta[file_id]) == content
+        for other_id, info in during_meta.items():
+            assert during_fm.verify_file(other_id, master_key, info)
+
+        print("\n" + "=" * 40)
+        print("------ Archive tests completed!")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_archive()
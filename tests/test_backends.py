@@ -0,0 +1,210 @@
+# tests/test_backends.py
+"""
+Test the storage backends, including S3 against a local stand-in server
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.storage.backends import LocalBackend, MemoryBackend, S3Backend
+
+NS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    """Just enough of the S3 API for S3Backend"""
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is visible
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def _parse(self):
+        url = urlparse(self.path)
+        bucket, _, key = unquote(url.path).lstrip("/").partition("/")
+        return key, parse_qs(url.query, keep_blank_values=True)
+
+    def _reply(self, status: int, body: bytes = b"", headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_PUT(self):
+        key, query = self._parse()
+        body = self._body()
+        if "partNumber" in query:
+            upload = self.server.uploads[query["uploadId"][0]]
+            upload[int(query["partNumber"][0])] = body
+            self._reply(200, headers={"ETag": f'"part{query["partNumber"][0]}"'})
+        else:
+            self.server.objects[key] = body
+            self._reply(200)
+
+    def do_POST(self):
+        key, query = self._parse()
+        self._body()
+        if "uploads" in query:
+            upload_id = f"upload{len(self.server.uploads)}"
+            self.server.uploads[upload_id] = {}
+            xml = f'<InitiateMultipartUploadResult xmlns="{NS}"><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>'
+            self._reply(200, xml.encode())
+        else:
+            parts = self.server.uploads.pop(query["uploadId"][0])
+            self.server.objects[key] = b"".join(parts[n] for n in sorted(parts))
+            self.server.multipart_completed += 1
+            self._reply(200, f'<CompleteMultipartUploadResult xmlns="{NS}"/>'.encode())
+
+    def do_GET(self):
+        key, query = self._parse()
+        if not key:
+            # ListObjectsV2 with tiny pages to exercise continuation tokens
+            prefix = query.get("prefix", [""])[0]
+            keys = sorted(k for k in self.server.objects if k.startswith(prefix))
+            start = int(query.get("continuation-token", ["0"])[0])
+            page = keys[start:start + 2]
+            items = "".join(f"<Contents><Key>{k}</Key><Size>{len(self.server.objects[k])}</Size>"
+                            f"<LastModified>2024-01-01T00:00:00.000Z</LastModified></Contents>" for k in page)
+            if start + 2 < len(keys):
+                items += f"<NextContinuationToken>{start + 2}</NextContinuationToken>"
+            self._reply(200, f'<ListBucketResult xmlns="{NS}">{items}</ListBucketResult>'.encode())
+            return
+
+        if key not in self.server.objects:
+            self._reply(404)
+            return
+        data = self.server.objects[key]
+        if "Range" in self.headers:
+            first, _, last = self.headers["Range"][len("bytes="):].partition("-")
+            first = int(first)
+            if first >= len(data):
+                self._reply(416)
+                return
+            last = int(last) if last else len(data) - 1
+            self._reply(206, data[first:last + 1])
+        else:
+            self._reply(200, data)
+
+    def do_HEAD(self):
+        key, _ = self._parse()
+        if key not in self.server.objects:
+            self._reply(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.server.objects[key])))
+        self.end_headers()
+
+    def do_DELETE(self):
+        key, query = self._parse()
+        if "uploadId" in query:
+            self.server.uploads.pop(query["uploadId"][0], None)
+        else:
+            self.server.objects.pop(key, None)
+        self._reply(204)
+
+
+def start_fake_s3():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeS3Handler)
+    server.objects, server.uploads = {}, {}
+    server.connections = server.multipart_completed = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check_backend(backend):
+    """Behaviour every backend must share"""
+    backend.put("a/one.enc", b"hello world")
+    backend.put("a/two.enc", b"")
+    backend.put("top.enc", b"x" * 10)
+
+    assert backend.get("a/one.enc") == b"hello world"
+    assert backend.get("a/two.enc") == b""
+    assert backend.get_range("a/one.enc", 6, 3) == b"wor"
+    assert backend.get_range("a/one.enc", 6) == b"world"
+    assert backend.size("top.enc") == 10
+    assert backend.exists("top.enc") and not backend.exists("nope.enc")
+    assert sorted(o["key"] for o in backend.list("a/")) == ["a/one.enc", "a/two.enc"]
+
+    big = os.urandom(10_000)
+    backend.put_stream("a/big.enc", (big[i:i + 777] for i in range(0, len(big), 777)))
+    assert backend.get("a/big.enc") == big
+
+    backend.wipe("a/big.enc")
+    backend.delete("a/two.enc")
+    assert not backend.exists("a/big.enc") and not backend.exists("a/two.enc")
+    try:
+        backend.get("a/two.enc")
+        assert False, "Deleted object still readable"
+    except FileNotFoundError:
+        pass
+
+
+def test_backends():
+    print("🧪 Testing Storage Backends...")
+    print("-" * 40)
+
+    work_dir = tempfile.mkdtemp()
+    server = start_fake_s3()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        print("Test 1: Memory backend")
+        check_backend(MemoryBackend())
+
+        print("Test 2: Local backend")
+        check_backend(LocalBackend(work_dir))
+
+        print("Test 3: S3 backend")
+        s3 = S3Backend(endpoint, "vault", "AKIDEXAMPLE", "secret", part_size=1024, max_workers=4)
+        check_backend(s3)
+        assert server.multipart_completed >= 1
+        assert server.connections <= 5, f"Connections not reused: {server.connections}"
+
+        print("Test 4: Vault on S3")
+        backend = S3Backend(endpoint, "vault", prefix="team-a/", part_size=4096)
+        km = KeyManager("unused", backend=backend)
+        km.initialize_vault("S3Password1!")
+        assert not backend.exists("password_hint.txt")  # Plaintext password stays off the server
+        master_key = km.unlock_vault("S3Password1!")
+        fm = FileManager("unused", backend=backend)
+
+        source = os.path.join(work_dir, "data.bin")
+        data = os.urandom(20_000)
+        with open(source, 'wb') as f:
+            f.write(data)
+        info = fm.add_file(source, master_key, chunk_size=4096)
+        km.save_metadata({info["file_id"]: info}, master_key)
+
+        assert km.load_metadata(master_key)[info["file_id"]]["hash"] == info["hash"]
+        assert fm.get_file(info["file_id"], master_key, info) == data
+        assert fm.read_range(info["file_id"], master_key, info, 5000, 100) == data[5000:5100]
+        assert fm.get_vault_stats()["total_files"] == 1
+        assert not os.path.exists("unused")
+
+        print("\n" + "=" * 40)
+        print("------ Backend tests completed!")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_backends()
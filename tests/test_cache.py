@@ -0,0 +1,79 @@
+# tests/test_cache.py
+"""
+Test the decrypted content cache
+"""
+
+import sys
+import os
+import tempfile
+import shutil
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.storage.backends import MemoryBackend
+from src.storage.cache import ContentCache
+
+def test_cache():
+    print("🧪 Testing Content Cache...")
+    print("-" * 40)
+
+    # Test 1: LRU bookkeeping
+    print("Test 1: LRU eviction and size limits")
+    cache = ContentCache(max_bytes=100, max_entry_size=60)
+    cache.put("a", b"a" * 40)
+    cache.put("b", b"b" * 40)
+    assert cache.get("a") == b"a" * 40      # a is now most recent
+    cache.put("c", b"c" * 40)               # evicts b
+    assert cache.get("b") is None
+    cache.put("huge", b"h" * 61)            # over max_entry_size
+    assert cache.get("huge") is None
+    stats = cache.get_stats()
+    assert stats["entries"] == 2 and stats["bytes"] == 80 and stats["evictions"] == 1
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+    # Test 2: FileManager integration
+    print("\nTest 2: FileManager hits, invalidation and lock")
+    work_dir = tempfile.mkdtemp()
+    try:
+        backend = MemoryBackend()
+        km = KeyManager("unused", backend=backend)
+        km.initialize_vault("CachePassword1!")
+        master_key = km.unlock_vault("CachePassword1!")
+        fm = FileManager("unused", backend=backend, cache=ContentCache())
+
+        source = os.path.join(work_dir, "config.json")
+        with open(source, 'wb') as f:
+            f.write(b'{"debug": false}')
+        info = fm.add_file(source, master_key)
+        file_id = info["file_id"]
+
+        for _ in range(5):
+            assert fm.get_file(file_id, master_key, info) == b'{"debug": false}'
+        assert fm.cache.get_stats()["hits"] == 4
+
+        # Updated elsewhere (no invalidate here): the new metadata misses the cache
+        other = FileManager("unused", backend=backend)
+        updated = other.update_bytes(file_id, b'{"debug": true}', master_key, info)
+        assert fm.get_file(file_id, master_key, updated) == b'{"debug": true}'
+
+        fm.lock()
+        assert fm.cache.get_stats()["entries"] == 0
+
+        fm.get_file(file_id, master_key, info)
+        fm.delete_file(file_id)
+        try:
+            fm.get_file(file_id, master_key, info)
+            assert False, "Deleted file served from cache"
+        except FileNotFoundError:
+            print("   PASS: Deleted file no longer served")
+
+        print("\n" + "=" * 40)
+        print("------ Cache tests completed!")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_cache()
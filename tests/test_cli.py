@@ -0,0 +1,137 @@
+# tests/test_cli.py
+"""
+Test the non-interactive vault command
+"""
+
+import sys
+import os
+import io
+import json
+import shutil
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src import cli
+
+PASSWORD = "CliPassword123!"
+
+def run(*argv) -> tuple:
+    """Run the CLI in-process; returns (exit code, stdout)"""
+    out = io.StringIO()
+    with redirect_stdout(out):
+        code = cli.main(list(argv))
+    return code, out.getvalue()
+
+def test_cli():
+    print("🧪 Testing Vault CLI...")
+    print("-" * 40)
+
+    work_dir = tempfile.mkdtemp()
+    os.environ["VAULT_PASSWORD"] = PASSWORD
+    try:
+        vault = os.path.join(work_dir, "vault")
+        docs = os.path.join(work_dir, "docs")
+        os.makedirs(os.path.join(docs, "sub"))
+        with open(os.path.join(docs, "a.txt"), 'wb') as f:
+            f.write(b"alpha " * 1000)
+        with open(os.path.join(docs, "sub", "b.bin"), 'wb') as f:
+            f.write(os.urandom(50_000))
+
+        # Test 1: init, recursive add, JSON listing
+        print("Test 1: init / add -r / ls")
+        assert run("--vault", vault, "init")[0] == 0
+        assert run("--vault", vault, "init")[0] == 1  # Already exists
+        assert run("--vault", vault, "add", docs)[0] == 1  # Directory without -r
+        code, output = run("--vault", vault, "--json", "add", "-r", docs)
+        assert code == 0 and len(json.loads(output)) == 2
+
+        code, output = run("--vault", vault, "--json", "ls")
+        files = {f["name"]: f for f in json.loads(output)}
+        assert set(files) == {"a.txt", "b.bin"}
+        assert files["a.txt"]["size"] == 6000
+
+        # Test 2: get by name, stat hides key material, verify
+        print("\nTest 2: get / stat / verify")
+        restored = os.path.join(work_dir, "restored.txt")
+        assert run("--vault", vault, "get", "a.txt", "-o", restored)[0] == 0
+        with open(restored, 'rb') as f:
+            assert f.read() == b"alpha " * 1000
+        assert run("--vault", vault, "get", "a.txt", "-o", restored)[0] == 1  # No --force
+
+        code, output = run("--vault", vault, "--json", "stat", "b.bin")
+        info = json.loads(output)
+        assert code == 0 and info["original_size"] == 50_000
+        assert "encrypted_key" not in info
+
+        code, output = run("--vault", vault, "--json", "verify")
+        assert code == 0 and all(r["ok"] for r in json.loads(output))
+
+        # Test 3: batch under one unlock, stopping at the first error
+        print("\nTest 3: Batch file")
+        jobs = os.path.join(work_dir, "jobs.txt")
+        with open(jobs, 'w') as f:
+            f.write("# nightly\n"
+                    f"rm {files['b.bin']['file_id']}\n"
+                    "stat no-such-file\n"
+                    "ls\n")
+        code, output = run("--vault", vault, "--json", "batch", jobs)
+        results = json.loads(output)
+        assert code == 1
+        assert [r["ok"] for r in results] == [True, False]  # ls never ran
+
+        code, output = run("--vault", vault, "--json", "ls")
+        assert [f["name"] for f in json.loads(output)] == ["a.txt"]  # rm was saved
+
+        code, output = run("--vault", vault, "--json", "batch", "--keep-going", jobs)
+        assert [r["ok"] for r in json.loads(output)] == [False, False, True]
+
+        # The search index followed the adds and the removal
+        from src.auth.key_manager import KeyManager
+        from src.storage.search_index import SearchIndex
+        km = KeyManager(vault)
+        index = SearchIndex(km.backend, km.unlock_vault(PASSWORD))
+        index.load()
+        assert [r["original_name"] for r in index.find()] == ["a.txt"]
+
+        # A batch writes metadata once, however many commands changed it
+        with open(jobs, 'w') as f:
+            f.write(f"add {os.path.join(docs, 'sub', 'b.bin')}\n"
+                    f"add {os.path.join(docs, 'a.txt')}\n")
+        saves = []
+        original_save = KeyManager.save_metadata
+        KeyManager.save_metadata = lambda self, *args: saves.append(1) or original_save(self, *args)
+        try:
+            assert run("--vault", vault, "batch", jobs)[0] == 0
+        finally:
+            KeyManager.save_metadata = original_save
+        assert len(saves) == 1
+
+        # Test 4: wrong password
+        print("\nTest 4: Wrong password")
+        os.environ["VAULT_PASSWORD"] = "not-the-password"
+        code, output = run("--vault", vault, "--json", "ls")
+        assert code == 1 and "Wrong password" in json.loads(output)["error"]
+
+        # Test 5: password on a file descriptor, raw output on stdout
+        print("\nTest 5: --password-fd and get to stdout")
+        del os.environ["VAULT_PASSWORD"]
+        env = dict(os.environ, PYTHONPATH=parent_dir)
+        result = subprocess.run(
+            [sys.executable, "-m", "src.cli", "--vault", vault, "--password-fd", "0",
+             "get", files["a.txt"]["file_id"], "-o", "-"],
+            input=(PASSWORD + "\n").encode(), capture_output=True, env=env, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == b"alpha " * 1000
+    finally:
+        os.environ.pop("VAULT_PASSWORD", None)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\n" + "=" * 40)
+    print("------ CLI tests completed!")
+
+if __name__ == "__main__":
+    test_cli()
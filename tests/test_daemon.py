@@ -0,0 +1,119 @@
+# tests/test_daemon.py
+"""
+Test the vault daemon and its client
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.daemon.server import VaultDaemon
+from src.daemon.client import VaultClient
+
+def test_daemon():
+    print("🧪 Testing Vault Daemon...")
+    print("-" * 40)
+
+    work_dir = tempfile.mkdtemp()
+    vault = os.path.join(work_dir, "vault")
+    KeyManager(vault).initialize_vault("DaemonPassword1!")
+
+    daemon = VaultDaemon(vault, os.path.join(work_dir, "vault.sock"))
+    daemon.unlock("DaemonPassword1!")
+    daemon.start()
+
+    try:
+        with VaultClient(daemon.socket_path) as client:
+            # Test 1: Basic requests on one connection
+            print("Test 1: add / get / stream / stat")
+            assert client.ping()
+            data = os.urandom(300_000)
+            info = client.add("data.bin", data)
+            assert "encrypted_key" not in info
+            assert client.get(info["file_id"]) == data
+            root_checks = []
+            check_root = daemon.fm._check_merkle_root
+            daemon.fm._check_merkle_root = lambda *args: root_checks.append(1) or check_root(*args)
+            assert b"".join(client.stream(info["file_id"], block_size=65536)) == data
+            assert len(root_checks) == 1  # Once per stream, not per block
+            daemon.fm._check_merkle_root = check_root
+            assert client.stat(info["file_id"])["original_size"] == len(data)
+
+            # Test 2: Pipelining with an error in the middle
+            print("\nTest 2: Pipelining")
+            results = client.pipeline([
+                ("stat", {"file_id": info["file_id"]}, b""),
+                ("get", {"file_id": "0000000000000000"}, b""),
+                ("list", {}, b""),
+            ])
+            assert results[0][0]["file"]["original_name"] == "data.bin"
+            assert isinstance(results[1], FileNotFoundError)
+            assert len(results[2][0]["files"]) == 1
+
+            # Test 3: Updates saved by another process are served, not the old entry
+            print("\nTest 3: Updated elsewhere")
+            other_km, other_fm = KeyManager(vault), FileManager(vault)
+            kek = other_km.unlock_vault("DaemonPassword1!")
+            file_id = info["file_id"]
+
+            def update_elsewhere(n):
+                nonlocal data
+                metadata = other_km.load_metadata(kek)
+                data = data[:1000] + bytes([n]) * 10 + data[1010:]
+                metadata[file_id] = other_fm.update_bytes(file_id, data, kek, metadata[file_id])
+                assert other_km.save_metadata(metadata, kek)
+                other_fm.prune_objects(file_id, metadata[file_id], grace=0)  # Old object gone now
+
+            update_elsewhere(1)
+            update_elsewhere(2)
+            assert client.get(file_id) == data
+            update_elsewhere(3)
+            assert client.get(file_id) == data
+            assert b"".join(client.stream(file_id, block_size=65536)) == data
+
+            # Other calls while a stream is being read don't wait for it to end
+            blocks = []
+            finished = threading.Event()
+            def read_interleaved():
+                for block in client.stream(file_id, block_size=65536):
+                    blocks.append(block)
+                    assert client.stat(file_id)["original_size"] == len(data)
+                finished.set()
+            threading.Thread(target=read_interleaved, daemon=True).start()
+            assert finished.wait(10)
+            assert b"".join(blocks) == data
+
+        # Test 4: Many clients adding at once
+        print("\nTest 4: Concurrent clients")
+
+        def worker(n):
+            with VaultClient(daemon.socket_path) as client:
+                for i in range(10):
+                    client.add(f"w{n}_{i}.txt", f"worker {n} file {i}".encode())
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # Every add reached the saved metadata
+        km = KeyManager(vault)
+        saved = km.load_metadata(km.unlock_vault("DaemonPassword1!"))
+        assert len(saved) == 41
+
+        print("\n" + "=" * 40)
+        print("------ Daemon tests completed!")
+    finally:
+        daemon.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_daemon()
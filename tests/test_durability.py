@@ -0,0 +1,125 @@
+# tests/test_durability.py
+"""
+Test atomic writes, group commit and metadata corruption handling
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.auth.key_manager import KeyManager, MetadataError
+from src.storage.backends import LocalBackend, _directory_syncs
+from src.storage.group_commit import GroupCommit
+
+def run_threads(target, count):
+    threads = [threading.Thread(target=target, args=(n,)) for n in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+def test_durability():
+    print("🧪 Testing Durable Writes...")
+    print("-" * 40)
+
+    # Test 1: Concurrent commits share writes
+    print("Test 1: Group commit")
+    written = []
+
+    def slow_write(value):
+        time.sleep(0.02)
+        written.append(value)
+
+    group = GroupCommit(slow_write)
+    run_threads(lambda n: group.commit(n), 20)
+    assert group.committed == 20
+    assert 1 <= group.writes < 20 and len(written) == group.writes
+
+    # A failed write is reported and retried by the next caller
+    attempts = []
+
+    def flaky_write(value):
+        attempts.append(value)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+
+    group = GroupCommit(flaky_write)
+    try:
+        group.commit("a")
+        assert False, "error not raised"
+    except OSError:
+        pass
+    group.commit("b")
+    assert attempts == ["a", "b"]
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        # Test 2: Atomic replace leaves old content on a failed write
+        print("\nTest 2: Atomic writes")
+        backend = LocalBackend(work_dir)
+        backend.put("obj.enc", b"old content")
+
+        def broken_stream():
+            yield b"new "
+            raise IOError("crash mid-write")
+
+        try:
+            backend.put_stream("obj.enc", broken_stream())
+        except IOError:
+            pass
+        assert backend.get("obj.enc") == b"old content"
+        assert sorted(os.listdir(work_dir)) == ["obj.enc"]
+
+        # Concurrent puts share directory fsyncs
+        run_threads(lambda n: backend.put(f"files/{n}.enc", os.urandom(1000)), 16)
+        assert len(backend.list("files/")) == 16
+        assert _directory_syncs[(Path(work_dir) / "files").resolve()].writes <= 16
+
+        # Test 3: Metadata saves from many threads
+        print("\nTest 3: Metadata group commit")
+        vault = os.path.join(work_dir, "vault")
+        km = KeyManager(vault, commit_window=0.01)
+        km.initialize_vault("DurablePassword1!")
+        kek = km.unlock_vault("DurablePassword1!")
+        metadata = {}
+        lock = threading.Lock()
+        writes_before = km.metadata_commit.writes
+
+        def add_entry(n):
+            with lock:
+                metadata[f"file{n}"] = {"original_name": f"{n}.txt"}
+                ticket = km.stage_metadata(metadata, kek)
+            assert km.wait_metadata(ticket)
+
+        run_threads(add_entry, 30)
+        assert len(km.load_metadata(kek)) == 30
+        assert km.metadata_commit.writes - writes_before < 30
+
+        # Test 4: Corrupt metadata raises instead of looking empty
+        print("\nTest 4: Corrupt metadata")
+        path = os.path.join(vault, "metadata.enc")
+        with open(path, 'r+b') as f:
+            f.seek(20)
+            f.write(b"\x00" * 40)
+        try:
+            km.load_metadata(kek)
+            assert False, "corruption not detected"
+        except MetadataError:
+            pass
+        os.remove(path)
+        assert km.load_metadata(kek) == {}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\n" + "=" * 40)
+    print("------ Durability tests completed!")
+
+if __name__ == "__main__":
+    test_durability()
@@ -0,0 +1,48 @@
+# tests/test_loadtest.py
+"""
+Test the load test harness
+"""
+
+import sys
+import os
+import random
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.loadtest import parse_size, parse_mix, size_sampler, percentile, run_load_test
+
+def test_loadtest():
+    print("🧪 Testing Load Test Harness...")
+    print("-" * 40)
+
+    # Test 1: Parsing helpers
+    print("Test 1: Sizes, mixes and percentiles")
+    assert parse_size("4k") == 4096 and parse_size("1.5m") == 1572864 and parse_size("100") == 100
+    assert parse_mix("add=3,get=1") == {"add": 3.0, "get": 1.0}
+    sample = size_sampler("uniform:1k-2k")
+    assert all(1024 <= sample(random.Random(i)) <= 2048 for i in range(50))
+    assert percentile(list(range(1, 101)), 99) == 99
+    assert percentile([5], 50) == 5
+
+    # Test 2: A short threaded run
+    print("\nTest 2: Threaded run")
+    report = run_load_test(workers=3, duration=30, ops=20, sizes="choice:1k,64k", prefill=2)
+    assert report["total_ops"] == 60
+    ops = report["operations"]
+    assert sum(stats["errors"] for stats in ops.values()) == 0
+    for stats in ops.values():
+        assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert report["peak_rss_mb"] > 0 and report["cpu_seconds"] > 0
+    assert report["lost_updates"] == 0
+
+    # Test 3: Batched metadata commits from several processes
+    print("\nTest 3: Processes with batched commits")
+    report = run_load_test(workers=3, duration=30, ops=15, mode="processes", commit_every=4)
+    assert report["total_ops"] == 45 and report["lost_updates"] == 0
+
+    print("\n" + "=" * 40)
+    print("------ Load test harness tests completed!")
+
+if __name__ == "__main__":
+    test_loadtest()
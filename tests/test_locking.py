@@ -0,0 +1,182 @@
+# tests/test_locking.py
+"""
+Test multi-process vault locking and metadata merging
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import multiprocessing
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.storage.locking import VaultLocks, LockTimeout, merge_metadata
+
+PASSWORD = "LockingPassword1!"
+WORKERS = 4
+FILES_PER_WORKER = 8
+
+def add_worker(vault: str, worker: int, start):
+    """Load metadata once, then add files saving after each - never reloading"""
+    import io
+    from contextlib import redirect_stdout
+    with redirect_stdout(io.StringIO()):
+        km = KeyManager(vault)
+        fm = FileManager(vault, crypto=km.crypto)
+        kek = km.unlock_vault(PASSWORD)
+        metadata = km.load_metadata(kek)
+        start.wait()
+        for i in range(FILES_PER_WORKER):
+            info = fm.add_bytes(os.urandom(2000), f"w{worker}-{i}.bin", kek)
+            metadata[info["file_id"]] = info
+            assert km.save_metadata(metadata, kek)
+
+def hold_exclusive(vault: str, held, release):
+    with VaultLocks(vault).exclusive():
+        held.set()
+        release.wait(30)
+
+def test_locking():
+    print("🧪 Testing Vault Locking...")
+    print("-" * 40)
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        vault = os.path.join(work_dir, "vault")
+        km = KeyManager(vault)
+        km.initialize_vault(PASSWORD)
+        kek = km.unlock_vault(PASSWORD)
+
+        # Test 1: Entry-level merge rules
+        print("Test 1: merge_metadata")
+        base = {"a": {"v": 1}, "b": {"v": 1}, "c": {"v": 1}}
+        mine = {"a": {"v": 2}, "c": {"v": 1}, "d": {"v": 1}}          # changed a, deleted b, added d
+        theirs = {"a": {"v": 1}, "b": {"v": 1}, "e": {"v": 1}}        # deleted c, added e
+        assert merge_metadata(base, mine, theirs) == {"a": {"v": 2}, "d": {"v": 1}, "e": {"v": 1}}
+        # They deleted what we changed: stays deleted
+        assert merge_metadata({"x": 1}, {"x": 2}, {}) == {}
+        # Both changed the same entry: reported as a conflict
+        conflicts = []
+        merge_metadata({"x": 1, "y": 1}, {"x": 2, "y": 2}, {"x": 3, "y": 2}, conflicts)
+        assert conflicts == ["x"]
+
+        # Test 2: Concurrent processes lose no entries
+        print("\nTest 2: Concurrent adds from several processes")
+        start = multiprocessing.Event()
+        workers = [multiprocessing.Process(target=add_worker, args=(vault, w, start))
+                   for w in range(WORKERS)]
+        for worker in workers:
+            worker.start()
+        start.set()
+        for worker in workers:
+            worker.join(120)
+            assert worker.exitcode == 0
+
+        metadata = km.load_metadata(kek)
+        names = {info["original_name"] for info in metadata.values()}
+        assert len(metadata) == WORKERS * FILES_PER_WORKER
+        assert names == {f"w{w}-{i}.bin" for w in range(WORKERS) for i in range(FILES_PER_WORKER)}
+        # One version per save, plus the empty metadata written by init
+        assert km.metadata_version == WORKERS * FILES_PER_WORKER + 1
+        print(f"   PASS: {len(metadata)} entries, version {km.metadata_version}")
+
+        # Test 3: A stale in-memory copy merges instead of overwriting
+        print("\nTest 3: Stale saves and refresh")
+        other = KeyManager(vault)
+        stale = other.load_metadata(kek)
+        victim = sorted(metadata)[0]
+        del metadata[victim]
+        assert km.save_metadata(metadata, kek)
+
+        stale["extra"] = {"file_id": "extra", "original_name": "extra.bin"}
+        assert other.save_metadata(stale, kek)
+        assert other.metadata_merges == 1
+        saved = km.load_metadata(kek)
+        assert "extra" in saved and victim not in saved
+
+        # Memory copies pick up other processes' saves, keeping their own edits
+        stale["local"] = {"file_id": "local"}
+        assert other.refresh_metadata(stale, kek)
+        assert victim not in stale and "local" in stale and "extra" in stale
+        assert not other.refresh_metadata(stale, kek)
+
+        # Test 4: Metadata from before versioning still loads
+        print("\nTest 4: Legacy metadata file")
+        legacy = km.crypto.encrypt_data(b'{"old": {"file_id": "old"}}', kek)
+        km.backend.put("metadata.enc", legacy)
+        assert km.load_metadata(kek) == {"old": {"file_id": "old"}}
+        assert km.metadata_version == 0
+        assert km.save_metadata({"old": {"file_id": "old"}, "new": {}}, kek)
+        assert km.metadata_version == 1 and km.metadata_merges == 0
+
+        # Test 5: Each loaded copy is diffed against its own version
+        print("\nTest 5: Copies loaded at different times")
+        a, b = km.load_metadata(kek), km.load_metadata(kek)
+        a["x"] = {"file_id": "x"}
+        assert km.save_metadata(a, kek)
+        b["y"] = {"file_id": "y"}
+        assert km.save_metadata(b, kek)
+        saved = km.load_metadata(kek)
+        assert "x" in saved and "y" in saved
+
+        # Threads sharing one manager, their saves grouped into shared writes
+        import threading
+        grouped = KeyManager(vault, commit_window=0.05)
+        def add_one(n):
+            copy = grouped.load_metadata(kek)
+            copy[f"t{n}"] = {"file_id": f"t{n}"}
+            assert grouped.save_metadata(copy, kek)
+        threads = [threading.Thread(target=add_one, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        saved = km.load_metadata(kek)
+        assert all(f"t{n}" in saved for n in range(8))
+
+        # Two updates of the same file: the second save is a conflict, not a torn entry
+        fm = FileManager(vault, crypto=km.crypto)
+        info = fm.add_bytes(os.urandom(5000), "shared.bin", kek)
+        saved[info["file_id"]] = info
+        assert km.save_metadata(saved, kek)
+        first, second = km.load_metadata(kek), km.load_metadata(kek)
+        file_id = info["file_id"]
+        first[file_id] = fm.update_bytes(file_id, os.urandom(5000), kek, first[file_id])
+        second[file_id] = fm.update_bytes(file_id, os.urandom(6000), kek, second[file_id])
+        assert km.save_metadata(first, kek)
+        assert not km.save_metadata(second, kek)
+        saved = km.load_metadata(kek)
+        assert saved[file_id] == first[file_id]
+        assert fm.verify_file(file_id, kek, saved[file_id])
+
+        # Test 6: Reader/writer lock across processes
+        print("\nTest 6: Exclusive lock blocks other processes")
+        held, release = multiprocessing.Event(), multiprocessing.Event()
+        holder = multiprocessing.Process(target=hold_exclusive, args=(vault, held, release))
+        holder.start()
+        try:
+            assert held.wait(30)
+            started = time.monotonic()
+            try:
+                with km.locks.shared(timeout=0.3):
+                    raise AssertionError("shared lock taken while another process is exclusive")
+            except LockTimeout:
+                assert time.monotonic() - started >= 0.3
+        finally:
+            release.set()
+            holder.join(30)
+        with km.locks.exclusive(timeout=5):  # Free again once released
+            pass
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\n" + "=" * 40)
+    print("------ Locking tests completed!")
+
+if __name__ == "__main__":
+    test_locking()
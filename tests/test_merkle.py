@@ -0,0 +1,72 @@
+# tests/test_merkle.py
+"""
+Test per-chunk Merkle hashes and range reads
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.crypto.merkle import merkle_root
+
+def test_merkle():
+    print("🧪 Testing Merkle chunk hashes...")
+    print("-" * 40)
+
+    work_dir = tempfile.mkdtemp()
+    vault = os.path.join(work_dir, "vault")
+
+    try:
+        km = KeyManager(vault)
+        km.initialize_vault("MerklePassword1!")
+        master_key = km.unlock_vault("MerklePassword1!")
+        fm = FileManager(vault)
+
+        chunk_size = 4096
+        data = os.urandom(chunk_size * 5 + 123)
+        source = os.path.join(work_dir, "data.bin")
+        with open(source, 'wb') as f:
+            f.write(data)
+
+        for algo in ("sha256", "blake2b"):
+            print(f"\nTest: {algo}")
+            info = fm.add_file(source, master_key, hash_algo=algo, chunk_size=chunk_size)
+            file_id = info["file_id"]
+
+            assert info["chunks"] == 6
+            assert info["merkle_root"] == merkle_root(info["chunk_hashes"], algo)
+            assert fm.get_file(file_id, master_key, info) == data
+            assert fm.verify_file(file_id, master_key, info)
+
+            # Ranges inside, across and at the end of chunks
+            for offset, length in [(0, 10), (4090, 20), (chunk_size * 5, 500), (100, len(data))]:
+                part = fm.read_range(file_id, master_key, info, offset, length)
+                assert part == data[offset:offset + length]
+
+            # Flip one ciphertext byte in chunk 2 - only chunk 2 should fail
+            path = fm.files_path / f"{file_id}.enc"
+            raw = bytearray(path.read_bytes())
+            raw[16 + chunk_size * 2 + 7] ^= 0x01
+            path.write_bytes(bytes(raw))
+
+            assert fm.verify_chunks(file_id, master_key, info) == [2]
+            assert fm.read_range(file_id, master_key, info, 0, 100) == data[:100]
+            try:
+                fm.read_range(file_id, master_key, info, chunk_size * 2, 10)
+                assert False, "Corrupt chunk was not detected"
+            except ValueError:
+                print("   PASS: Corrupt chunk rejected")
+
+        print("\n" + "=" * 40)
+        print("------ Merkle tests completed!")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_merkle()
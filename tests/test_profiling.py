@@ -0,0 +1,77 @@
+# tests/test_profiling.py
+"""
+Test the per-operation profiling mode
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src import profiling
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+
+def test_profiling():
+    print("🧪 Testing Profiling Mode...")
+    print("-" * 40)
+
+    work_dir = tempfile.mkdtemp()
+    original_add = FileManager.add_bytes
+    try:
+        vault = os.path.join(work_dir, "vault")
+        km = KeyManager(vault)
+        km.initialize_vault("ProfilePassword1!")
+
+        # Test 1: Operations are recorded while enabled
+        print("Test 1: Recording operations")
+        profiling.reset()
+        profiling.enable(output_dir=os.path.join(work_dir, "profile"), write_at_exit=False)
+        assert FileManager.add_bytes is not original_add
+
+        kek = km.unlock_vault("ProfilePassword1!")
+        fm = FileManager(vault)
+        for i in range(3):
+            info = fm.add_bytes(os.urandom(500_000), f"file{i}.bin", kek)
+        fm.get_file(info["file_id"], kek, info)
+
+        report = profiling.get_report()
+        ops = {op["operation"]: op for op in report["operations"]}
+        assert ops["FileManager.add_bytes"]["calls"] == 3
+        assert ops["FileManager.add_bytes"]["profiled_calls"] == 3
+        assert ops["FileManager.add_bytes"]["peak_memory"] > 500_000
+        assert ops["FileManager.add_bytes"]["time_by_category"]["cipher"] > 0
+        assert ops["KeyManager.unlock_vault"]["time_by_category"]["kdf"] > 0
+
+        # Nested operations only count their time, not a second profile
+        assert ops["CryptoEngine.encrypt_with_digests"]["calls"] == 3
+        assert ops["CryptoEngine.encrypt_with_digests"]["profiled_calls"] == 0
+
+        # Test 2: Reports on disk
+        print("\nTest 2: Writing reports")
+        txt_path, json_path = profiling.write_report()
+        with open(json_path) as f:
+            assert json.load(f)["operations"]
+        with open(txt_path) as f:
+            assert "FileManager.add_bytes" in f.read()
+
+        # Test 3: Disabling restores the plain methods
+        print("\nTest 3: Disable")
+        profiling.disable()
+        assert FileManager.add_bytes is original_add
+        profiling.reset()
+        fm.add_bytes(b"quiet", "quiet.txt", kek)
+        assert profiling.get_report()["operations"] == []
+    finally:
+        profiling.disable()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\n" + "=" * 40)
+    print("------ Profiling tests completed!")
+
+if __name__ == "__main__":
+    test_profiling()
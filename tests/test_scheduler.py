@@ -0,0 +1,121 @@
+# tests/test_scheduler.py
+"""
+Test the prioritised job scheduler
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.storage.scrub import VaultScrubber
+from src.storage.scheduler import (JobScheduler, JobCancelled, checkpoint,
+                                   INTERACTIVE, INGEST, MAINTENANCE)
+
+def test_scheduler():
+    print("🧪 Testing Job Scheduler...")
+    print("-" * 40)
+
+    # Test 1: A free worker takes the highest priority job
+    print("Test 1: Priorities")
+    scheduler = JobScheduler(max_workers=1)
+    gate = threading.Event()
+    order = []
+    scheduler.submit(gate.wait, priority=INGEST)
+    time.sleep(0.05)
+    jobs = [scheduler.submit(order.append, name, priority=name)
+            for name in (MAINTENANCE, INGEST, INTERACTIVE)]
+    gate.set()
+    for job in jobs:
+        job.result(timeout=5)
+    assert order == [INTERACTIVE, INGEST, MAINTENANCE]
+
+    # Test 2: Cancelling queued and running jobs
+    print("\nTest 2: Cancellation")
+    gate.clear()
+    blocker = scheduler.submit(gate.wait)
+    queued = scheduler.submit(order.append, "never")
+    assert queued.cancel()
+    gate.set()
+    blocker.result(timeout=5)
+    try:
+        queued.result(timeout=5)
+        assert False, "cancelled job returned"
+    except JobCancelled:
+        pass
+    assert "never" not in order
+
+    def long_job():
+        while True:
+            checkpoint(1000)
+            time.sleep(0.005)
+
+    running = scheduler.submit(long_job, total_bytes=10_000_000)
+    time.sleep(0.1)
+    progress = running.progress()
+    assert progress["status"] == "running" and progress["bytes_done"] > 0
+    assert progress["eta"] is not None
+    running.cancel()
+    assert running.wait(5) and running.status == "cancelled"
+    scheduler.shutdown()
+
+    # Test 3: Maintenance steps aside while interactive p99 is over budget
+    print("\nTest 3: Latency budget")
+    scheduler = JobScheduler(max_workers=2, latency_budget=0.02)
+    scheduler.submit(time.sleep, 0.05).result(timeout=5)
+    maintenance = scheduler.submit(long_job, priority=MAINTENANCE)
+    time.sleep(0.05)
+    slow = scheduler.submit(time.sleep, 0.3)
+    time.sleep(0.1)
+    assert scheduler.throttled()
+    before = maintenance.bytes_done
+    time.sleep(0.1)
+    assert maintenance.bytes_done - before <= 1000  # Paused
+    slow.result(timeout=5)
+    time.sleep(0.1)
+    assert maintenance.bytes_done - before > 1000   # Resumed
+    maintenance.cancel()
+    maintenance.wait(5)
+    scheduler.shutdown()
+
+    # Test 4: FileManager operations as jobs
+    print("\nTest 4: FileManager.submit")
+    work_dir = tempfile.mkdtemp()
+    try:
+        vault = os.path.join(work_dir, "vault")
+        km = KeyManager(vault)
+        km.initialize_vault("SchedulePassword1!")
+        kek = km.unlock_vault("SchedulePassword1!")
+        fm = FileManager(vault)
+
+        data = os.urandom(700_000)
+        info = fm.submit("add_bytes", data, "big.bin", kek).result(timeout=30)
+        get = fm.submit("get_file", info["file_id"], kek, info)
+        assert get.result(timeout=30) == data
+        assert get.priority == INTERACTIVE and get.progress()["fraction"] == 1.0
+
+        scrub = fm.scheduler.submit(VaultScrubber(fm).scrub, {info["file_id"]: info}, kek,
+                                    priority=MAINTENANCE)
+        assert scrub.result(timeout=30)["ok"] == [info["file_id"]]
+        assert scrub.bytes_done == info["encrypted_size"]
+
+        wipe = fm.submit("delete_file", info["file_id"], secure_wipe=True)
+        wipe.result(timeout=30)
+        assert wipe.priority == MAINTENANCE and wipe.bytes_done == 3 * info["encrypted_size"]
+        assert not fm.backend.exists(fm._object_key(info["file_id"]))
+        fm.scheduler.shutdown()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\n" + "=" * 40)
+    print("------ Scheduler tests completed!")
+
+if __name__ == "__main__":
+    test_scheduler()
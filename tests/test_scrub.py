@@ -0,0 +1,105 @@
+# tests/test_scrub.py
+"""
+Test the Vault Scrubber
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.storage.scrub import VaultScrubber, CHECKPOINT_NAME
+
+def test_scrub():
+    print("🧪 Testing Vault Scrubber...")
+    print("-" * 40)
+
+    work_dir = tempfile.mkdtemp()
+    vault = os.path.join(work_dir, "vault")
+
+    try:
+        km = KeyManager(vault)
+        km.initialize_vault("ScrubPassword1!")
+        master_key = km.unlock_vault("ScrubPassword1!")
+        fm = FileManager(vault)
+
+        # Add a few files
+        metadata = {}
+        for i in range(4):
+            source = os.path.join(work_dir, f"file{i}.txt")
+            with open(source, 'wb') as f:
+                f.write(os.urandom(1000 + i * 100))
+            info = fm.add_file(source, master_key)
+            metadata[info["file_id"]] = info
+        ids = list(metadata)
+
+        # Test 1: Clean vault
+        print("Test 1: Clean vault")
+        report = VaultScrubber(fm, max_workers=2).scrub(metadata, master_key)
+        assert sorted(report["ok"]) == sorted(ids)
+        assert not report["corrupt"] and not report["missing"] and not report["orphaned"]
+
+        # Test 2: Damage the vault
+        print("\nTest 2: Corrupt, missing and orphaned objects")
+        corrupt_path = fm.files_path / f"{ids[0]}.enc"
+        data = bytearray(corrupt_path.read_bytes())
+        data[40] ^= 0xFF
+        corrupt_path.write_bytes(bytes(data))
+
+        (fm.files_path / f"{ids[1]}.enc").unlink()
+        (fm.files_path / "deadbeefdeadbeef.enc").write_bytes(b"x" * 32)
+
+        report = VaultScrubber(fm, rate_limit=10_000_000).scrub(metadata, master_key)
+        assert report["corrupt"] == [ids[0]]
+        assert report["missing"] == [ids[1]]
+        assert report["orphaned"] == ["deadbeefdeadbeef"]
+        assert sorted(report["ok"]) == sorted(ids[2:])
+
+        # Test 3: Resume from a checkpoint
+        print("\nTest 3: Resume")
+        scrubber = VaultScrubber(fm)
+        # ids[3] changed since its (fake) result was saved
+        checked = {**metadata, ids[3]: {**metadata[ids[3]], "hash": "stale"}}
+        scrubber._save_checkpoint({ids[2]: "corrupt", ids[3]: "corrupt"}, checked)
+        report = scrubber.scrub(metadata, master_key)
+        # The checkpointed result for an unchanged entry is trusted, the rest is rescanned
+        assert ids[2] in report["corrupt"]
+        assert ids[3] in report["ok"]
+        assert not fm.backend.exists(CHECKPOINT_NAME)
+
+        # Test 4: Ctrl+C stops queued verifications and keeps finished ones
+        print("\nTest 4: Interrupt")
+        import time
+        calls = []
+        class Interrupted(VaultScrubber):
+            def _verify_one(self, file_id, info, master_key):
+                calls.append(file_id)
+                if len(calls) == 2:
+                    raise KeyboardInterrupt
+                time.sleep(0.2)
+                return "ok"
+        many = {f"{i:016x}": {"encrypted_size": 0} for i in range(50)}
+        scrubber = Interrupted(fm, max_workers=1)
+        scrubber._scan_objects = lambda: ({file_id: 0 for file_id in many}, {})
+        try:
+            scrubber.scrub(many, master_key, resume=False)
+            raise AssertionError("interrupt swallowed")
+        except KeyboardInterrupt:
+            pass
+        time.sleep(0.3)
+        assert len(calls) <= 3  # The rest of the queue was cancelled
+        assert list(scrubber._load_checkpoint()) == [calls[0]]
+        fm.backend.delete(CHECKPOINT_NAME)
+
+        print("\n" + "=" * 40)
+        print("------ Scrub tests completed!")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_scrub()
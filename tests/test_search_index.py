@@ -0,0 +1,120 @@
+# tests/test_search_index.py
+"""
+Test the encrypted filename search index
+"""
+
+import sys
+import os
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.storage.backends import MemoryBackend
+from src.storage.search_index import SearchIndex, INDEX_KEY, LOG_PREFIX
+
+def _info(name, size=100, created="2024-01-01T00:00:00"):
+    return {"original_name": name, "file_type": os.path.splitext(name)[1].lower(),
+            "original_size": size, "created_at": created}
+
+def _names(results):
+    return sorted(r["original_name"] for r in results)
+
+def test_search_index():
+    print("🧪 Testing Search Index...")
+    print("-" * 40)
+
+    backend = MemoryBackend()
+    kek = os.urandom(32)
+    index = SearchIndex(backend, kek)
+    assert not index.load()  # Nothing stored yet
+
+    index.add("a", _info("Quarterly_Report.pdf", 5000, "2024-03-01T10:00:00"))
+    index.add("b", _info("report-draft.docx", 200, "2024-01-15T09:00:00"))
+    index.add("c", _info("photo[1].jpg", 90000, "2023-12-24T18:00:00"))
+    index.add("d", _info("notes.md", 10, "2024-02-02T12:00:00"))
+
+    # Test 1: Name queries
+    print("Test 1: Substring / prefix / glob")
+    assert _names(index.find("report")) == ["Quarterly_Report.pdf", "report-draft.docx"]
+    assert _names(index.find("report*")) == ["report-draft.docx"]
+    assert _names(index.find("*.pdf")) == ["Quarterly_Report.pdf"]
+    assert _names(index.find("photo[1]")) == ["photo[1].jpg"]
+    assert _names(index.find("no?es.md")) == ["notes.md"]
+    assert _names(index.find("md")) == ["notes.md"]
+    assert index.find("missing") == []
+
+    # Test 2: Attribute filters
+    print("\nTest 2: Filters")
+    assert _names(index.find(file_type=".jpg")) == ["photo[1].jpg"]
+    assert _names(index.find("report", min_size=1000)) == ["Quarterly_Report.pdf"]
+    assert _names(index.find(max_size=200)) == ["notes.md", "report-draft.docx"]
+    assert _names(index.find(created_after="2024-01-01", created_before="2024-02-28")) == \
+        ["notes.md", "report-draft.docx"]
+
+    # Test 3: Incremental updates and persistence
+    print("\nTest 3: Remove / save / load / sync")
+    index.remove("b")
+    assert _names(index.find("report")) == ["Quarterly_Report.pdf"]
+    index.save()
+    assert b"Quarterly" not in backend.get(INDEX_KEY)
+
+    reloaded = SearchIndex(backend, kek)
+    assert reloaded.load()
+    assert _names(reloaded.find("quarterly")) == ["Quarterly_Report.pdf"]
+    changed = reloaded.sync({"a": _info("Quarterly_Report.pdf"), "e": _info("budget.xlsx")})
+    assert changed and _names(reloaded.find()) == ["Quarterly_Report.pdf", "budget.xlsx"]
+
+    # Test 4: Queries stay fast on a larger index
+    print("\nTest 4: 20k entries")
+    big = SearchIndex(backend, kek)
+    for i in range(20_000):
+        big.add(f"id{i}", _info(f"document_{i:05d}_final.txt"))
+    start = time.perf_counter()
+    results = big.find("document_1234*")
+    elapsed = time.perf_counter() - start
+    assert len(results) == 10
+    print(f"   Prefix query: {elapsed * 1000:.2f} ms")
+    assert elapsed < 0.5
+
+    # Test 5: Saves only write what changed; logs get folded into the snapshot
+    print("\nTest 5: Incremental saves")
+    backend = MemoryBackend()
+    live = SearchIndex(backend, kek)
+    live.load()
+    for i in range(5000):
+        live.add(f"id{i}", _info(f"scan_{i:05d}.pdf"))
+    live.save()
+    snapshot_size = len(backend.get(INDEX_KEY))
+
+    writes = []
+    put = backend.put
+    backend.put = lambda key, data: writes.append(len(data)) or put(key, data)
+    live.add("new", _info("invoice_new.pdf"))
+    live.save()
+    assert len(writes) == 1 and writes[0] < snapshot_size // 100
+
+    # A process that never loads the index (the CLI) still records removals
+    writer = SearchIndex(backend, kek)
+    writer.remove("id7")
+    writer.save()
+    reloaded = SearchIndex(backend, kek)
+    reloaded.load()
+    assert _names(reloaded.find("invoice")) == ["invoice_new.pdf"]
+    assert not reloaded.find("scan_00007")
+
+    for i in range(2000):
+        reloaded.add(f"more{i}", _info(f"extra_{i}.txt"))
+        if i % 100 == 99:
+            reloaded.save()
+    logs = backend.list(LOG_PREFIX)
+    assert len(logs) < 5  # Folded into a snapshot along the way
+    final = SearchIndex(backend, kek)
+    final.load()
+    assert len(final.records) == 5000 + 1 - 1 + 2000
+
+    print("\n" + "=" * 40)
+    print("------ Search index tests completed!")
+
+if __name__ == "__main__":
+    test_search_index()
@@ -0,0 +1,116 @@
+# tests/test_versioning.py
+"""
+Test delta-encoded file versions
+"""
+
+import sys
+import os
+import zlib
+import shutil
+import tempfile
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.storage.scrub import VaultScrubber
+from src.storage.versioning import make_delta, apply_delta, _roll, SNAPSHOT_EVERY
+
+def test_versioning():
+    print("🧪 Testing File Versioning...")
+    print("-" * 40)
+
+    # Test 1: Rolling checksum and delta round trip
+    print("Test 1: Delta encoding")
+    data = os.urandom(10_000)
+    weak = zlib.adler32(data[0:64])
+    for i in range(200):
+        weak = _roll(weak, data[i], data[i + 64], 64)
+        assert weak == zlib.adler32(data[i + 1:i + 65])
+
+    base = os.urandom(200_000)
+    edited = base[:50_000] + b"inserted text" + base[50_100:150_000] + base[160_000:]
+    delta = make_delta(base, edited)
+    assert len(delta) < 20_000
+    assert apply_delta(base, delta) == edited
+    assert apply_delta(b"", make_delta(b"", b"new")) == b"new"
+    assert make_delta(os.urandom(50_000), os.urandom(50_000), max_size=1000) is None
+    # Unrelated content is given up on early instead of scanned to the end
+    import time
+    started = time.monotonic()
+    assert make_delta(os.urandom(4_000_000), os.urandom(4_000_000), max_size=1_000_000) is None
+    assert time.monotonic() - started < 1.5
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        vault = os.path.join(work_dir, "vault")
+        km = KeyManager(vault)
+        km.initialize_vault("VersionPassword1!")
+        kek = km.unlock_vault("VersionPassword1!")
+        fm = FileManager(vault)
+
+        # Test 2: Many small edits stay small
+        print("\nTest 2: Saving revisions")
+        contents = [os.urandom(300_000)]
+        info = fm.add_bytes(contents[0], "sheet.xlsx", kek)
+        file_id = info["file_id"]
+        for i in range(1, 13):
+            edit = bytearray(contents[-1])
+            edit[i * 1000:i * 1000 + 10] = os.urandom(10)
+            contents.append(bytes(edit))
+            info = fm.update_bytes(file_id, contents[-1], kek, info)
+            if i == 2:
+                # Superseded objects outlive the update by a grace period
+                assert fm.prune_objects(file_id, info) == 0
+            fm.prune_objects(file_id, info, grace=0)  # As a front end does once it saved info
+
+        assert info["revision"] == 12 and len(fm.list_versions(info)) == 13
+        assert fm.get_file(file_id, kek, info) == contents[-1]
+        storage = [v["storage"] for v in info["versions"]]
+        assert storage[0] == "full" and storage[SNAPSHOT_EVERY] == "full"
+        assert storage.count("delta") == 10
+        stats = fm.get_vault_stats()
+        assert stats["total_files"] == 1
+        assert stats["total_size"] < 4 * len(contents[0])
+
+        # Test 3: Every revision can be rebuilt and restored
+        print("\nTest 3: Restoring")
+        for revision, content in enumerate(contents):
+            assert fm.get_version(file_id, revision, kek, info) == content
+        info = fm.restore_version(file_id, 3, kek, info)
+        fm.prune_objects(file_id, info, grace=0)
+        assert info["revision"] == 13
+        assert fm.get_file(file_id, kek, info) == contents[3]
+        assert fm.get_version(file_id, 12, kek, info) == contents[12]
+
+        # Test 4: Scrub knows about revision objects
+        print("\nTest 4: Scrub")
+        report = VaultScrubber(fm).scrub({file_id: info}, kek, resume=False)
+        assert report["ok"] == [file_id] and report["orphaned"] == []
+        fm.backend.delete(fm._revision_key(file_id, info["versions"][5]))
+        report = VaultScrubber(fm).scrub({file_id: info}, kek, resume=False)
+        assert report["corrupt"] == [file_id]
+
+        # An update never touches stored objects: unsaved, the old entry still holds
+        before = {o["key"]: o["size"] for o in fm.backend.list("encrypted_files/")}
+        unsaved = fm.update_bytes(file_id, os.urandom(1000), kek, info)
+        after = {o["key"]: o["size"] for o in fm.backend.list("encrypted_files/")}
+        assert all(after[key] == size for key, size in before.items())
+        assert fm.verify_file(file_id, kek, info)
+        assert fm.get_file(file_id, kek, unsaved) != contents[3]
+        # Its objects are newer than the saved entry, so pruning keeps them
+        assert fm.prune_objects(file_id, info, grace=0) == 0
+
+        # Test 5: Deleting removes the history too
+        print("\nTest 5: Delete")
+        fm.delete_file(file_id)
+        assert fm.backend.list("encrypted_files/") == []
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\n" + "=" * 40)
+    print("------ Versioning tests completed!")
+
+if __name__ == "__main__":
+    test_versioning()
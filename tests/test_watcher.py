@@ -0,0 +1,143 @@
+# tests/test_watcher.py
+"""
+Test the watch-folder auto-ingest
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from src.auth.key_manager import KeyManager
+from src.storage.file_manager import FileManager
+from src.storage.watcher import FolderWatcher
+
+def wait_idle(watcher):
+    """Let queued encryptions finish, then commit them"""
+    while watcher.get_stats()["encrypting"]:
+        time.sleep(0.01)
+    watcher.commit(force=True)
+
+def test_watcher():
+    print("🧪 Testing Folder Watcher...")
+    print("-" * 40)
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        vault = os.path.join(work_dir, "vault")
+        staging = os.path.join(work_dir, "staging")
+        os.makedirs(os.path.join(staging, "sub"))
+        km = KeyManager(vault)
+        km.initialize_vault("WatchPassword1!")
+        kek = km.unlock_vault("WatchPassword1!")
+        fm = FileManager(vault)
+
+        files = {}
+        for i in range(20):
+            name = os.path.join(staging, "sub" if i % 2 else "", f"doc_{i}.txt")
+            files[name] = f"document {i}".encode() * 100
+            with open(name, 'wb') as f:
+                f.write(files[name])
+        open(os.path.join(staging, "download.part"), 'wb').close()
+
+        watcher = FolderWatcher(km, fm, kek, [staging], settle_time=0.2, batch_size=5)
+
+        # Test 1: Files are held back until they settle
+        print("Test 1: Debounce")
+        watcher.run_once()
+        stats = watcher.get_stats()
+        assert stats["waiting_to_settle"] == 20 and stats["files_ingested"] == 0
+        time.sleep(0.25)
+        watcher.run_once()
+        wait_idle(watcher)
+
+        # Test 2: Everything committed in batches
+        print("\nTest 2: Ingest and commit")
+        saved = km.load_metadata(kek)
+        assert len(saved) == 20
+        for info in saved.values():
+            path = os.path.join(info["original_path"], info["original_name"])
+            assert fm.get_file(info["file_id"], kek, info) == files[path]
+        stats = watcher.get_stats()
+        assert stats["files_ingested"] == 20 and stats["queue_depth"] == 0
+
+        # Test 3: Unchanged files are not ingested twice, changed ones become versions
+        print("\nTest 3: Changes")
+        changed = os.path.join(staging, "doc_0.txt")
+        with open(changed, 'ab') as f:
+            f.write(b" edited")
+        for _ in range(2):
+            watcher.run_once()
+            time.sleep(0.25)
+        watcher.run_once()
+        wait_idle(watcher)
+        saved = km.load_metadata(kek)
+        assert len(saved) == 20
+        entry = [i for i in saved.values() if i["original_name"] == "doc_0.txt"][0]
+        assert entry["revision"] == 1
+        assert fm.get_file(entry["file_id"], kek, entry) == files[changed] + b" edited"
+        watcher.stop()
+
+        # Test 4: Originals removed after commit
+        print("\nTest 4: Removing originals")
+        new_file = os.path.join(staging, "new.bin")
+        with open(new_file, 'wb') as f:
+            f.write(os.urandom(5000))
+        watcher = FolderWatcher(km, fm, kek, [staging], settle_time=0, remove_originals=True)
+        watcher.run_once()
+        watcher.run_once()
+        wait_idle(watcher)
+        watcher.stop()
+        assert not os.path.exists(new_file) and os.path.exists(changed)
+        assert os.path.exists(os.path.join(staging, "download.part"))
+        assert len(km.load_metadata(kek)) == 21
+
+        # Test 5: Same-size edits made while the watcher was stopped become versions
+        print("\nTest 5: Changed while stopped")
+        edited = os.path.join(staging, "doc_2.txt")
+        with open(edited, 'wb') as f:
+            f.write(files[edited].upper())
+        touched = os.path.join(staging, "sub", "doc_3.txt")
+        os.utime(touched)  # Newer mtime, same content
+        watcher = FolderWatcher(km, fm, kek, [staging], settle_time=0)
+        watcher.run_once()
+        watcher.run_once()
+        wait_idle(watcher)
+        watcher.stop()
+        saved = km.load_metadata(kek)
+        assert len(saved) == 21
+        entry = [i for i in saved.values() if i["original_name"] == "doc_2.txt"][0]
+        assert entry["revision"] == 1
+        assert fm.get_file(entry["file_id"], kek, entry) == files[edited].upper()
+        assert watcher.get_stats()["files_ingested"] == 1
+
+        # Test 6: The watch loop survives a failed commit and retries the batch
+        print("\nTest 6: Errors")
+        watcher = FolderWatcher(km, fm, kek, [staging], settle_time=0,
+                                poll_interval=0.05, commit_interval=0)
+        def failing_load(*args):
+            del km.load_metadata  # Fails once
+            raise OSError("backend unavailable")
+        km.load_metadata = failing_load
+        with open(os.path.join(staging, "another.bin"), 'wb') as f:
+            f.write(os.urandom(5000))
+        watcher.start()
+        deadline = time.monotonic() + 10
+        while watcher.get_stats()["commits"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        watcher.stop()
+        stats = watcher.get_stats()
+        assert stats["errors"] == 1 and stats["commits"] == 1
+        assert len(km.load_metadata(kek)) == 22
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\n" + "=" * 40)
+    print("------ Watcher tests completed!")
+
+if __name__ == "__main__":
+    test_watcher()